@@ -6,12 +6,14 @@ Slide Search CLI - Search slide design databases for strategies, layouts, copy,
 
 import sys
 import json
+import atexit
 import argparse
 from slide_search_core import (
     search, search_all, AVAILABLE_DOMAINS,
     search_with_context, get_layout_for_goal, get_typography_for_slide,
     get_color_for_emotion, get_background_config
 )
+import profiling  # importable once slide_search_core has put the shared engine on sys.path
 
 
 def format_result(result, domain):
@@ -117,6 +119,7 @@ Examples:
   search-slides.py "two column" -d layout
   search-slides.py "startup funding" --all    # Search all domains
   search-slides.py "metrics dashboard" --json # JSON output
+  search-slides.py "investor pitch" --profile # Timing tree on stderr
 
 Contextual Search (Premium System):
   search-slides.py "problem slide" --context --position 2 --total 9
@@ -143,8 +146,14 @@ Contextual Search (Premium System):
                         help="Total slides in deck (default: 9)")
     parser.add_argument("--prev-emotion", type=str, default=None,
                         help="Previous slide's emotion for contrast calculation")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a JSON per-stage timing tree to stderr")
 
     args = parser.parse_args()
+    if args.profile:
+        # main() returns from several places; report once on the way out
+        profiling.start("search-slides.py")
+        atexit.register(lambda: print(json.dumps(profiling.stop(), indent=2), file=sys.stderr))
 
     # Contextual search mode
     if args.context:
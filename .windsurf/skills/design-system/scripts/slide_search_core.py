@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Slide Search Core - BM25 search engine for slide design databases
+Slide Search Core - slide design databases, searched through the shared
+ui-ux-pro-max BM25 engine (ui-ux-pro-max/scripts/engine.py)
 """
 
 import csv
-import re
+import sys
 from pathlib import Path
-from math import log
-from collections import defaultdict
+
+# The BM25 engine lives with ui-ux-pro-max and is shared by every skill, so
+# this skill needs ui-ux-pro-max installed next to it (skills/ui-ux-pro-max)
+_ENGINE_DIR = Path(__file__).resolve().parents[2] / "ui-ux-pro-max" / "scripts"
+if not (_ENGINE_DIR / "engine.py").is_file():
+    raise ImportError(f"The slide search needs the ui-ux-pro-max skill installed next to this one "
+                      f"(missing {_ENGINE_DIR / 'engine.py'})")
+# Searched first, so an installed top-level engine/fuzzy/facets/positions/profiling
+# module can't shadow the shared one
+sys.path.insert(0, str(_ENGINE_DIR))
+from engine import KeywordMatcher, register_datasets, search_dataset
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -37,70 +47,26 @@ CSV_CONFIG = {
     }
 }
 
+# Domains are indexed and searched by the shared engine under this name
+DATASET_NAME = "slides"
+register_datasets(DATASET_NAME, DATA_DIR, CSV_CONFIG)
+
 AVAILABLE_DOMAINS = list(CSV_CONFIG.keys())
 
 
-# ============ BM25 IMPLEMENTATION ============
-class BM25:
-    """BM25 ranking algorithm for text search"""
-
-    def __init__(self, k1=1.5, b=0.75):
-        self.k1 = k1
-        self.b = b
-        self.corpus = []
-        self.doc_lengths = []
-        self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
-        self.N = 0
-
-    def tokenize(self, text):
-        """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
-
-    def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
-        if self.N == 0:
-            return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
-        self.avgdl = sum(self.doc_lengths) / self.N
-
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
-
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
-
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
-
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
-
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
-
-            scores.append((idx, score))
-
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+# ============ DOMAIN DETECTION ============
+# Plain substring hits ("pas" also counts inside "compass"), scanned in one pass
+DOMAIN_KEYWORDS = {
+    "strategy": ["pitch", "deck", "investor", "yc", "seed", "series", "demo", "sales", "webinar",
+                 "conference", "board", "qbr", "all-hands", "duarte", "kawasaki", "structure"],
+    "layout": ["slide", "layout", "grid", "column", "title", "hero", "section", "cta",
+               "screenshot", "quote", "timeline", "comparison", "pricing", "team"],
+    "copy": ["headline", "copy", "formula", "aida", "pas", "hook", "cta", "benefit",
+             "objection", "proof", "testimonial", "urgency", "scarcity"],
+    "chart": ["chart", "graph", "bar", "line", "pie", "funnel", "metrics", "data",
+              "visualization", "kpi", "trend", "comparison", "heatmap", "gauge"]
+}
+_DOMAIN_MATCHER = KeywordMatcher(DOMAIN_KEYWORDS, word_boundary=False)
 
 
 # ============ SEARCH FUNCTIONS ============
@@ -110,49 +76,9 @@ def _load_csv(filepath):
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
-
-    data = _load_csv(filepath)
-
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
-
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
-
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
-
-    return results
-
-
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "strategy": ["pitch", "deck", "investor", "yc", "seed", "series", "demo", "sales", "webinar",
-                     "conference", "board", "qbr", "all-hands", "duarte", "kawasaki", "structure"],
-        "layout": ["slide", "layout", "grid", "column", "title", "hero", "section", "cta",
-                   "screenshot", "quote", "timeline", "comparison", "pricing", "team"],
-        "copy": ["headline", "copy", "formula", "aida", "pas", "hook", "cta", "benefit",
-                 "objection", "proof", "testimonial", "urgency", "scarcity"],
-        "chart": ["chart", "graph", "bar", "line", "pie", "funnel", "metrics", "data",
-                  "visualization", "kpi", "trend", "comparison", "heatmap", "gauge"]
-    }
-
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "strategy"
+    return _DOMAIN_MATCHER.best(query, "strategy")
 
 
 def search(query, domain=None, max_results=MAX_RESULTS):
@@ -166,7 +92,7 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    results = search_dataset(DATASET_NAME, domain if domain in CSV_CONFIG else "strategy", query, max_results)
 
     return {
         "domain": domain,
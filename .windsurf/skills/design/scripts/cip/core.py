@@ -1,14 +1,23 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-CIP Design Core - BM25 search engine for Corporate Identity Program design guidelines
+CIP Design Core - Corporate Identity Program design guidelines, searched
+through the shared ui-ux-pro-max BM25 engine (ui-ux-pro-max/scripts/engine.py)
 """
 
-import csv
-import re
+import sys
 from pathlib import Path
-from math import log
-from collections import defaultdict
+
+# The BM25 engine lives with ui-ux-pro-max and is shared by every skill, so
+# this skill needs ui-ux-pro-max installed next to it (skills/ui-ux-pro-max)
+_ENGINE_DIR = Path(__file__).resolve().parents[3] / "ui-ux-pro-max" / "scripts"
+if not (_ENGINE_DIR / "engine.py").is_file():
+    raise ImportError(f"The CIP search needs the ui-ux-pro-max skill installed next to this one "
+                      f"(missing {_ENGINE_DIR / 'engine.py'})")
+# Searched first, so an installed top-level engine/fuzzy/facets/positions/profiling
+# module can't shadow the shared one
+sys.path.insert(0, str(_ENGINE_DIR))
+from engine import KeywordMatcher, register_datasets, search_dataset
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent.parent / "data" / "cip"
@@ -37,116 +46,26 @@ CSV_CONFIG = {
     }
 }
 
+# Domains are indexed and searched by the shared engine under this name
+DATASET_NAME = "cip"
+register_datasets(DATASET_NAME, DATA_DIR, CSV_CONFIG)
 
-# ============ BM25 IMPLEMENTATION ============
-class BM25:
-    """BM25 ranking algorithm for text search"""
-
-    def __init__(self, k1=1.5, b=0.75):
-        self.k1 = k1
-        self.b = b
-        self.corpus = []
-        self.doc_lengths = []
-        self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
-        self.N = 0
-
-    def tokenize(self, text):
-        """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
-
-    def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
-        if self.N == 0:
-            return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
-        self.avgdl = sum(self.doc_lengths) / self.N
-
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
-
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
-
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
-
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
-
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
-
-            scores.append((idx, score))
-
-        return sorted(scores, key=lambda x: x[1], reverse=True)
-
-
-# ============ SEARCH FUNCTIONS ============
-def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
-
-
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
-
-    data = _load_csv(filepath)
-
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
-
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
-
-    return results
+# ============ DOMAIN DETECTION ============
+# Plain substring hits ("car" also counts inside "card"), scanned in one pass
+DOMAIN_KEYWORDS = {
+    "deliverable": ["card", "letterhead", "envelope", "folder", "shirt", "cap", "badge", "signage", "vehicle", "car", "van", "stationery", "uniform", "merchandise", "packaging", "banner", "booth"],
+    "style": ["style", "minimal", "modern", "luxury", "vintage", "industrial", "elegant", "bold", "corporate", "organic", "playful"],
+    "industry": ["tech", "finance", "legal", "healthcare", "hospitality", "food", "fashion", "retail", "construction", "logistics"],
+    "mockup": ["mockup", "scene", "context", "photo", "shot", "lighting", "background", "studio", "lifestyle"]
+}
+_DOMAIN_MATCHER = KeywordMatcher(DOMAIN_KEYWORDS, word_boundary=False)
 
 
+# ============ SEARCH FUNCTIONS ============
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "deliverable": ["card", "letterhead", "envelope", "folder", "shirt", "cap", "badge", "signage", "vehicle", "car", "van", "stationery", "uniform", "merchandise", "packaging", "banner", "booth"],
-        "style": ["style", "minimal", "modern", "luxury", "vintage", "industrial", "elegant", "bold", "corporate", "organic", "playful"],
-        "industry": ["tech", "finance", "legal", "healthcare", "hospitality", "food", "fashion", "retail", "construction", "logistics"],
-        "mockup": ["mockup", "scene", "context", "photo", "shot", "lighting", "background", "studio", "lifestyle"]
-    }
-
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "deliverable"
+    return _DOMAIN_MATCHER.best(query, "deliverable")
 
 
 def search(query, domain=None, max_results=MAX_RESULTS):
@@ -160,7 +79,7 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    results = search_dataset(DATASET_NAME, domain if domain in CSV_CONFIG else "deliverable", query, max_results)
 
     return {
         "domain": domain,
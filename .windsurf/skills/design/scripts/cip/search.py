@@ -12,6 +12,7 @@ from pathlib import Path
 # Add parent directory for imports
 sys.path.insert(0, str(Path(__file__).parent))
 from core import search, search_all, get_cip_brief, CSV_CONFIG
+import profiling  # importable once core has put the shared engine on sys.path
 
 
 def format_results(results, domain):
@@ -82,6 +83,9 @@ Examples:
 
   # JSON output
   python search.py "vehicle branding" --json
+
+  # Per-stage timing tree on stderr
+  python search.py "business card" --profile
         """
     )
 
@@ -94,8 +98,11 @@ Examples:
     parser.add_argument("--brand", "-b", default="BrandName", help="Brand name for CIP brief")
     parser.add_argument("--style", "-s", help="Style override for CIP brief")
     parser.add_argument("--json", "-j", action="store_true", help="Output as JSON")
+    parser.add_argument("--profile", action="store_true", help="Print a JSON per-stage timing tree to stderr")
 
     args = parser.parse_args()
+    if args.profile:
+        profiling.start("cip/search.py")
 
     if args.cip_brief:
         brief = get_cip_brief(args.brand, args.query, args.style)
@@ -122,6 +129,9 @@ Examples:
             print(f"Results: {result['count']}")
             print(format_results(result.get("results", []), result["domain"]))
 
+    if args.profile:
+        print(json.dumps(profiling.stop(), indent=2), file=sys.stderr)
+
 
 if __name__ == "__main__":
     main()
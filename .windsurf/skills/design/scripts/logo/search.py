@@ -4,12 +4,16 @@
 Logo Design Search - CLI for searching logo design guidelines
 Usage: python search.py "<query>" [--domain <domain>] [--max-results 3]
        python search.py "<query>" --design-brief [-p "Brand Name"]
+       python search.py "<query>" --profile   (JSON timing tree on stderr)
 
 Domains: style, color, industry
 """
 
 import argparse
+import json
+import sys
 from core import CSV_CONFIG, MAX_RESULTS, search, search_all
+import profiling  # importable once core has put the shared engine on sys.path
 
 
 def format_output(result):
@@ -99,8 +103,11 @@ if __name__ == "__main__":
     parser.add_argument("--json", action="store_true", help="Output as JSON")
     parser.add_argument("--design-brief", "-db", action="store_true", help="Generate comprehensive design brief")
     parser.add_argument("--brand-name", "-p", type=str, default=None, help="Brand name for design brief")
+    parser.add_argument("--profile", action="store_true", help="Print a JSON per-stage timing tree to stderr")
 
     args = parser.parse_args()
+    if args.profile:
+        profiling.start("logo/search.py")
 
     if args.design_brief:
         result = generate_design_brief(args.query, args.brand_name)
@@ -108,7 +115,9 @@ if __name__ == "__main__":
     else:
         result = search(args.query, args.domain, args.max_results)
         if args.json:
-            import json
             print(json.dumps(result, indent=2, ensure_ascii=False))
         else:
             print(format_output(result))
+
+    if args.profile:
+        print(json.dumps(profiling.stop(), indent=2), file=sys.stderr)
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - checks BM25 rankings and measures query latency
+Usage: python benchmark.py [--repeat 20]
+       python benchmark.py --suite [--scales 1,10,100,1000] [--max-mib 32] [--engines uipro,logo] [--repeat 3]
+                           [--baseline bench.json] [--save-baseline bench.json] [--tolerance 0.25]
+
+Default mode replays a fixed query set against every CSV_CONFIG domain and
+STACK_CONFIG stack, comparing the inverted-index scorer (BM25.top_k) against
+the original exhaustive per-document loop. Exits non-zero if any ranking differs.
+
+--suite replays per-engine query sets through the public search() of every
+skill that searches through the shared engine (this skill's core, design/logo,
+design/cip and design-system slides), against the real CSVs (scale 1) and synthetic corpora
+scaled N times from them. Per engine, domain and scale it reports p50/p95/p99
+query latency, cold index build time, traced peak allocation, net allocated
+blocks and process peak RSS. With --baseline it exits non-zero when a metric
+is worse than the stored run by more than --tolerance. Timings only compare
+on one machine under the same load, so no baseline is shipped: save one with
+--save-baseline before a change and check against it after.
+
+An index takes roughly 25-50 times the size of its CSV in memory, so a scaled
+corpus larger than --max-mib is skipped: google-fonts already needs ~400 MiB
+at x10, and x1000 of every domain would need tens of GiB. The small domains
+still run at x1000; --max-mib 0 lifts the limit.
+"""
+
+import argparse
+import csv
+import importlib.util
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import core
+import engine
+from core import CSV_CONFIG, STACK_CONFIG, _STACK_COLS, DATA_DIR, MAX_RESULTS, load_index
+
+QUERIES = [
+    "glassmorphism dark mode",
+    "saas dashboard analytics",
+    "minimal clean whitespace typography",
+    "serif font cyrillic variable",
+    "accessibility keyboard focus navigation",
+    "ecommerce luxury fashion",
+    "bar chart trend comparison",
+    "hero pricing testimonial cta",
+    "react suspense server component waterfall",
+    "scroll reveal stagger parallax",
+    "form input validation error",
+    "fintech crypto trust blue",
+    # design-system style queries: product + style priority + variance keywords
+    "saas dashboard minimal clean flat modern professional grid whitespace data dense calm",
+    "beauty spa wellness soft elegant pastel organic serif calm luxury minimal glassmorphism gradient playful bold",
+]
+
+
+def naive_rank(bm25, query):
+    """Reference ranking: the original exhaustive BM25 loop over every document"""
+    query_tokens = bm25.tokenize(query)
+    scores = []
+    for idx, doc in enumerate(bm25.corpus):
+        score = 0
+        doc_len = bm25.doc_lengths[idx]
+        term_freqs = defaultdict(int)
+        for word in doc:
+            term_freqs[word] += 1
+        for token in query_tokens:
+            if token in bm25.idf:
+                tf = term_freqs[token]
+                idf = bm25.idf[token]
+                numerator = tf * (bm25.k1 + 1)
+                denominator = tf + bm25.k1 * (1 - bm25.b + bm25.b * doc_len / bm25.avgdl)
+                score += idf * numerator / denominator
+        scores.append((idx, score))
+    return sorted(scores, key=lambda x: x[1], reverse=True)
+
+
+def datasets():
+    """Yield (name, filepath, search_cols, output_cols) for every searchable CSV"""
+    for domain, config in CSV_CONFIG.items():
+        yield domain, DATA_DIR / config["file"], config["search_cols"], config["output_cols"]
+    for stack, config in STACK_CONFIG.items():
+        yield f"stack:{stack}", DATA_DIR / config["file"], _STACK_COLS["search_cols"], _STACK_COLS["output_cols"]
+
+
+def _timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(repeat, k=MAX_RESULTS):
+    """Compare rankings and timings; returns the number of mismatching queries"""
+    mismatches = 0
+    print(f"{'dataset':<22}{'docs':>6}{'naive ms':>11}{'top_k ms':>11}{'speedup':>9}")
+    for name, filepath, search_cols, output_cols in datasets():
+        if not filepath.exists():
+            continue
+        bm25 = load_index(filepath, search_cols, output_cols).bm25
+        for query in QUERIES:
+            expected = [(idx, s) for idx, s in naive_rank(bm25, query)[:k] if s > 0]
+            if bm25.top_k(query, k) != expected or bm25.score(query) != naive_rank(bm25, query):
+                mismatches += 1
+                print(f"  MISMATCH {name}: {query!r}", file=sys.stderr)
+        naive_ms = _timed(lambda: [naive_rank(bm25, q) for q in QUERIES], repeat)
+        fast_ms = _timed(lambda: [bm25.top_k(q, k) for q in QUERIES], repeat)
+        print(f"{name:<22}{bm25.N:>6}{naive_ms:>11.2f}{fast_ms:>11.2f}{naive_ms / max(fast_ms, 1e-9):>8.1f}x")
+    print(f"\n{len(QUERIES)} queries per dataset, {'identical rankings' if not mismatches else f'{mismatches} mismatches'}")
+    return mismatches
+
+
+# ============ SUITE ============
+_SKILLS_DIR = Path(__file__).resolve().parents[2]
+
+# engine -> (search module relative to the skills directory, query set); each
+# module registers its CSVs with the shared engine (engine.DATASETS) on import
+ENGINES = {
+    "uipro": (None, QUERIES),
+    "logo": ("design/scripts/logo/core.py", [
+        "minimalist tech wordmark",
+        "luxury gold emblem",
+        "playful mascot gaming",
+        "healthcare trust blue",
+        "vintage badge restaurant",
+    ]),
+    "cip": ("design/scripts/cip/core.py", [
+        "business card minimal",
+        "letterhead corporate",
+        "vehicle branding fleet",
+        "signage storefront bold",
+        "packaging premium",
+    ]),
+    "slides": ("design-system/scripts/slide_search_core.py", [
+        "pitch deck investor traction",
+        "problem solution hook",
+        "comparison chart revenue growth",
+        "team slide grid",
+        "urgency scarcity cta",
+    ]),
+}
+
+# Largest scaled CSV --suite builds by default (see the module docstring)
+MAX_CORPUS_BYTES = 32 * 1024 * 1024
+
+# Metrics compared against a baseline, and the absolute slack under which a change is noise
+_BASELINE_METRICS = {"p50_ms": 0.05, "p95_ms": 0.1, "build_ms": 1.0, "peak_kib": 64}
+
+
+def _load_engine(name):
+    """The search module behind an engine name"""
+    source = ENGINES[name][0]
+    if source is None:
+        return core
+    spec = importlib.util.spec_from_file_location(f"_bench_{name}", _SKILLS_DIR / source)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def scale_csv(src, dest, search_cols, scale, seed=0):
+    """Write src scaled to scale times its rows into dest.
+
+    Copy 0 is the original data; every further copy swaps about a fifth of
+    the words in each search column for words drawn from the same column, so
+    the vocabulary and term statistics grow roughly like a real, larger
+    dataset instead of repeating identical documents.
+    """
+    with open(src, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        fields, rows = reader.fieldnames, list(reader)
+    vocab = {col: [w for row in rows for w in str(row.get(col) or "").split()] for col in search_cols}
+    rng = random.Random(f"{seed}:{Path(src).name}")
+    with open(dest, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+        for _ in range(scale - 1):
+            for row in rows:
+                row = dict(row)
+                for col in search_cols:
+                    words = str(row.get(col) or "").split()
+                    if words and vocab[col]:
+                        row[col] = " ".join(rng.choice(vocab[col]) if rng.random() < 0.2 else w for w in words)
+                writer.writerow(row)
+
+
+def _percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def _peak_rss_kib():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss  # bytes on macOS, KiB elsewhere
+
+
+def _dataset(module):
+    """Name the module's CSVs are registered under in engine.DATASETS"""
+    return core.UIPRO_DATASETS if module is core else module.DATASET_NAME
+
+
+def _build(module, domain):
+    """Cold index build for one domain; returns (seconds, rows)
+
+    Only this domain's index is dropped. The others stay in memory, so fuzzy
+    queries checking the dataset's vocabulary do not rebuild them mid-run.
+    """
+    args = engine._index_args(engine.dataset_target(_dataset(module), domain))
+    engine._INDEXES.pop(engine._memory_key(*args), None)
+    start = time.perf_counter()
+    rows = engine.load_index(*args).rows
+    return time.perf_counter() - start, len(rows)
+
+
+def _measure(module, domain, queries, repeat):
+    """Latency percentiles, build time and allocation figures for one domain of one engine"""
+    build_s, rows = _build(module, domain)
+    for query in queries:  # warm-up: fills the vocabulary the build just invalidated
+        module.search(query, domain)
+    samples = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            module.search(query, domain)
+            samples.append((time.perf_counter() - start) * 1000)
+    # Second pass under tracemalloc: it slows Python down, so latencies come from the pass above
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    _build(module, domain)
+    for query in queries:
+        module.search(query, domain)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": rows,
+        "p50_ms": _percentile(samples, 50), "p95_ms": _percentile(samples, 95), "p99_ms": _percentile(samples, 99),
+        "build_ms": build_s * 1000, "peak_kib": peak // 1024, "blocks": sys.getallocatedblocks() - blocks,
+        "rss_kib": _peak_rss_kib(),
+    }
+
+
+def run_suite(engines=None, scales=(1, 10, 100, 1000), domains=None, repeat=3, seed=0, progress=None,
+              max_bytes=MAX_CORPUS_BYTES):
+    """Measure every engine/domain/scale; returns {"engine/domain@xN": metrics}
+
+    Scaled corpora over max_bytes of CSV (None: no limit) are skipped.
+    progress(name, metrics) is called as each entry completes.
+    """
+    report = {}
+    saved = {"INDEX_CACHE_ENABLED": engine.INDEX_CACHE_ENABLED, "BUNDLE_PATH": engine.BUNDLE_PATH,
+             "maxsize": engine.RESULT_CACHE.maxsize}
+    # Every build is cold and every query reaches the index: no disk tiers, no result cache
+    engine.INDEX_CACHE_ENABLED = False
+    engine.RESULT_CACHE.maxsize = 0
+    try:
+        with tempfile.TemporaryDirectory(prefix="uipro-bench-") as tmp:
+            engine.BUNDLE_PATH = Path(tmp) / "none.bundle"
+            for name in engines or ENGINES:
+                module = _load_engine(name)
+                data_dir, queries = module.DATA_DIR, ENGINES[name][1]
+                try:
+                    for scale in scales:
+                        if scale != 1:
+                            module.DATA_DIR = Path(tmp) / f"{name}-x{scale}"
+                            module.DATA_DIR.mkdir(exist_ok=True)
+                        engine.register_datasets(_dataset(module), module.DATA_DIR, module.CSV_CONFIG)
+                        core.clear_index_cache()  # release the previous scale's indexes
+                        for domain, config in module.CSV_CONFIG.items():
+                            src = data_dir / config["file"]
+                            if domains and domain not in domains or not src.exists():
+                                continue
+                            if scale != 1 and max_bytes and src.stat().st_size * scale > max_bytes:
+                                continue
+                            if scale != 1:
+                                scale_csv(src, module.DATA_DIR / config["file"], config["search_cols"], scale, seed)
+                            key = f"{name}/{domain}@x{scale}"
+                            report[key] = _measure(module, domain, queries, repeat)
+                            if progress:
+                                progress(key, report[key])
+                finally:
+                    module.DATA_DIR = data_dir
+                    engine.register_datasets(_dataset(module), data_dir, module.CSV_CONFIG)
+    finally:
+        engine.INDEX_CACHE_ENABLED = saved["INDEX_CACHE_ENABLED"]
+        engine.BUNDLE_PATH = saved["BUNDLE_PATH"]
+        engine.RESULT_CACHE.maxsize = saved["maxsize"]
+        core.clear_index_cache()
+    return report
+
+
+def _print_row(name, m):
+    rss = "-" if m["rss_kib"] is None else m["rss_kib"] // 1024
+    print(f"{name:<28}{m['rows']:>8}{m['p50_ms']:>9.2f}{m['p95_ms']:>9.2f}{m['p99_ms']:>9.2f}"
+          f"{m['build_ms']:>10.1f}{m['peak_kib']:>10}{m['blocks']:>9}{rss:>8}", flush=True)
+
+
+def compare(report, baseline, tolerance=0.25):
+    """Regressions of report against baseline: [(name, metric, baseline value, new value), ...]
+
+    A metric regresses when it exceeds the baseline by more than tolerance
+    (a fraction) and by more than its absolute noise floor. Entries missing
+    from either side are ignored.
+    """
+    regressions = []
+    for name, old in baseline.items():
+        new = report.get(name)
+        if new is None:
+            continue
+        for metric, floor in _BASELINE_METRICS.items():
+            if metric in old and new[metric] > old[metric] * (1 + tolerance) and new[metric] - old[metric] > floor:
+                regressions.append((name, metric, old[metric], new[metric]))
+    return regressions
+
+
+def main_suite(args):
+    print(f"{'engine/domain@scale':<28}{'rows':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'build ms':>10}{'peak KiB':>10}{'blocks':>9}{'RSS MiB':>8}")
+    report = run_suite(args.engines, args.scales, args.domains, args.repeat, progress=_print_row,
+                       max_bytes=int(args.max_mib * 1024 * 1024))
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.save_baseline}")
+    if not args.baseline:
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    for name, metric, old, new in regressions:
+        print(f"  REGRESSION {name} {metric}: {old:.2f} -> {new:.2f}", file=sys.stderr)
+    print(f"\n{len(regressions)} regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+def _csv_list(value, kind=str):
+    return [kind(item) for item in value.split(",") if item.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max BM25 benchmark")
+    parser.add_argument("--repeat", "-r", type=int, default=None,
+                        help="Timing repetitions per dataset (default: 20, or 3 with --suite)")
+    parser.add_argument("--suite", action="store_true", help="Latency/memory suite over every engine and scaled corpora")
+    parser.add_argument("--scales", type=lambda v: _csv_list(v, int), default=[1, 10, 100, 1000],
+                        help="Corpus scale factors for --suite (default: 1,10,100,1000)")
+    parser.add_argument("--max-mib", type=float, default=MAX_CORPUS_BYTES / (1024 * 1024),
+                        help="Skip scaled corpora whose CSV would exceed this many MiB; 0 for no limit (default: 32)")
+    parser.add_argument("--engines", type=_csv_list, default=None, help=f"Engines for --suite: {', '.join(ENGINES)}")
+    parser.add_argument("--domains", type=_csv_list, default=None, help="Only these domains for --suite")
+    parser.add_argument("--baseline", help="Fail when --suite results regress against this JSON")
+    parser.add_argument("--save-baseline", help="Write --suite results to this JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression as a fraction (default: 0.25)")
+    args = parser.parse_args()
+    if args.suite:
+        unknown = set(args.engines or ()) - set(ENGINES)
+        if unknown:
+            parser.error(f"unknown engines: {', '.join(sorted(unknown))}")
+        args.repeat = args.repeat or 3
+        sys.exit(main_suite(args))
+    sys.exit(1 if run(args.repeat or 20) else 0)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Vector Backend - optional NumPy/SciPy BM25 scorer for batch queries
+
+The corpus is stored as a CSR document x term matrix whose entries are the
+precomputed BM25 term weights, so a batch of queries is scored with a single
+sparse matrix product. NumPy and SciPy are optional; check AVAILABLE before use
+(engine.py falls back to the pure-Python scorer when they are missing).
+"""
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # optional dependency
+    np = None
+    sparse = None
+
+AVAILABLE = np is not None and sparse is not None
+
+# Queries scored per sparse product; bounds the dense (docs x queries) score block
+QUERY_CHUNK = 512
+
+
+class VectorBM25:
+    """CSR term-weight matrix built from a fitted engine.BM25"""
+
+    def __init__(self, bm25):
+        if not AVAILABLE:
+            raise ImportError("The vector backend requires numpy and scipy")
+        self.tokenize = bm25.tokenize
+        self.N = bm25.N
+        self.vocab = {term: col for col, term in enumerate(bm25.postings)}
+
+        doc_ids, term_ids, tfs = [], [], []
+        for term, col in self.vocab.items():
+            for idx, tf in bm25.postings[term]:
+                doc_ids.append(idx)
+                term_ids.append(col)
+                tfs.append(tf)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        tfs = np.asarray(tfs, dtype=np.float64)
+
+        idf = np.fromiter((bm25.idf[term] for term in self.vocab), dtype=np.float64, count=len(self.vocab))
+        norms = np.asarray(bm25.doc_norms, dtype=np.float64)
+        weights = idf[term_ids] * (tfs * (bm25.k1 + 1)) / (tfs + norms[doc_ids]) if len(tfs) else tfs
+
+        self.weights = sparse.csr_matrix((weights, (doc_ids, term_ids)), shape=(self.N, len(self.vocab)))
+
+    def _query_matrix(self, queries):
+        """Term x query count matrix; repeated tokens count once per occurrence"""
+        rows, cols = [], []
+        for j, query in enumerate(queries):
+            for token in self.tokenize(query):
+                col = self.vocab.get(token)
+                if col is not None:
+                    rows.append(col)
+                    cols.append(j)
+        data = np.ones(len(rows), dtype=np.float64)
+        return sparse.csc_matrix((data, (rows, cols)), shape=(len(self.vocab), len(queries)))
+
+    def top_k_batch(self, queries, k):
+        """Return one [(doc_id, score), ...] list per query, best first, score > 0.
+
+        Ties keep the lower doc_id first, like BM25.top_k. Scores can differ from
+        the pure-Python path in the last ulp because terms are summed in a
+        different order.
+        """
+        results = []
+        if k <= 0:
+            return [[] for _ in queries]
+        for start in range(0, len(queries), QUERY_CHUNK):
+            chunk = queries[start:start + QUERY_CHUNK]
+            scores = (self.weights @ self._query_matrix(chunk)).toarray()
+            # Stable sort on -score keeps the lower doc_id first among ties
+            order = np.argsort(-scores, axis=0, kind="stable")[:k]
+            best = np.take_along_axis(scores, order, axis=0)
+            for j in range(len(chunk)):
+                hits = best[:, j] > 0
+                results.append(list(zip(order[hits, j].tolist(), best[hits, j].tolist())))
+        return results
+
+    def top_k(self, query, k):
+        """Single-query convenience wrapper around top_k_batch"""
+        return self.top_k_batch([query], k)[0]
@@ -2,23 +2,34 @@
 # -*- coding: utf-8 -*-
 """
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
+
+The skill's domains and stacks, domain detection and the search API; the
+indexing and scoring machinery itself lives in engine.py, shared with the
+other skills.
 """
 
-import csv
-import re
+import heapq
+import importlib.util
 from pathlib import Path
-from math import log
 from collections import defaultdict
+from itertools import chain, islice
+
+import engine
+from engine import (BM25, MAX_RESULTS, KeywordMatcher, _cached_search, _index_args, _search_target, dataset_target,
+                    dataset_targets, load_index, register_datasets)
+from facets import FilterError, parse_filters
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
-MAX_RESULTS = 3
 
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type", "AI Prompt Keywords"],
-        "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Light Mode ✓", "Dark Mode ✓", "Performance", "Accessibility", "Framework Compatibility", "Complexity", "AI Prompt Keywords", "CSS/Technical Keywords", "Implementation Checklist", "Design System Variables"]
+        "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Light Mode ✓", "Dark Mode ✓", "Performance", "Accessibility", "Framework Compatibility", "Complexity", "AI Prompt Keywords", "CSS/Technical Keywords", "Implementation Checklist", "Design System Variables"],
+        # BM25F column weights (unlisted search columns weigh 1.0): a hit in the
+        # style name outranks one buried in the long prompt-keyword prose
+        "field_weights": {"Style Category": 3.0, "Keywords": 2.0, "Best For": 1.0, "Type": 1.0, "AI Prompt Keywords": 0.5}
     },
     "color": {
         "file": "colors.csv",
@@ -73,7 +84,18 @@ CSV_CONFIG = {
     "google-fonts": {
         "file": "google-fonts.csv",
         "search_cols": ["Family", "Category", "Stroke", "Classifications", "Keywords", "Subsets", "Designers"],
-        "output_cols": ["Family", "Category", "Stroke", "Classifications", "Styles", "Variable Axes", "Subsets", "Designers", "Popularity Rank", "Google Fonts URL"]
+        "output_cols": ["Family", "Category", "Stroke", "Classifications", "Styles", "Variable Axes", "Subsets", "Designers", "Popularity Rank", "Google Fonts URL"],
+        # Structured filters (see facets.py), e.g. --filter subset=cyrillic --filter popularity<=200
+        "facets": {
+            "category": {"col": "Category", "type": "value"},
+            "subset": {"col": "Subsets", "type": "multi"},
+            "axis": {"col": "Variable Axes", "type": "multi"},
+            "variable": {"col": "Variable Axes", "type": "present"},
+            "style": {"col": "Styles", "type": "multi"},
+            "noto": {"col": "Is Noto", "type": "value"},
+            "popularity": {"col": "Popularity Rank", "type": "range", "numeric": True},
+            "added": {"col": "Date Added", "type": "range"},
+        }
     }
 }
 
@@ -111,164 +133,364 @@ _STACK_COLS = {
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
-# ============ BM25 IMPLEMENTATION ============
-class BM25:
-    """BM25 ranking algorithm for text search"""
-
-    def __init__(self, k1=1.5, b=0.75):
-        self.k1 = k1
-        self.b = b
-        self.corpus = []
-        self.doc_lengths = []
-        self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
-        self.N = 0
-
-    def tokenize(self, text):
-        """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) >= 2]
-
-    def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
-        if self.N == 0:
-            return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
-        self.avgdl = sum(self.doc_lengths) / self.N
-
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
-
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
-
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+# Both are declared to the shared engine (engine.py); stacks are registered
+# under their own name with the common columns filled in
+UIPRO_DATASETS = "ui-ux-pro-max"
+UIPRO_STACKS = "ui-ux-pro-max:stacks"
+register_datasets(UIPRO_DATASETS, DATA_DIR, CSV_CONFIG)
+register_datasets(UIPRO_STACKS, DATA_DIR, {stack: {**config, **_STACK_COLS} for stack, config in STACK_CONFIG.items()})
+
+# The other skills' search modules, by dataset name. Loading one registers its
+# datasets, so --build-data packs them into the same bundle. design/data/icon
+# has none: design/scripts/icon/generate.py keeps its styles inline.
+SKILL_SEARCH_MODULES = {
+    "logo": "design/scripts/logo/core.py",
+    "cip": "design/scripts/cip/core.py",
+    "slides": "design-system/scripts/slide_search_core.py",
+}
+_SKILLS_DIR = Path(__file__).resolve().parents[2]
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+# ============ INDEXES ============
+def build_indexes(targets=None, workers=None):
+    """engine.build_indexes() over targets, by default every domain and stack (see _unified_sources())"""
+    return engine.build_indexes(_unified_sources() if targets is None else targets, workers)
 
-            scores.append((idx, score))
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+def build_bundle(path=None, workers=None):
+    """Compile every domain and stack index, and those of the other skills, into one bundle file (see engine.build_bundle())"""
+    return engine.build_bundle(chain(_unified_sources(), _skill_sources()), path, workers)
 
 
-# ============ SEARCH FUNCTIONS ============
-def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+def clear_index_cache(disk=False):
+    """Drop in-process indexes, the merged index and cached results, and optionally the persisted indexes too"""
+    _UNIFIED.update(parts=(), index=None)
+    engine.clear_index_cache(disk)
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
+# ============ DOMAIN DETECTION ============
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb", "token", "semantic", "accent", "destructive", "muted", "foreground"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard", "fitness", "restaurant", "hotel", "travel", "music", "education", "learning", "legal", "insurance", "medical", "beauty", "pharmacy", "dental", "pet", "dating", "wedding", "recipe", "delivery", "ride", "booking", "calendar", "timer", "tracker", "diary", "note", "chat", "messenger", "crm", "invoice", "parking", "transit", "vpn", "alarm", "weather", "sleep", "meditation", "fasting", "habit", "grocery", "meme", "wardrobe", "plant care", "reading", "flashcard", "puzzle", "trivia", "arcade", "photography", "streaming", "podcast", "newsletter", "marketplace", "freelancer", "coworking", "airline", "museum", "theater", "church", "non-profit", "charity", "kindergarten", "daycare", "senior care", "veterinary", "florist", "bakery", "brewery", "construction", "automotive", "real estate", "logistics", "agriculture", "coding bootcamp"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font pairing", "typography pairing", "heading font", "body font"],
+    "google-fonts": ["google font", "font family", "font weight", "font style", "variable font", "noto", "font for", "find font", "font subset", "font language", "monospace font", "serif font", "sans serif font", "display font", "handwriting font", "font", "typography", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "gsap": ["gsap", "quickto", "scrolltrigger", "stagger", "magnetic cursor", "parallax", "page transition", "scroll reveal", "scroll-triggered", "scrollytelling", "flip plugin", "splittext", "shimmer", "skeleton loader"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
 
-    data = _load_csv(filepath)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+_DOMAIN_MATCHER = KeywordMatcher(DOMAIN_KEYWORDS)
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
-
-    return results
+def rank_domains(query):
+    """Ranked distribution over domains for a query (see KeywordMatcher.rank)"""
+    return _DOMAIN_MATCHER.rank(query)
 
 
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb", "token", "semantic", "accent", "destructive", "muted", "foreground"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard", "fitness", "restaurant", "hotel", "travel", "music", "education", "learning", "legal", "insurance", "medical", "beauty", "pharmacy", "dental", "pet", "dating", "wedding", "recipe", "delivery", "ride", "booking", "calendar", "timer", "tracker", "diary", "note", "chat", "messenger", "crm", "invoice", "parking", "transit", "vpn", "alarm", "weather", "sleep", "meditation", "fasting", "habit", "grocery", "meme", "wardrobe", "plant care", "reading", "flashcard", "puzzle", "trivia", "arcade", "photography", "streaming", "podcast", "newsletter", "marketplace", "freelancer", "coworking", "airline", "museum", "theater", "church", "non-profit", "charity", "kindergarten", "daycare", "senior care", "veterinary", "florist", "bakery", "brewery", "construction", "automotive", "real estate", "logistics", "agriculture", "coding bootcamp"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font pairing", "typography pairing", "heading font", "body font"],
-        "google-fonts": ["google font", "font family", "font weight", "font style", "variable font", "noto", "font for", "find font", "font subset", "font language", "monospace font", "serif font", "sans serif font", "display font", "handwriting font", "font", "typography", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "gsap": ["gsap", "quickto", "scrolltrigger", "stagger", "magnetic cursor", "parallax", "page transition", "scroll reveal", "scroll-triggered", "scrollytelling", "flip plugin", "splittext", "shimmer", "skeleton loader"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
+    return _DOMAIN_MATCHER.best(query, "style")
 
-    scores = {domain: sum(1 for kw in keywords if re.search(r'\b' + re.escape(kw) + r'\b', query_lower)) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
 
+def _domain_target(domain):
+    """Target for a domain; unknown domains use style"""
+    return dataset_target(UIPRO_DATASETS, domain if domain in CSV_CONFIG else "style")
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
-    if domain is None:
-        domain = detect_domain(query)
-
-    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
-    filepath = DATA_DIR / config["file"]
 
-    if not filepath.exists():
-        return {"error": f"File not found: {filepath}", "domain": domain}
+def _stack_target(stack):
+    """Target for a known stack"""
+    return dataset_target(UIPRO_STACKS, stack)
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
 
+def _domain_result(domain, query, file, results):
     return {
         "domain": domain,
         "query": query,
-        "file": config["file"],
+        "file": file,
+        "count": len(results),
+        "results": results
+    }
+
+
+def _stack_result(stack, query, file, results):
+    return {
+        "domain": "stack",
+        "stack": stack,
+        "query": query,
+        "file": file,
         "count": len(results),
         "results": results
     }
 
 
+def search(query, domain=None, max_results=MAX_RESULTS, filters=None):
+    """Main search function with auto-domain detection.
+
+    filters narrow domains that declare facets (google-fonts), e.g.
+    ["subset=cyrillic", "popularity<=200"]; see facets.py for the syntax.
+    """
+    if domain is None:
+        domain = detect_domain(query)
+
+    target = _domain_target(domain)
+
+    if not target.filepath.exists():
+        return {"error": f"File not found: {target.filepath}", "domain": domain}
+
+    try:
+        results = _cached_search(UIPRO_DATASETS, domain, target, query, max_results, filters)
+    except FilterError as e:
+        return {"error": str(e), "domain": domain}
+    return _domain_result(domain, query, target.file, results)
+
+
 def search_stack(query, stack, max_results=MAX_RESULTS):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
 
-    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+    target = _stack_target(stack)
+
+    if not target.filepath.exists():
+        return {"error": f"Stack file not found: {target.filepath}", "stack": stack}
 
-    if not filepath.exists():
-        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+    results = _cached_search(UIPRO_STACKS, stack, target, query, max_results)
+    return _stack_result(stack, query, target.file, results)
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+
+def search_many(queries, domain=None, max_results=MAX_RESULTS, stack=None, backend=None):
+    """Run many searches, building each domain/stack index at most once.
+
+    Each query is a string or a dict with "query" and optional "domain",
+    "stack", "max_results", "filters" and "id" (echoed back).
+    domain/stack/max_results are the defaults for entries that don't set
+    their own. Returns one search()/search_stack()-shaped dict per query, in
+    input order.
+    """
+    return list(iter_search_many(queries, domain, max_results, stack, backend))
+
+
+def iter_search_many(queries, domain=None, max_results=MAX_RESULTS, stack=None, backend=None, chunk_size=1000):
+    """Streaming search_many(): consumes queries lazily, chunk_size at a time"""
+    queries = iter(queries)
+    while True:
+        chunk = list(islice(queries, chunk_size))
+        if not chunk:
+            return
+        yield from _search_chunk(chunk, domain, max_results, stack, backend)
+
+
+def _spec_max_results(value, default):
+    """max_results of one search_many() entry: a non-negative int, or default when unset"""
+    if value is None:
+        return default
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    raise ValueError(f"Invalid max_results: {value!r} (expected a non-negative integer)")
+
+
+def _spec_name(spec, field):
+    """The domain/stack of one search_many() entry, which must be a string when set"""
+    value = spec.get(field)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"Invalid {field}: {value!r} (expected a string)")
+    return value
+
+
+def _search_chunk(chunk, default_domain, default_max_results, default_stack, backend):
+    """Group a chunk of queries by target CSV and score each group in one batch.
+
+    An entry with a missing query or a malformed max_results, domain, stack
+    or filters gets an error record in its position; the rest still run.
+    """
+    out = [None] * len(chunk)
+    specs = [item if isinstance(item, dict) else {"query": item} for item in chunk]
+    groups = defaultdict(list)  # ("domain"|"stack", name, filters) -> [(pos, query, k)]
+
+    for pos, spec in enumerate(specs):
+        query = spec.get("query")
+        try:
+            k = _spec_max_results(spec.get("max_results"), default_max_results)
+            stack = _spec_name(spec, "stack") or (None if _spec_name(spec, "domain") else default_stack)
+        except ValueError as e:
+            out[pos] = {"error": str(e)}
+            continue
+        if not isinstance(query, str):
+            out[pos] = {"error": "Missing query"}
+        elif stack:
+            if stack in STACK_CONFIG:
+                groups[("stack", stack, ())].append((pos, query, k))
+            else:
+                out[pos] = {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+        else:
+            domain = spec.get("domain") or default_domain or detect_domain(query)
+            try:
+                filters = tuple(parse_filters(spec.get("filters")))
+            except FilterError as e:
+                out[pos] = {"error": str(e), "domain": domain}
+                continue
+            groups[("domain", domain, filters)].append((pos, query, k))
+
+    for (kind, name, filters), members in groups.items():
+        target = _stack_target(name) if kind == "stack" else _domain_target(name)
+        ranked, error = None, None
+        if not target.filepath.exists():
+            error = {"error": f"Stack file not found: {target.filepath}", "stack": name} if kind == "stack" \
+                else {"error": f"File not found: {target.filepath}", "domain": name}
+        else:
+            k_max = max(k for _, _, k in members)
+            try:
+                ranked = _search_target(target, [q for _, q, _ in members], k_max, backend, filters)
+            except FilterError as e:
+                error = {"error": str(e), "domain": name}
+        for i, (pos, query, k) in enumerate(members):
+            if ranked is None:
+                out[pos] = dict(error)
+            elif kind == "stack":
+                out[pos] = _stack_result(name, query, target.file, ranked[i][:k])
+            else:
+                out[pos] = _domain_result(name, query, target.file, ranked[i][:k])
+
+    for pos, spec in enumerate(specs):
+        if "id" in spec:
+            out[pos]["id"] = spec["id"]
+    return out
+
+
+# ============ UNIFIED INDEX ============
+class UnifiedIndex:
+    """Every domain and stack index behind one merged token table.
+
+    Each source keeps its own BM25 statistics (idf, length norms), so a row
+    scores exactly as it would in search()/search_stack(); the merged table
+    just lets one query walk every source's postings in a single pass and
+    skip sources that don't contain any query token.
+    """
+
+    def __init__(self, sources):
+        self.sources = sources  # [(label, Target, SearchIndex)]
+        self._tokenizer = BM25()
+        table = defaultdict(list)  # token -> [(source_no, idf, postings)]
+        for source_no, (_, _, index) in enumerate(sources):
+            for token, plist in index.bm25.postings.items():
+                table[token].append((source_no, index.bm25.idf[token], plist))
+        self.table = dict(table)
+
+    def accumulate(self, query):
+        """Per-source {doc_id: score} dicts for every source with a hit"""
+        scores = defaultdict(dict)
+        for token in self._tokenizer.tokenize(query):
+            for source_no, idf, plist in self.table.get(token, ()):
+                acc = scores[source_no]
+                bm25 = self.sources[source_no][2].bm25
+                k1_plus_1, norms = bm25.k1 + 1, bm25.doc_norms
+                for idx, tf in plist:
+                    acc[idx] = acc.get(idx, 0) + idf * (tf * k1_plus_1) / (tf + norms[idx])
+        return scores
+
+    def top_k(self, query, k, per_source):
+        """(global [(source_no, doc_id, score)], {source_no: [(doc_id, score)]})
+
+        Both lists get the same proximity re-ranking as SearchIndex.top_k_batch().
+        """
+        tokens = self._tokenizer.tokenize(query)
+        scores = self.accumulate(query)
+
+        def ranked(source_no, acc, n):
+            window = n * engine.PROXIMITY_WINDOW if engine.PROXIMITY_WEIGHT else n
+            hits = heapq.nsmallest(window, acc.items(), key=lambda item: (-item[1], item[0]))
+            return self.sources[source_no][2]._rerank(tokens, hits, n)
+
+        by_source = {source_no: ranked(source_no, acc, per_source)
+                     for source_no, acc in scores.items()} if per_source > 0 else {}
+        flat = ((source_no, idx, score) for source_no, acc in scores.items() for idx, score in ranked(source_no, acc, k))
+        best = heapq.nsmallest(k, flat, key=lambda item: (-item[2], item[0], item[1])) if k > 0 else []
+        return best, by_source
+
+
+# Last merged index and the per-source indexes it was built from
+_UNIFIED = {"parts": (), "index": None}
+
+
+def _unified_sources():
+    """(label, Target) for every domain, then every stack ("stack:<name>")"""
+    yield from dataset_targets(UIPRO_DATASETS)
+    for stack, target in dataset_targets(UIPRO_STACKS):
+        yield f"stack:{stack}", target
+
+
+def _skill_sources():
+    """("<dataset>:<domain>", Target) for every domain of the other installed skills"""
+    for name, source in SKILL_SEARCH_MODULES.items():
+        path = _SKILLS_DIR / source
+        if not path.exists():
+            continue
+        if name not in engine.DATASETS:
+            spec = importlib.util.spec_from_file_location(f"_uipro_{name}", path)
+            spec.loader.exec_module(importlib.util.module_from_spec(spec))
+        for domain, target in dataset_targets(name):
+            yield f"{name}:{domain}", target
+
+
+def load_unified_index():
+    """Return the merged index, re-merging only when a source index changed"""
+    sources = [(label, target, load_index(*_index_args(target)))
+               for label, target in _unified_sources() if target.filepath.exists()]
+    parts = tuple(index for _, _, index in sources)
+    cached = _UNIFIED["index"]
+    if cached is None or len(parts) != len(_UNIFIED["parts"]) \
+            or any(a is not b for a, b in zip(parts, _UNIFIED["parts"])):
+        cached = UnifiedIndex(sources)
+        _UNIFIED.update(parts=parts, index=cached)
+    return cached
+
+
+def _source_fields(label, target):
+    """domain/stack/file keys identifying where a row came from"""
+    if label.startswith("stack:"):
+        return {"domain": "stack", "stack": label[len("stack:"):], "file": target.file}
+    return {"domain": label, "file": target.file}
+
+
+def search_all(query, max_results=MAX_RESULTS, per_domain=MAX_RESULTS):
+    """Search every domain and stack at once.
+
+    Returns the max_results best rows overall (each tagged with its domain,
+    stack and score) plus the per_domain best rows of every source that
+    matched, keyed by domain name or "stack:<name>" and shaped like search()
+    results. Scores use each source's own BM25 statistics, so per-domain
+    results equal search(query, domain) for queries without misspellings or
+    "quoted phrases" (search_all() scores tokens as typed).
+    """
+    index = load_unified_index()
+    best, by_source = index.top_k(query, max_results, per_domain)
+
+    results = []
+    for source_no, idx, score in best:
+        label, target, source = index.sources[source_no]
+        results.append({**_source_fields(label, target), "score": round(score, 4), "row": source.rows.as_dict(idx)})
+
+    domains = {}
+    for source_no in sorted(by_source):
+        label, target, source = index.sources[source_no]
+        rows = [source.rows.as_dict(idx) for idx, _ in by_source[source_no]]
+        if label.startswith("stack:"):
+            domains[label] = _stack_result(label[len("stack:"):], query, target.file, rows)
+        else:
+            domains[label] = _domain_result(label, query, target.file, rows)
 
     return {
-        "domain": "stack",
-        "stack": stack,
+        "domain": "all",
         "query": query,
-        "file": STACK_CONFIG[stack]["file"],
         "count": len(results),
-        "results": results
+        "results": results,
+        "domains": domains,
     }
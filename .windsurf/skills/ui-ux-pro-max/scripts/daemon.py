@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search Daemon - keeps every index warm and answers over a Unix socket
+
+Start it once per session:
+    python search.py --serve [--socket /path/to.sock]
+
+search.py then routes queries through the daemon automatically and falls back
+to in-process search when no daemon is listening (or UIPRO_DAEMON=0 is set).
+
+The socket lives in a directory only its user can enter ($XDG_RUNTIME_DIR,
+else a 0700 uipro-<uid> directory under the temp dir), and clients talk only
+to a socket that they and its directory belong to; anything else is treated
+as no daemon, so another local user can neither listen in nor answer.
+
+Protocol: one JSON object per line in each direction.
+    -> {"op": "search", "query": "...", "domain": "style", "max_results": 3, "filters": [...]}
+    -> {"op": "search_stack", "query": "...", "stack": "react", "max_results": 3}
+    -> {"op": "search_all", "query": "...", "max_results": 3, "per_domain": 3}
+    -> {"op": "design_system", "query": "...", "project_name": ..., ...}
+    -> {"op": "stats"}  (result-cache counters, see engine.result_cache_stats)
+    -> {"op": "ping"} | {"op": "shutdown"}
+    <- {"ok": true, "result": ...} | {"ok": false, "error": "..."}
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+import time
+
+from core import MAX_RESULTS, build_indexes, load_unified_index, search, search_all, search_stack
+from engine import result_cache_stats
+
+_UID = os.getuid() if hasattr(os, "getuid") else None  # None: no ownership to check (Windows)
+
+
+def _default_socket_path():
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, "uipro-search.sock")
+    return os.path.join(tempfile.gettempdir(), f"uipro-{_UID if _UID is not None else 'user'}", "search.sock")
+
+
+SOCKET_PATH = os.environ.get("UIPRO_SOCKET") or _default_socket_path()
+DAEMON_ENABLED = os.environ.get("UIPRO_DAEMON", "1") != "0"
+RELOAD_INTERVAL = 2.0  # seconds between data/ freshness sweeps
+CONNECT_TIMEOUT = 0.05
+REQUEST_TIMEOUT = 30.0
+
+SUPPORTED = hasattr(socket, "AF_UNIX")
+
+# No request-wide lock: requests and the reload sweep run side by side. The
+# shared state they touch is safe to share: index tiers swap whole entries
+# (a request keeps the index it already holds), the result cache and the
+# bundle map lock internally, and cache files are written through per-thread
+# temp files. At worst two threads rebuild the same stale index once each.
+
+
+def warm_indexes():
+    """Load (or rebuild, if its CSV changed on disk) every index; cold builds run in parallel"""
+    report = build_indexes()
+    load_unified_index()
+    return report
+
+
+def _design_system(params):
+    from design_system import generate_design_system
+    return generate_design_system(
+        params["query"],
+        params.get("project_name"),
+        params.get("format", "ascii"),
+        persist=params.get("persist", False),
+        page=params.get("page"),
+        output_dir=params.get("output_dir"),
+        variance=params.get("variance"),
+        motion=params.get("motion"),
+        density=params.get("density"),
+    )
+
+
+def handle(params):
+    """Dispatch one decoded request; returns the response dict"""
+    op = params.get("op")
+    if op == "ping":
+        return {"ok": True, "result": {"pid": os.getpid()}}
+    if op == "stats":
+        return {"ok": True, "result": result_cache_stats()}
+    if op == "search":
+        result = search(params["query"], params.get("domain"), params.get("max_results", MAX_RESULTS), params.get("filters"))
+    elif op == "search_stack":
+        result = search_stack(params["query"], params["stack"], params.get("max_results", MAX_RESULTS))
+    elif op == "search_all":
+        result = search_all(params["query"], params.get("max_results", MAX_RESULTS), params.get("per_domain", MAX_RESULTS))
+    elif op == "design_system":
+        result = _design_system(params)
+    else:
+        return {"ok": False, "error": f"Unknown op: {op}"}
+    return {"ok": True, "result": result}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    timeout = REQUEST_TIMEOUT
+
+    def handle(self):
+        for line in self.rfile:
+            stopping = False
+            try:
+                params = json.loads(line)
+                stopping = params.get("op") == "shutdown"
+                if stopping:
+                    response = {"ok": True, "result": None}
+                else:
+                    response = handle(params)
+            except Exception as e:  # report to the client instead of killing the connection
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            self.wfile.write((json.dumps(response, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+            if stopping:
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+
+
+if SUPPORTED:
+    class _Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def _reload_loop(stop, interval):
+    """Hot reload: rebuild any index whose CSV changed since the last sweep"""
+    while not stop.wait(interval):
+        try:
+            warm_indexes()
+        except OSError as e:
+            print(f"reload failed: {e}", file=sys.stderr)
+
+
+def _private_dir(path):
+    """Create the socket's directory 0700 if needed; RuntimeError when it is not ours alone"""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.lstat(directory)
+    except OSError as e:
+        raise RuntimeError(f"Cannot create the socket directory {directory}: {e}") from e
+    if not stat.S_ISDIR(st.st_mode) or (_UID is not None and st.st_uid != _UID) or st.st_mode & 0o022:
+        raise RuntimeError(f"Refusing to listen in {directory}: it must be a directory owned by you "
+                           f"and not writable by others")
+
+
+def _is_trusted(path):
+    """True when path is a socket owned by this user in a directory other users cannot write to"""
+    if _UID is None:
+        return True
+    try:
+        st = os.lstat(path)
+        dir_st = os.stat(os.path.dirname(os.path.abspath(path)))
+    except OSError:
+        return False
+    return (stat.S_ISSOCK(st.st_mode) and st.st_uid == _UID
+            and dir_st.st_uid == _UID and not dir_st.st_mode & 0o022)
+
+
+def serve(socket_path=SOCKET_PATH, reload_interval=RELOAD_INTERVAL):
+    """Run the daemon in the foreground until shutdown or Ctrl+C"""
+    if not SUPPORTED:
+        raise RuntimeError("Unix sockets are not available on this platform")
+    _private_dir(socket_path)
+    if os.path.exists(socket_path):
+        if ping(socket_path):
+            raise RuntimeError(f"A search daemon is already listening on {socket_path}")
+        os.unlink(socket_path)  # stale socket from a crashed daemon
+
+    start = time.perf_counter()
+    built = sum(entry["source"] == "built" for entry in warm_indexes())
+    print(f"Indexes warm in {(time.perf_counter() - start) * 1000:.0f} ms ({built} built); listening on {socket_path}",
+          file=sys.stderr)
+
+    stop = threading.Event()
+    # The socket is created by bind(); a 0177 umask makes it 0600 from the
+    # start, so other local users never get a window to connect
+    umask = os.umask(0o177)
+    try:
+        server = _Server(socket_path, _Handler)
+    finally:
+        os.umask(umask)
+    threading.Thread(target=_reload_loop, args=(stop, reload_interval), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+# ============ CLIENT ============
+def _send(params, socket_path):
+    """One request/response round trip; None when nothing is listening.
+
+    A socket someone else could have planted (see _is_trusted) counts as
+    nothing listening. Once connected, a failure (REQUEST_TIMEOUT, a dropped
+    connection) raises OSError instead: the daemon may still be running the
+    request.
+    """
+    if not SUPPORTED or not _is_trusted(socket_path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            return None
+        sock.settimeout(REQUEST_TIMEOUT)
+        sock.sendall((json.dumps(params) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("search daemon closed the connection without answering")
+    return json.loads(line)
+
+
+def _writes_files(params):
+    """True for requests with side effects that must not run twice (--persist)"""
+    return params.get("op") == "design_system" and bool(params.get("persist"))
+
+
+def request(params, socket_path=SOCKET_PATH):
+    """Send one request to a running daemon.
+
+    Returns the result, or None when no daemon is reachable (or UIPRO_DAEMON=0)
+    so the caller can fall back to in-process search. Errors raised inside the
+    daemon are re-raised as RuntimeError. A read-only request that the daemon
+    accepted but did not answer also falls back; one that writes files raises
+    RuntimeError instead, since the daemon may still be writing them.
+    """
+    if not DAEMON_ENABLED:
+        return None
+    try:
+        response = _send(params, socket_path)
+    except (OSError, ValueError) as e:
+        if _writes_files(params):
+            raise RuntimeError(f"search daemon did not answer ({e}); not retrying in-process "
+                               f"because the request writes files") from e
+        return None
+    if response is None:
+        return None
+    if not response.get("ok"):
+        raise RuntimeError(response.get("error", "daemon request failed"))
+    return response["result"]
+
+
+def _try_send(params, socket_path):
+    """_send() for probes (ping, shutdown): any failure reads as no answer"""
+    try:
+        return _send(params, socket_path)
+    except (OSError, ValueError):
+        return None
+
+
+def ping(socket_path=SOCKET_PATH):
+    """True when a daemon answers on socket_path"""
+    response = _try_send({"op": "ping"}, socket_path)
+    return bool(response and response.get("ok"))
+
+
+def shutdown(socket_path=SOCKET_PATH):
+    """Ask a running daemon to exit; True if one was reached"""
+    response = _try_send({"op": "shutdown"}, socket_path)
+    return bool(response and response.get("ok"))
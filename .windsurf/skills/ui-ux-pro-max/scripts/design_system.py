@@ -14,14 +14,21 @@ Usage:
 """
 
 import csv
+import hashlib
 import json
 import os
 import re
+import struct
 import sys
 import io
+import time
 from datetime import datetime
+from itertools import product as iter_product
 from pathlib import Path
-from core import search, DATA_DIR
+import engine
+from core import search, build_indexes, CSV_CONFIG, DATA_DIR, UIPRO_DATASETS
+from engine import _atomic_write, _fingerprint, _index_args, _is_fresh, dataset_target, load_index
+from profiling import span
 
 # Force UTF-8 for stdout/stderr to handle emojis/box-drawing chars on Windows (cp1252 default)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
@@ -35,7 +42,7 @@ REASONING_FILE = "ui-reasoning.csv"
 
 SEARCH_CONFIG = {
     "product": {"max_results": 1},
-    "style": {"max_results": 3},
+    "style": {"max_results": 3},  # candidates for the style_priority rule in _select_best_match
     "color": {"max_results": 2},
     "landing": {"max_results": 2},
     "typography": {"max_results": 2}
@@ -75,154 +82,289 @@ def _resolve_dial(dial_name: str, value) -> dict:
     return None
 
 
-# ============ DESIGN SYSTEM GENERATOR ============
-class DesignSystemGenerator:
-    """Generates design system recommendations from aggregated searches."""
+def _dials_summary(variance_info: dict, motion_info: dict, density_info: dict) -> dict:
+    """The "dials" entry of a design system: each dial's value and tier label (None when unset)."""
+    return {
+        "variance": variance_info["value"] if variance_info else None,
+        "variance_label": variance_info["label"] if variance_info else None,
+        "motion": motion_info["value"] if motion_info else None,
+        "motion_label": motion_info["label"] if motion_info else None,
+        "density": density_info["value"] if density_info else None,
+        "density_label": density_info["label"] if density_info else None,
+    }
+
+
+# ============ REASONING RULES ============
+DEFAULT_REASONING = {
+    "pattern": "Hero + Features + CTA",
+    "style_priority": ["Minimalism", "Flat Design"],
+    "color_mood": "Professional",
+    "typography_mood": "Clean",
+    "key_effects": "Subtle hover transitions",
+    "anti_patterns": "",
+    "decision_rules": {},
+    "severity": "MEDIUM"
+}
+
+
+def _compile_reasoning(rule: dict) -> dict:
+    """The _apply_reasoning() view of one ui-reasoning.csv row, Decision_Rules parsed."""
+    decision_rules = {}
+    try:
+        decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
+    except json.JSONDecodeError:
+        pass
+    return {
+        "pattern": rule.get("Recommended_Pattern", ""),
+        "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
+        "color_mood": rule.get("Color_Mood", ""),
+        "typography_mood": rule.get("Typography_Mood", ""),
+        "key_effects": rule.get("Key_Effects", ""),
+        "anti_patterns": rule.get("Anti_Patterns", ""),
+        "decision_rules": decision_rules,
+        "severity": rule.get("Severity", "MEDIUM")
+    }
+
+
+class ReasoningIndex:
+    """ui-reasoning.csv compiled once for category lookups.
+
+    find() keeps the precedence of the original three scans over the rows,
+    each of which returned the first row (in file order) that matched:
+
+    1. exact: UI_Category equals the category (case-insensitive)
+    2. partial: UI_Category is a substring of the category, or the reverse
+    3. keyword: a word of UI_Category (split on space, '/' and '-') is a
+       substring of the category
+
+    Instead of scanning, every check becomes a dict probe: "UI_Category in
+    category" and "keyword in category" probe the category's substrings
+    against exact and keywords, and "category in UI_Category" is one probe
+    of contains, which maps every substring of every UI_Category to the first
+    row holding it. contains is built on the first exact-match miss (most
+    Product Types are UI_Categories verbatim, and it is the costly part).
+    Results are memoized per category, so repeated lookups (generate() only
+    ever asks for products.csv's Product Types) are O(1).
+    """
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.rules = [_compile_reasoning(row) for row in rows]
+        self.exact = {}       # lowercased UI_Category -> first row
+        self.keywords = {}    # UI_Category word -> first row
+        self.contains = None  # every substring of a UI_Category -> first row containing it
+        for idx, row in enumerate(rows):
+            ui_cat = row.get("UI_Category", "").lower()
+            self.exact.setdefault(ui_cat, idx)
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                self.keywords.setdefault(kw, idx)
+        self._found = {}
+
+    def _build_contains(self) -> dict:
+        contains = {"": 0} if self.rows else {}
+        for ui_cat, idx in self.exact.items():  # first rows first
+            for start in range(len(ui_cat)):
+                for stop in range(start + 1, len(ui_cat) + 1):
+                    contains.setdefault(ui_cat[start:stop], idx)
+        return contains
+
+    def find(self, category: str):
+        """Index of the reasoning row for category, or None."""
+        category_lower = category.lower()
+        if category_lower in self._found:
+            return self._found[category_lower]
+        idx = self.exact.get(category_lower)
+        if idx is None:
+            if self.contains is None:
+                self.contains = self._build_contains()
+            substrings = {category_lower[start:stop] for start in range(len(category_lower))
+                          for stop in range(start + 1, len(category_lower) + 1)}
+            partial = [self.exact[sub] for sub in substrings if sub in self.exact]
+            if category_lower in self.contains:
+                partial.append(self.contains[category_lower])
+            if partial:
+                idx = min(partial)
+            else:
+                idx = min((self.keywords[sub] for sub in substrings if sub in self.keywords), default=None)
+        self._found[category_lower] = idx
+        return idx
+
+
+# ============ DATA CONTEXT ============
+class DataContext:
+    """The data one process's design-system runs read, each source loaded at most once.
+
+    Shared by the generator, the formatters and the page override builder.
+    Domain searches go through core.search: the engine keeps every domain's
+    index in memory after its first load and answers repeats from the result
+    cache. The reasoning table is read and compiled (ReasoningIndex) once,
+    and again only when ui-reasoning.csv changes on disk, so a long-lived
+    process (the daemon) never serves stale rules.
+    """
+
+    _NO_REASONING = ReasoningIndex([])
 
     def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+        self._reasoning = None  # (fingerprint, ReasoningIndex)
+        self._digests = {}  # CSV path -> ((size, mtime_ns), sha256)
 
-    def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
+    @property
+    def reasoning_index(self) -> ReasoningIndex:
+        """ui-reasoning.csv compiled for lookups (empty when the file is missing)."""
         filepath = DATA_DIR / REASONING_FILE
         if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+            return self._NO_REASONING
+        if self._reasoning is None or not _is_fresh(self._reasoning[0], filepath):
+            st = filepath.stat()
+            with open(filepath, 'rb') as f:
+                data = f.read()
+            rows = list(csv.DictReader(io.StringIO(data.decode('utf-8'))))
+            self._reasoning = (_fingerprint(filepath, st, hashlib.sha256(data).hexdigest()), ReasoningIndex(rows))
+        return self._reasoning[1]
+
+    @property
+    def reasoning(self) -> list:
+        """Rows of ui-reasoning.csv ([] when the file is missing)."""
+        return self.reasoning_index.rows
+
+    def source_versions(self) -> dict:
+        """{CSV name: sha256} for every CSV a design system is generated from.
+
+        Digests are kept until a file's size or mtime moves, so each CSV is
+        hashed once per change; ui-reasoning.csv reuses the digest taken
+        when it was read.
+        """
+        if self.reasoning_index is not self._NO_REASONING:
+            fingerprint = self._reasoning[0]
+            self._digests[str(DATA_DIR / REASONING_FILE)] = (
+                (fingerprint["size"], fingerprint["mtime_ns"]), fingerprint["sha256"])
+        versions = {}
+        for name in _CATALOG_SOURCES:
+            path = DATA_DIR / name
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            key = (st.st_size, st.st_mtime_ns)
+            cached = self._digests.get(str(path))
+            if cached is None or cached[0] != key:
+                cached = self._digests[str(path)] = (key, _fingerprint(path, st)["sha256"])
+            versions[name] = cached[1]
+        return versions
+
+    def search(self, query: str, domain: str, max_results: int) -> dict:
+        """core.search against the process-wide indexes."""
+        return search(query, domain, max_results)
+
+
+_DATA_CONTEXT = None
+
+
+def data_context() -> DataContext:
+    """The per-process DataContext, created on first use."""
+    global _DATA_CONTEXT
+    if _DATA_CONTEXT is None:
+        _DATA_CONTEXT = DataContext()
+    return _DATA_CONTEXT
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
 
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
+# ============ DESIGN SYSTEM GENERATOR ============
+class DesignSystemGenerator:
+    """Generates design system recommendations from aggregated searches."""
 
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
+    def __init__(self, context: DataContext = None):
+        self.context = context or data_context()
+        self.reasoning_index = self.context.reasoning_index
+        self.reasoning_data = self.reasoning_index.rows
 
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
+    def _multi_domain_search(self, query: str, style_priority: list = None, known: dict = None) -> dict:
+        """Execute searches across multiple domains, reusing results already in known."""
+        results = dict(known or {})
+        for domain, config in SEARCH_CONFIG.items():
+            if domain in results:
+                continue
+            with span(f"search {domain}"):
+                if domain == "style" and style_priority:
+                    # For style, also search with priority keywords
+                    priority_query = " ".join(style_priority[:2]) if style_priority else query
+                    combined_query = f"{query} {priority_query}"
+                    results[domain] = self.context.search(combined_query, domain, config["max_results"])
+                else:
+                    results[domain] = self.context.search(query, domain, config["max_results"])
+        return results
 
-        return {}
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category (see ReasoningIndex for the precedence)."""
+        idx = self.reasoning_index.find(category)
+        return {} if idx is None else self.reasoning_index.rows[idx]
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
-        """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
-
-        if not rule:
-            return {
-                "pattern": "Hero + Features + CTA",
-                "style_priority": ["Minimalism", "Flat Design"],
-                "color_mood": "Professional",
-                "typography_mood": "Clean",
-                "key_effects": "Subtle hover transitions",
-                "anti_patterns": "",
-                "decision_rules": {},
-                "severity": "MEDIUM"
-            }
-
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
+        """Apply reasoning rules to search results.
 
-        return {
-            "pattern": rule.get("Recommended_Pattern", ""),
-            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
-            "color_mood": rule.get("Color_Mood", ""),
-            "typography_mood": rule.get("Typography_Mood", ""),
-            "key_effects": rule.get("Key_Effects", ""),
-            "anti_patterns": rule.get("Anti_Patterns", ""),
-            "decision_rules": decision_rules,
-            "severity": rule.get("Severity", "MEDIUM")
-        }
+        The rule comes pre-compiled; decision_rules is shared between calls, so treat it as read-only.
+        """
+        idx = self.reasoning_index.find(category)
+        reasoning = DEFAULT_REASONING if idx is None else self.reasoning_index.rules[idx]
+        return {**reasoning, "style_priority": list(reasoning["style_priority"])}
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
-        """Select best matching result based on priority keywords."""
+        """Prefer the first priority style present in the results, else the top hit.
+
+        Field weighting happens in the search itself (BM25F, see core.CSV_CONFIG),
+        so results arrive ranked by name/keyword relevance already.
+        """
         if not results:
             return {}
 
-        if not priority_keywords:
-            return results[0]
-
-        # First: try exact style name match
-        for priority in priority_keywords:
+        for priority in priority_keywords or []:
             priority_lower = priority.lower().strip()
             for result in results:
                 style_name = result.get("Style Category", "").lower()
                 if priority_lower in style_name or style_name in priority_lower:
                     return result
 
-        # Second: score by keyword match in all fields
-        scored = []
-        for result in results:
-            result_str = str(result).lower()
-            score = 0
-            for kw in priority_keywords:
-                kw_lower = kw.lower().strip()
-                # Higher score for style name match
-                if kw_lower in result.get("Style Category", "").lower():
-                    score += 10
-                # Lower score for keyword field match
-                elif kw_lower in result.get("Keywords", "").lower():
-                    score += 3
-                # Even lower for other field matches
-                elif kw_lower in result_str:
-                    score += 1
-            scored.append((score, result))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return scored[0][1] if scored and scored[0][0] > 0 else results[0]
+        return results[0]
 
     def _extract_results(self, search_result: dict) -> list:
         """Extract results list from search result dict."""
         return search_result.get("results", [])
 
     def generate(self, query: str, project_name: str = None,
-                 variance: int = None, motion: int = None, density: int = None) -> dict:
+                 variance: int = None, motion: int = None, density: int = None,
+                 use_catalog: bool = True) -> dict:
         """Generate complete design system recommendation.
 
         variance/motion/density are optional 1-10 dials (see DIAL_TIERS) that bias
         style selection, pull in a matching motion.csv snippet, and override the
         spacing scale, without changing behavior when left unset.
+
+        A query that is a products.csv Product Type is answered from the
+        prebuilt design catalog when one is current (see catalog_lookup);
+        use_catalog=False always searches live.
         """
         variance_info = _resolve_dial("variance", variance)
         motion_info = _resolve_dial("motion", motion)
         density_info = _resolve_dial("density", density)
 
+        if use_catalog:
+            with span("catalog"):
+                cached = catalog_lookup(query, variance, motion, density)
+            if cached is not None:
+                dials = _dials_summary(variance_info, motion_info, density_info)
+                return {field: project_name or query.upper() if field == "project_name" else
+                        dials if field == "dials" else cached[field] for field in CATALOG_FIELDS}
+
         # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
+        with span("search product"):
+            product_result = self.context.search(query, "product", SEARCH_CONFIG["product"]["max_results"])
         product_results = product_result.get("results", [])
         category = "General"
         if product_results:
             category = product_results[0].get("Product Type", "General")
 
         # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
+        with span("reasoning"):
+            reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
         # DESIGN_VARIANCE dial: bias style retrieval/selection toward
@@ -231,9 +373,8 @@ class DesignSystemGenerator:
         if variance_info:
             effective_style_priority = variance_info["style_keywords"] + style_priority
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, effective_style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Multi-domain search with style priority hints (product is already known)
+        search_results = self._multi_domain_search(query, effective_style_priority, {"product": product_result})
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -251,7 +392,8 @@ class DesignSystemGenerator:
         # domain for Emil Kowalski's motion-design principles, motion-principles.csv).
         motion_snippet = {}
         if motion_info:
-            motion_result = search(f"{query} {motion_info['tier']}", "gsap", 5)
+            with span("search gsap"):
+                motion_result = self.context.search(f"{query} {motion_info['tier']}", "gsap", 5)
             motion_matches = motion_result.get("results", [])
             tiered = [m for m in motion_matches if m.get("Intensity Tier") == motion_info["tier"]]
             if tiered:
@@ -314,19 +456,188 @@ class DesignSystemGenerator:
             "anti_patterns": reasoning.get("anti_patterns", ""),
             "decision_rules": reasoning.get("decision_rules", {}),
             "severity": reasoning.get("severity", "MEDIUM"),
-            "dials": {
-                "variance": variance_info["value"] if variance_info else None,
-                "variance_label": variance_info["label"] if variance_info else None,
-                "motion": motion_info["value"] if motion_info else None,
-                "motion_label": motion_info["label"] if motion_info else None,
-                "density": density_info["value"] if density_info else None,
-                "density_label": density_info["label"] if density_info else None,
-            },
+            "dials": _dials_summary(variance_info, motion_info, density_info),
             "motion_snippet": motion_snippet,
             "spacing_scale": density_info["spacing"] if density_info else None,
         }
 
 
+# ============ DESIGN CATALOG ============
+# generate() output precomputed for every products.csv Product Type and
+# every combination of dial tiers (unset, low, mid, high for each of the
+# three dials), written by `search.py --build-catalog`. A query maps to a
+# category only when its tokens are exactly that Product Type's tokens: then
+# every search generate() runs sees the same tokens as at build time, so the
+# catalog answer is the live answer. Anything else searches live.
+#
+# Layout: CATALOG_MAGIC, an 8-byte little-endian header length, the header
+# as JSON ({"version", "settings", "sources": {file: fingerprint},
+# "records": {category tokens: [offset, length]}}), then one JSON record per
+# category: {"sections": [distinct field values], "systems": [[section id
+# per stored field] per dial combination]}. Offsets count from the first
+# byte after the header. The catalog is ignored while any source CSV has
+# changed since the build, or when it was built with other search settings.
+CATALOG_PATH = Path(os.environ.get("UIPRO_CATALOG") or DATA_DIR / "design.catalog")
+CATALOG_MAGIC = b"UIPROCT1"
+CATALOG_VERSION = 1
+
+# Keys of a design system in generate() order; project_name and dials
+# depend only on the arguments and are filled in at lookup
+CATALOG_FIELDS = ("project_name", "category", "pattern", "style", "colors", "typography", "key_effects",
+                  "anti_patterns", "decision_rules", "severity", "dials", "motion_snippet", "spacing_scale")
+_STORED_FIELDS = tuple(field for field in CATALOG_FIELDS if field not in ("project_name", "dials"))
+_DIALS = ("variance", "motion", "density")
+# The CSVs generate() reads
+_CATALOG_SOURCES = tuple(CSV_CONFIG[domain]["file"] for domain in (*SEARCH_CONFIG, "gsap")) + (REASONING_FILE,)
+
+# The open catalog: path, its (size, mtime_ns) when read, header, where records start
+_CATALOG = {"path": None, "stat": None, "header": None, "base": 0}
+
+
+def _catalog_settings() -> str:
+    """Everything besides the CSVs that shapes generate() output; a catalog built under other settings is ignored.
+
+    That is the dials, the per-domain result counts, the column/weight config
+    of every domain generate() searches, and the engine's scoring knobs
+    (BM25 k1/b, fuzzy matching, proximity; see engine.search_settings()).
+    """
+    domains = {domain: CSV_CONFIG[domain] for domain in (*SEARCH_CONFIG, "gsap")}
+    return repr((CATALOG_VERSION, SEARCH_CONFIG, DIAL_TIERS, domains, engine.search_settings()))
+
+
+def _catalog_key(query: str):
+    """The category key for query (its tokens), or None when it cannot come from the catalog"""
+    if '"' in query:  # quoted phrases change matching
+        return None
+    return " ".join(engine._QUERY_TOKENIZER.tokenize(query)) or None
+
+
+def _dial_tier(dial_name: str, value) -> int:
+    """0 when unset, else 1 + the index of the value's tier in DIAL_TIERS"""
+    if value is None:
+        return 0
+    value = max(1, min(10, int(value)))
+    return 1 + next(i for i, (lo, hi, _) in enumerate(DIAL_TIERS[dial_name]) if lo <= value <= hi)
+
+
+def _dial_combinations() -> list:
+    """Representative (variance, motion, density) for every tier combination, in record order"""
+    states = [[None] + [lo for lo, _, _ in DIAL_TIERS[name]] for name in _DIALS]
+    return list(iter_product(*states))
+
+
+def _open_catalog():
+    """Read the catalog header once per catalog file; None when absent, foreign, corrupt or stale"""
+    try:
+        st = CATALOG_PATH.stat()
+    except OSError:
+        _CATALOG.update(path=None, stat=None, header=None)
+        return None
+    if _CATALOG["path"] != CATALOG_PATH or _CATALOG["stat"] != (st.st_size, st.st_mtime_ns):
+        _CATALOG.update(path=CATALOG_PATH, stat=(st.st_size, st.st_mtime_ns), header=None)
+        head = len(CATALOG_MAGIC) + 8
+        try:
+            with open(CATALOG_PATH, 'rb') as f:
+                prefix = f.read(head)
+                if prefix[:len(CATALOG_MAGIC)] != CATALOG_MAGIC:
+                    raise ValueError("bad magic")
+                (header_len,) = struct.unpack("<Q", prefix[len(CATALOG_MAGIC):])
+                header = json.loads(f.read(header_len).decode('utf-8'))
+        except (OSError, ValueError, struct.error):
+            return None
+        _CATALOG.update(header=header, base=head + header_len)
+    header = _CATALOG["header"]
+    if header is None or header.get("version") != CATALOG_VERSION or header.get("settings") != _catalog_settings():
+        return None
+    for name, fingerprint in header["sources"].items():
+        filepath = DATA_DIR / name
+        if not filepath.exists() or not _is_fresh(fingerprint, filepath):
+            return None
+    return _CATALOG
+
+
+def catalog_lookup(query: str, variance=None, motion=None, density=None):
+    """Precomputed design system fields for query and dials, or None to search live.
+
+    Returns every field but project_name and dials (see CATALOG_FIELDS).
+    """
+    key = _catalog_key(query)
+    catalog = key and _open_catalog()
+    entry = catalog and catalog["header"]["records"].get(key)
+    if not entry:
+        return None
+    offset, length = entry
+    try:
+        with open(catalog["path"], 'rb') as f:
+            f.seek(catalog["base"] + offset)
+            record = json.loads(f.read(length).decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+    combination = 0
+    for name, value in zip(_DIALS, (variance, motion, density)):
+        combination = combination * (len(DIAL_TIERS[name]) + 1) + _dial_tier(name, value)
+    sections = record["sections"]
+    return {field: sections[i] for field, i in zip(_STORED_FIELDS, record["systems"][combination])}
+
+
+def build_catalog(path=None, context: DataContext = None, product_types: list = None) -> dict:
+    """Precompute the design catalog and write it to path (default CATALOG_PATH).
+
+    product_types defaults to every Product Type in products.csv.
+    Returns {"path", "categories", "systems", "sections", "bytes", "ms"}.
+    """
+    start = time.perf_counter()
+    path = Path(path or CATALOG_PATH)
+    generator = DesignSystemGenerator(context)
+    if product_types is None:
+        with open(DATA_DIR / CSV_CONFIG["product"]["file"], 'r', encoding='utf-8') as f:
+            product_types = [row.get("Product Type", "") for row in csv.DictReader(f)]
+    combinations = _dial_combinations()
+    records, systems, distinct = {}, 0, 0
+    for product_type in product_types:
+        key = _catalog_key(product_type)
+        if key is None or key in records:
+            continue
+        sections, ids, rows = [], {}, []
+        for variance, motion, density in combinations:
+            design_system = generator.generate(product_type, variance=variance, motion=motion, density=density,
+                                               use_catalog=False)
+            row = []
+            for field in _STORED_FIELDS:
+                blob = json.dumps(design_system[field], ensure_ascii=False)
+                if blob not in ids:
+                    ids[blob] = len(sections)
+                    sections.append(design_system[field])
+                row.append(ids[blob])
+            rows.append(row)
+        records[key] = json.dumps({"sections": sections, "systems": rows}, ensure_ascii=False,
+                                  separators=(",", ":")).encode('utf-8')
+        systems += len(rows)
+        distinct += len(sections)
+
+    offsets, body = {}, 0
+    for key, blob in records.items():
+        offsets[key] = [body, len(blob)]
+        body += len(blob)
+    header = json.dumps({
+        "version": CATALOG_VERSION,
+        "settings": _catalog_settings(),
+        "sources": {name: _fingerprint(DATA_DIR / name) for name in _CATALOG_SOURCES if (DATA_DIR / name).exists()},
+        "records": offsets,
+    }, ensure_ascii=False).encode('utf-8')
+
+    def write(f):
+        f.write(CATALOG_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for blob in records.values():
+            f.write(blob)
+
+    _atomic_write(path, write)
+    return {"path": str(path), "categories": len(records), "systems": systems, "sections": distinct,
+            "bytes": len(CATALOG_MAGIC) + 8 + len(header) + body, "ms": (time.perf_counter() - start) * 1000}
+
+
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
 
@@ -665,7 +976,8 @@ def format_markdown(design_system: dict) -> str:
 # ============ MAIN ENTRY POINT ============
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii",
                            persist: bool = False, page: str = None, output_dir: str = None,
-                           variance: int = None, motion: int = None, density: int = None) -> str:
+                           variance: int = None, motion: int = None, density: int = None,
+                           context: DataContext = None) -> str:
     """
     Main entry point for design system generation.
 
@@ -679,20 +991,26 @@ def generate_design_system(query: str, project_name: str = None, output_format:
         variance: Optional 1-10 DESIGN_VARIANCE dial (1=centered/minimal, 10=bold/asymmetric)
         motion: Optional 1-10 MOTION_INTENSITY dial, pulls a matching GSAP snippet from motion.csv
         density: Optional 1-10 VISUAL_DENSITY dial, overrides the spacing scale (1=spacious, 10=dense)
+        context: DataContext to read data through (defaults to the per-process one)
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name, variance=variance, motion=motion, density=density)
+    context = context or data_context()
+    with span("load reasoning"):
+        generator = DesignSystemGenerator(context)
+    with span("generate"):
+        design_system = generator.generate(query, project_name, variance=variance, motion=motion, density=density)
 
     # Persist to files if requested
     if persist:
-        persist_design_system(design_system, page, output_dir, query)
+        with span("persist"):
+            persist_design_system(design_system, page, output_dir, query, context)
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    with span(f"format {output_format}"):
+        if output_format == "markdown":
+            return format_markdown(design_system)
+        return format_ascii_box(design_system)
 
 
 # ============ PERSISTENCE FUNCTIONS ============
@@ -707,18 +1025,69 @@ def safe_slug(name, fallback: str = "default") -> str:
     return slug or fallback
 
 
-def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None) -> dict:
+# Manifest written next to MASTER.md: the hash of every persisted file and
+# the sha256 of each source CSV, so downstream tools can tell what changed
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# The "Generated:" timestamp line of MASTER.md and page files; a file whose
+# content differs only there is left untouched
+_GENERATED_LINE = re.compile(r"^(?:> )?\*\*Generated:\*\* .*$", re.MULTILINE)
+
+def _write_if_changed(path: Path, content: str) -> dict:
+    """Atomically replace path with content unless only its Generated: timestamp would change.
+
+    Returns the manifest entry for path ({"sha256", "bytes"} of what is on
+    disk afterwards) plus "written": whether the file was replaced.
+    """
+    try:
+        current = path.read_bytes()
+    except OSError:
+        current = None
+    if current is not None:
+        try:
+            unchanged = _GENERATED_LINE.sub("", current.decode('utf-8')) == _GENERATED_LINE.sub("", content)
+        except UnicodeDecodeError:
+            unchanged = False
+        if unchanged:
+            return {"sha256": hashlib.sha256(current).hexdigest(), "bytes": len(current), "written": False}
+    data = content.encode('utf-8')
+    _atomic_write(path, lambda f: f.write(data))
+    return {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data), "written": True}
+
+
+def _read_manifest(path: Path) -> dict:
+    """The manifest at path, or None when it is missing, unreadable or from another version"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def persist_design_system(design_system: dict, page: str = None, output_dir: str = None, page_query: str = None,
+                          context: DataContext = None) -> dict:
     """
     Persist design system to design-system/<project>/ folder using Master + Overrides pattern.
+
+    Files are written atomically (temp file + rename) and only when their
+    content changed; the "Generated:" timestamp alone does not count, so an
+    unchanged file keeps its bytes and mtime. design-system/<project>/manifest.json
+    records the sha256 of every persisted file and of each source CSV.
     
     Args:
         design_system: The generated design system dictionary
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
         page_query: Optional query string for intelligent page override generation
+        context: DataContext for the page override searches (defaults to the per-process one)
     
     Returns:
-        dict with created file paths and status
+        dict with created file paths (written or already up to date), the
+        written and unchanged subsets, the manifest path and status
     """
     base_dir = Path(output_dir) if output_dir else Path.cwd()
     
@@ -729,32 +1098,46 @@ def persist_design_system(design_system: dict, page: str = None, output_dir: str
     design_system_dir = base_dir / "design-system" / project_slug
     pages_dir = design_system_dir / "pages"
     
-    created_files = []
-    
     # Create directories
     design_system_dir.mkdir(parents=True, exist_ok=True)
     pages_dir.mkdir(parents=True, exist_ok=True)
     
-    master_file = design_system_dir / "MASTER.md"
-    
-    # Generate and write MASTER.md
-    master_content = format_master_md(design_system)
-    with open(master_file, 'w', encoding='utf-8') as f:
-        f.write(master_content)
-    created_files.append(str(master_file))
+    # Generate MASTER.md
+    with span("format master"):
+        contents = {design_system_dir / "MASTER.md": format_master_md(design_system)}
     
     # If page is specified, create page override file with intelligent content
     if page:
         page_file = pages_dir / f"{safe_slug(page, 'page')}.md"
-        page_content = format_page_override_md(design_system, page, page_query)
-        with open(page_file, 'w', encoding='utf-8') as f:
-            f.write(page_content)
-        created_files.append(str(page_file))
+        with span("format page"):
+            contents[page_file] = format_page_override_md(design_system, page, page_query, context)
+    
+    manifest_file = design_system_dir / MANIFEST_FILE
+    previous = _read_manifest(manifest_file) or {}
+    # Keep entries for pages persisted by earlier runs while their files exist
+    files = {name: entry for name, entry in (previous.get("files") or {}).items()
+             if isinstance(entry, dict) and (design_system_dir / name).is_file()}
+    written, unchanged = [], []
+    with span("write"):
+        for path, content in contents.items():
+            entry = _write_if_changed(path, content)
+            (written if entry.pop("written") else unchanged).append(str(path))
+            files[path.relative_to(design_system_dir).as_posix()] = entry
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "project_name": design_system.get("project_name"),
+            "files": dict(sorted(files.items())),
+            "sources": (context or data_context()).source_versions(),
+        }
+        _write_if_changed(manifest_file, json.dumps(manifest, indent=2, ensure_ascii=False) + "\n")
     
     return {
         "status": "success",
         "design_system_dir": str(design_system_dir),
-        "created_files": created_files
+        "created_files": [str(path) for path in contents],
+        "written_files": written,
+        "unchanged_files": unchanged,
+        "manifest": str(manifest_file),
     }
 
 
@@ -1075,14 +1458,15 @@ def format_master_md(design_system: dict) -> str:
     return "\n".join(lines)
 
 
-def format_page_override_md(design_system: dict, page_name: str, page_query: str = None) -> str:
+def format_page_override_md(design_system: dict, page_name: str, page_query: str = None,
+                            context: DataContext = None) -> str:
     """Format a page-specific override file with intelligent AI-generated content."""
     project = design_system.get("project_name", "PROJECT")
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     page_title = page_name.replace("-", " ").replace("_", " ").title()
     
     # Detect page type and generate intelligent overrides
-    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system)
+    page_overrides = _generate_intelligent_overrides(page_name, page_query, design_system, context)
     
     lines = []
     
@@ -1184,23 +1568,24 @@ def format_page_override_md(design_system: dict, page_name: str, page_query: str
     return "\n".join(lines)
 
 
-def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict) -> dict:
+def _generate_intelligent_overrides(page_name: str, page_query: str, design_system: dict,
+                                    context: DataContext = None) -> dict:
     """
     Generate intelligent overrides based on page type using layered search.
     
     Uses the existing search infrastructure to find relevant style, UX, and layout
     data instead of hardcoded page types.
     """
-    from core import search
+    context = context or data_context()
     
     page_lower = page_name.lower()
     query_lower = (page_query or "").lower()
     combined_context = f"{page_lower} {query_lower}"
     
     # Search across multiple domains for page-specific guidance
-    style_search = search(combined_context, "style", max_results=1)
-    ux_search = search(combined_context, "ux", max_results=3)
-    landing_search = search(combined_context, "landing", max_results=1)
+    style_search = context.search(combined_context, "style", 1)
+    ux_search = context.search(combined_context, "ux", 3)
+    landing_search = context.search(combined_context, "landing", 1)
     
     # Extract results from search response
     style_results = style_search.get("results", [])
@@ -1325,6 +1710,153 @@ def _detect_page_type(context: str, style_results: list) -> str:
     return "General"
 
 
+# ============ BATCH GENERATION ============
+# Every domain generate() and the page override builder search
+DESIGN_DOMAINS = ("product", "style", "color", "landing", "typography", "gsap", "ux")
+
+
+def read_projects(lines) -> list:
+    """Parse a projects JSONL stream into (line number, project or error) pairs.
+
+    Each non-blank line is a query string or an object {"query": ...,
+    "project_name"?: ..., "variance"?/"motion"?/"density"?: 1-10,
+    "pages"?: [name | {"name": ..., "query"?: ...}]}.
+    """
+    projects = []
+    for lineno, raw in enumerate(lines, 1):
+        if not raw.strip():
+            continue
+        try:
+            project = json.loads(raw)
+        except json.JSONDecodeError as e:
+            projects.append((lineno, {"error": f"Invalid JSON on line {lineno}: {e.msg}"}))
+            continue
+        if isinstance(project, str):
+            project = {"query": project}
+        if not isinstance(project, dict):
+            project = {"error": f"Expected a query string or an object on line {lineno}"}
+        elif not project.get("query"):
+            project = {**project, "error": f"Missing query on line {lineno}"}
+        elif not isinstance(project["query"], str):
+            project = {**project, "error": f"Invalid query on line {lineno}: expected a string"}
+        elif not _valid_pages(project.get("pages")):
+            project = {**project, "error": f"Invalid pages on line {lineno}: expected a list of page names "
+                                          f"or {{\"name\", \"query\"?}} objects"}
+        projects.append((lineno, project))
+    return projects
+
+
+def _valid_pages(pages) -> bool:
+    """pages of a read_projects() entry: unset, or a list of names / {"name", "query"?} objects"""
+    if pages is None:
+        return True
+    if not isinstance(pages, list):
+        return False
+    for page in pages:
+        if isinstance(page, dict):
+            if not isinstance(page.get("name"), str) or not isinstance(page.get("query", ""), (str, type(None))):
+                return False
+        elif not isinstance(page, str):
+            return False
+    return True
+
+
+def _generate_project(job) -> dict:
+    """Pool job: generate one project and persist its MASTER.md and page files."""
+    lineno, project, output_dir = job
+    entry = {"line": lineno, "project_name": project.get("project_name"), "query": project.get("query")}
+    if "error" in project:
+        return {**entry, "error": project["error"]}
+    start = time.perf_counter()
+    try:
+        design_system = DesignSystemGenerator().generate(
+            project["query"], project.get("project_name"),
+            variance=project.get("variance"), motion=project.get("motion"), density=project.get("density"))
+        files = []
+        for page in project.get("pages") or [None]:
+            name, page_query = (page.get("name"), page.get("query")) if isinstance(page, dict) else (page, None)
+            persisted = persist_design_system(design_system, name, output_dir, page_query or project["query"])
+            files += [path for path in persisted["created_files"] if path not in files]
+    except Exception as e:  # one bad project must not take the rest of the pool.map down
+        return {**entry, "error": f"{type(e).__name__}: {e}", "ms": (time.perf_counter() - start) * 1000}
+    return {**entry, "slug": safe_slug(design_system["project_name"]), "category": design_system["category"],
+            "files": files, "ms": (time.perf_counter() - start) * 1000}
+
+
+def _project_slug(project) -> str:
+    """Directory slug a project will be persisted under (generate() names it project_name or QUERY)."""
+    return safe_slug(project.get("project_name") or str(project.get("query") or "").upper() or "default")
+
+
+def generate_batch(projects, output_dir: str = None, workers: int = None) -> dict:
+    """Generate and persist many projects across a process pool.
+
+    projects is read_projects() output. The parent first makes every
+    DESIGN_DOMAINS index ready (engine.build_indexes: memory plus the disk
+    cache, positional indexes included), plus the trigram indexes otherwise
+    built on first query, and compiles the reasoning table. Workers inherit all
+    of it (fork) or load the indexes from the cache/bundle (spawn) instead
+    of each building its own. Workers default to the CPU count; with one
+    worker or no usable process pool, projects run in-process.
+
+    Two projects with the same slug would write the same MASTER.md and
+    manifest.json from different workers; the first one wins and every later
+    one becomes an error entry instead of being submitted.
+
+    Returns {"projects": [one entry per project, in input order, with its
+    line, slug, files and ms, or error], "count", "failed", "workers", "ms"}.
+    """
+    start = time.perf_counter()
+    output_dir = os.path.abspath(output_dir or os.getcwd())
+    jobs, claimed = [], {}  # slug -> line that owns it
+    for lineno, project in projects:
+        if "error" not in project:
+            slug = _project_slug(project)
+            if slug in claimed:
+                project = {**project, "error": f"Duplicate project '{slug}' on line {lineno}: "
+                                               f"line {claimed[slug]} already writes design-system/{slug}/"}
+            else:
+                claimed[slug] = lineno
+        jobs.append((lineno, project, output_dir))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    with span("warm indexes"):
+        targets = [(domain, dataset_target(UIPRO_DATASETS, domain)) for domain in DESIGN_DOMAINS]
+        build_indexes(targets, workers)
+        for _, target in targets:
+            if target.filepath.exists():
+                load_index(*_index_args(target)).warm()
+        data_context().reasoning_index  # compiled before the workers fork
+    results = None
+    with span("generate projects"):
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    results = list(pool.map(_generate_project, jobs))
+            except (OSError, ImportError, NotImplementedError, RuntimeError):  # no usable pool here
+                results = None
+        if results is None:
+            workers = 1
+            results = [_generate_project(job) for job in jobs]
+    return {"projects": results, "count": len(results), "failed": sum("error" in entry for entry in results),
+            "workers": workers, "ms": (time.perf_counter() - start) * 1000}
+
+
+def format_batch_summary(summary: dict) -> str:
+    """One line per project (line, slug, ms, files or error), then the totals."""
+    lines = [f"{'line':>5}  {'project':<32}{'ms':>9}  files"]
+    for entry in summary["projects"]:
+        label = entry.get("slug") or entry.get("project_name") or entry.get("query") or "-"
+        ms = f"{entry['ms']:.1f}" if "ms" in entry else "-"
+        detail = f"ERROR {entry['error']}" if "error" in entry else ", ".join(entry["files"])
+        lines.append(f"{entry['line']:>5}  {label[:31]:<32}{ms:>9}  {detail}")
+    done = summary["count"] - summary["failed"]
+    lines.append("")
+    lines.append(f"{done}/{summary['count']} projects in {summary['ms']:.0f} ms with {summary['workers']} worker(s)"
+                 + (f", {summary['failed']} failed" if summary["failed"] else ""))
+    return "\n".join(lines)
+
+
 # ============ CLI SUPPORT ============
 if __name__ == "__main__":
     import argparse
@@ -0,0 +1,1760 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Engine - the BM25 search engine shared by every skill's CSV datasets
+
+ui-ux-pro-max (core.py), design/logo, design/cip and design-system/slides
+declare their CSVs here with register_datasets() and search them through
+the same code: inverted index with MaxScore pruning, BM25F field weights,
+index tiers (in-process, data bundle, on-disk cache, incremental rebuild),
+result cache, misspelling correction and phrase/proximity matching.
+
+Other skills put this directory on sys.path and import engine; nothing here
+knows about any one skill's domains.
+"""
+
+import atexit
+import csv
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import pickle
+import re
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from math import log
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict, deque, namedtuple
+from collections.abc import Mapping, Sequence
+
+import fuzzy
+from facets import FacetIndex, FilterError, parse_filters
+from fuzzy import TrigramIndex
+from positions import PositionalIndex
+from profiling import span
+
+# ============ CONFIGURATION ============
+# The engine ships with ui-ux-pro-max; its caches live in that skill's directory
+SKILL_DIR = Path(__file__).parent.parent
+MAX_RESULTS = 3
+
+# Compiled indexes are persisted next to data/ so warm queries skip CSV parsing
+# and BM25 fitting. Set UIPRO_INDEX_CACHE=0 to disable the on-disk tier, or
+# UIPRO_INDEX_CACHE_DIR to relocate it (e.g. when the skill dir is read-only).
+INDEX_CACHE_DIR = Path(os.environ.get("UIPRO_INDEX_CACHE_DIR") or SKILL_DIR / ".index-cache")
+INDEX_CACHE_ENABLED = os.environ.get("UIPRO_INDEX_CACHE", "1") != "0"
+INDEX_CACHE_VERSION = 9
+
+# Ahead-of-time bundle of every domain/stack index (search.py --build-data).
+# Loaders memory-map it and read only the sections they need, casting their
+# arrays straight out of the map; entries whose CSV changed since the build
+# are ignored. UIPRO_BUNDLE overrides the path.
+BUNDLE_PATH = Path(os.environ.get("UIPRO_BUNDLE") or SKILL_DIR / "data" / "data.bundle")
+BUNDLE_MAGIC = b"UIPROBN1"
+
+# search()/search_stack() answers are kept in a bounded LRU (size 0 disables
+# it). UIPRO_RESULT_CACHE_DISK=1 also keeps it in INDEX_CACHE_DIR across runs,
+# one results-<registry>.pickle per dataset registry.
+RESULT_CACHE_SIZE = int(os.environ.get("UIPRO_RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_DISK = os.environ.get("UIPRO_RESULT_CACHE_DISK", "0") == "1"
+
+# Scoring backend: "python" (default, stdlib only) or "numpy" (bm25_vector.py,
+# needs numpy + scipy; silently falls back to "python" when they are missing).
+SEARCH_BACKEND = os.environ.get("UIPRO_SEARCH_BACKEND", "python")
+
+# Map misspelled query tokens to the nearest indexed token before scoring
+# (fuzzy.py). Only tokens no registered dataset knows count as misspelled, so
+# "weather" stays "weather" on a dataset that only knows "leather" (their
+# union is mirrored in INDEX_CACHE_DIR/vocabulary-<registry>.pickle).
+# UIPRO_FUZZY=0 scores queries exactly as typed.
+FUZZY_SEARCH = os.environ.get("UIPRO_FUZZY", "1") != "0"
+
+# "Quoted phrases" in a query only match rows holding those tokens in order
+# (positions.py). Multi-term queries also re-rank their best
+# PROXIMITY_WINDOW * k hits, boosting rows where consecutive query terms sit
+# within PROXIMITY_SPAN tokens of each other; PROXIMITY_WEIGHT = 0 disables it.
+PROXIMITY_WEIGHT = 0.5
+PROXIMITY_SPAN = 5
+PROXIMITY_WINDOW = 4
+_PHRASE_RE = re.compile(r'"([^"]+)"')
+
+
+# ============ BM25 IMPLEMENTATION ============
+# Term-frequency saturation and length normalization of every index
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Queries with at least this many distinct tokens use MaxScore pruning in top_k()
+MAXSCORE_MIN_TERMS = 3
+# Relative safety margin for MaxScore pruning decisions: bounds and partial
+# sums are added in a different order than the final scores, so they may be
+# off by a few ulps.
+_PRUNE_SLACK = 1 + 1e-9
+
+
+class BM25:
+    """BM25 ranking algorithm for text search.
+
+    fit() builds an inverted index (token -> [(doc_id, tf), ...]) so queries
+    only touch documents that contain at least one query token, plus a
+    per-token score upper bound that lets top_k() prune long queries.
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.corpus = []
+        self.doc_lengths = []
+        self.avgdl = 0
+        self.idf = {}
+        self.doc_freqs = defaultdict(int)
+        self.N = 0
+        self.postings = {}
+        self.doc_norms = []
+        self.max_scores = {}
+
+    def tokenize(self, text):
+        """Lowercase, split, remove punctuation, filter short words"""
+        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+        return [w for w in text.split() if len(w) >= 2]
+
+    def fit(self, documents):
+        """Build BM25 index from documents"""
+        with span("tokenize"):
+            self.corpus = [self.tokenize(doc) for doc in documents]
+        self.N = len(self.corpus)
+        if self.N == 0:
+            return
+        self.doc_lengths = [len(doc) for doc in self.corpus]
+        self.avgdl = sum(self.doc_lengths) / self.N
+
+        postings = defaultdict(list)
+        for idx, doc in enumerate(self.corpus):
+            term_freqs = defaultdict(int)
+            for word in doc:
+                term_freqs[word] += 1
+            for word, tf in term_freqs.items():
+                postings[word].append((idx, tf))
+        self.postings = dict(postings)
+
+        for word, plist in self.postings.items():
+            self.doc_freqs[word] = len(plist)
+
+        for word, freq in self.doc_freqs.items():
+            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+
+        self._compute_norms()
+        self._compute_bounds()
+
+    def splice(self, start, stop, documents):
+        """Fitted copy with documents start..stop-1 replaced, like list slice assignment.
+
+        Only the replaced documents are tokenized, and only their tokens' (and
+        any shifted documents' tokens') posting lists are rewritten; the rest
+        are shared with self, which is left untouched. idf, norms and bounds
+        are then recomputed from the stored counts, so the result equals
+        fit() over the edited corpus.
+        """
+        new_docs = [self.tokenize(doc) for doc in documents]
+        shift = len(new_docs) - (stop - start)
+        removed = {word for doc in self.corpus[start:stop] for word in doc}
+        shifted = {word for doc in self.corpus[stop:] for word in doc} if shift else set()
+
+        postings = dict(self.postings)
+        for word in removed | shifted:
+            plist = postings[word]
+            lo, hi = bisect_left(plist, (start,)), bisect_left(plist, (stop,))
+            postings[word] = plist[:lo] + [(idx + shift, tf) for idx, tf in plist[hi:]]
+        fresh = set()
+        for idx, doc in enumerate(new_docs, start):
+            term_freqs = defaultdict(int)
+            for word in doc:
+                term_freqs[word] += 1
+            for word, tf in term_freqs.items():
+                if word not in fresh and word not in removed and word not in shifted:
+                    postings[word] = list(postings.get(word, ()))
+                fresh.add(word)
+                plist = postings[word]
+                plist.insert(bisect_left(plist, (idx,)), (idx, tf))
+
+        bm25 = type(self)(self.k1, self.b)
+        bm25.corpus = self.corpus[:start] + new_docs + self.corpus[stop:]
+        bm25.N = len(bm25.corpus)
+        bm25.doc_lengths = [len(doc) for doc in bm25.corpus]
+        bm25.avgdl = sum(bm25.doc_lengths) / bm25.N if bm25.N else 0
+        bm25.postings = {word: plist for word, plist in postings.items() if plist}
+        for word, plist in bm25.postings.items():
+            bm25.doc_freqs[word] = len(plist)
+        for word, freq in bm25.doc_freqs.items():
+            bm25.idf[word] = log((bm25.N - freq + 0.5) / (freq + 0.5) + 1)
+        bm25._compute_norms()
+        bm25._compute_bounds()
+        return bm25
+
+    def _compute_norms(self):
+        """Per-document length normalization: k1 * (1 - b + b * dl / avgdl)"""
+        if not self.avgdl:  # every document tokenized to nothing
+            self.doc_norms = [self.k1 * (1 - self.b)] * self.N
+            return
+        self.doc_norms = [self.k1 * (1 - self.b + self.b * doc_len / self.avgdl) for doc_len in self.doc_lengths]
+
+    def _compute_bounds(self):
+        """Highest score each token contributes to any document (MaxScore upper bounds)"""
+        k1_plus_1 = self.k1 + 1
+        norms = self.doc_norms
+        self.max_scores = {
+            token: self.idf[token] * max((tf * k1_plus_1) / (tf + norms[idx]) for idx, tf in plist)
+            for token, plist in self.postings.items()
+        }
+
+    def get_state(self):
+        """Return the fitted index as plain builtins (for the on-disk cache)"""
+        return {
+            "k1": self.k1,
+            "b": self.b,
+            "corpus": self.corpus,
+            "doc_lengths": self.doc_lengths,
+            "avgdl": self.avgdl,
+            "idf": self.idf,
+            "doc_freqs": dict(self.doc_freqs),
+            "N": self.N,
+            "postings": self.postings,
+            "max_scores": self.max_scores,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a fitted BM25 from get_state() output without refitting"""
+        bm25 = cls(state["k1"], state["b"])
+        bm25.corpus = state["corpus"]
+        bm25.doc_lengths = state["doc_lengths"]
+        bm25.avgdl = state["avgdl"]
+        bm25.idf = state["idf"]
+        bm25.doc_freqs = defaultdict(int, state["doc_freqs"])
+        bm25.N = state["N"]
+        bm25.postings = state["postings"]
+        bm25.max_scores = state["max_scores"]
+        if bm25.N:
+            bm25._compute_norms()
+        return bm25
+
+    def _accumulate(self, query):
+        """Sum BM25 contributions over the postings of each query token.
+
+        Tokens are visited in query order (duplicates included), so every
+        document's float sum is bit-identical to the exhaustive per-document loop.
+        """
+        return self._accumulate_tokens(self.tokenize(query))
+
+    def _accumulate_tokens(self, tokens):
+        scores = {}
+        k1_plus_1 = self.k1 + 1
+        norms = self.doc_norms
+        for token in tokens:
+            plist = self.postings.get(token)
+            if not plist:
+                continue
+            idf = self.idf[token]
+            for idx, tf in plist:
+                scores[idx] = scores.get(idx, 0) + idf * (tf * k1_plus_1) / (tf + norms[idx])
+        return scores
+
+    def top_k(self, query, k, allowed=None):
+        """Return the k best (doc_id, score) pairs with score > 0.
+
+        Uses a bounded heap; ties keep the lower doc_id first, matching the
+        stable sort in score(). allowed is an optional row bitset (see
+        facets.py); documents outside it are never ranked. Queries with
+        MAXSCORE_MIN_TERMS or more distinct tokens go through _maxscore().
+        """
+        if k <= 0:
+            return []
+        tokens = self.tokenize(query)
+        if len(set(tokens)) >= MAXSCORE_MIN_TERMS:
+            scores = self._maxscore(tokens, k, allowed)
+        else:
+            scores = self._accumulate_tokens(tokens).items()
+            if allowed is not None:
+                scores = [(idx, score) for idx, score in scores if allowed >> idx & 1]
+        return heapq.nsmallest(k, scores, key=lambda item: (-item[1], item[0]))
+
+    def _exact_score(self, tokens, idx):
+        """One document's score, summed in query order exactly like _accumulate_tokens()"""
+        score = 0
+        k1_plus_1 = self.k1 + 1
+        norm = self.doc_norms[idx]
+        for token in tokens:
+            plist = self.postings.get(token)
+            if not plist:
+                continue
+            pos = bisect_left(plist, (idx,))
+            if pos < len(plist) and plist[pos][0] == idx:
+                tf = plist[pos][1]
+                score = score + self.idf[token] * (tf * k1_plus_1) / (tf + norm)
+        return score
+
+    def _maxscore(self, tokens, k, allowed=None):
+        """Candidate (doc_id, score) pairs that can reach the top k (MaxScore).
+
+        Tokens are processed by descending upper bound. Once the bounds of the
+        tokens still to come cannot lift an unseen document past the current
+        k-th best partial score, no new documents are admitted, and candidates
+        that can no longer catch up are dropped. The few survivors are then
+        rescored in query order, so results equal the exhaustive ranking.
+        """
+        counts = Counter(token for token in tokens if token in self.postings)
+        if not counts:
+            return []
+        terms = sorted(counts, key=lambda t: (-self.max_scores[t] * counts[t], t))
+        remaining = sum(self.max_scores[t] * counts[t] for t in terms)
+        k1_plus_1 = self.k1 + 1
+        norms = self.doc_norms
+        acc = {}
+        admitting = True
+        threshold = 0
+
+        for token in terms:
+            plist = self.postings[token]
+            weight = self.idf[token] * counts[token]
+            remaining -= self.max_scores[token] * counts[token]
+            if admitting:
+                for idx, tf in plist:
+                    if allowed is None or allowed >> idx & 1:
+                        acc[idx] = acc.get(idx, 0) + weight * (tf * k1_plus_1) / (tf + norms[idx])
+            elif len(plist) <= len(acc):
+                for idx, tf in plist:
+                    if idx in acc:
+                        acc[idx] += weight * (tf * k1_plus_1) / (tf + norms[idx])
+            else:
+                for idx in acc:
+                    pos = bisect_left(plist, (idx,))
+                    if pos < len(plist) and plist[pos][0] == idx:
+                        tf = plist[pos][1]
+                        acc[idx] += weight * (tf * k1_plus_1) / (tf + norms[idx])
+
+            if len(acc) < k:
+                continue
+            threshold = heapq.nlargest(k, acc.values())[-1]
+            if admitting and remaining * _PRUNE_SLACK < threshold:
+                admitting = False
+            if not admitting:
+                acc = {idx: score for idx, score in acc.items() if (score + remaining) * _PRUNE_SLACK >= threshold}
+
+        return [(idx, self._exact_score(tokens, idx)) for idx, score in acc.items()
+                if score * _PRUNE_SLACK >= threshold]
+
+    def score(self, query):
+        """Score all documents against query, best first"""
+        scores = self._accumulate(query)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        ranked.extend((idx, 0) for idx in range(self.N) if idx not in scores)
+        return ranked
+
+
+class BM25F(BM25):
+    """Field-weighted BM25 (BM25F) over the search columns of a CSV.
+
+    Each document is a list of field texts. A term's per-field frequencies are
+    length-normalized against that field's average length and combined with
+    the field weights into one pseudo term frequency:
+
+        tf~ = sum_f w_f * tf_f / (1 - b + b * len_f / avglen_f)
+
+    tf~ is query-independent, so fit() stores it in the postings in place of
+    the raw tf and sets every doc_norm to k1. The inherited scorers (and the
+    vector backend) then compute idf * tf~ * (k1 + 1) / (tf~ + k1) unchanged.
+    """
+
+    def __init__(self, k1=BM25_K1, b=BM25_B, weights=None):
+        super().__init__(k1, b)
+        self.weights = list(weights or [])
+        self.field_lengths = []      # per document: [len_f, ...]
+        self.avg_field_lengths = []  # per field
+
+    def fit(self, documents):
+        """Build the index from documents given as lists of field texts"""
+        with span("tokenize"):
+            fields = [[self.tokenize(text) for text in doc] for doc in documents]
+        self.corpus = [[word for field in doc for word in field] for doc in fields]
+        self.N = len(self.corpus)
+        if self.N == 0:
+            return
+        if not self.weights:
+            self.weights = [1.0] * len(fields[0])
+        self.doc_lengths = [len(doc) for doc in self.corpus]
+        self.avgdl = sum(self.doc_lengths) / self.N
+        self.field_lengths = [[len(field) for field in doc] for doc in fields]
+        self.avg_field_lengths = [sum(lengths[f] for lengths in self.field_lengths) / self.N
+                                  for f in range(len(self.weights))]
+
+        postings = defaultdict(list)
+        for idx, doc in enumerate(fields):
+            pseudo_tf = defaultdict(float)
+            for f, field in enumerate(doc):
+                if not field or not self.weights[f]:
+                    continue
+                avg = self.avg_field_lengths[f]
+                scale = self.weights[f] / (1 - self.b + self.b * len(field) / avg)
+                for word in field:
+                    pseudo_tf[word] += scale
+            for word, tf in pseudo_tf.items():
+                postings[word].append((idx, tf))
+        self.postings = dict(postings)
+
+        for word, plist in self.postings.items():
+            self.doc_freqs[word] = len(plist)
+
+        for word, freq in self.doc_freqs.items():
+            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+
+        self._compute_norms()
+        self._compute_bounds()
+
+    def _compute_norms(self):
+        """Length normalization already lives in tf~; saturate with plain k1"""
+        self.doc_norms = [self.k1] * self.N
+
+    def get_state(self):
+        state = super().get_state()
+        state.update(weights=self.weights, field_lengths=self.field_lengths,
+                     avg_field_lengths=self.avg_field_lengths)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        bm25 = super().from_state(state)
+        bm25.weights = state["weights"]
+        bm25.field_lengths = state["field_lengths"]
+        bm25.avg_field_lengths = state["avg_field_lengths"]
+        return bm25
+
+
+def _scorer_from_state(state):
+    """BM25 or BM25F, whichever produced the cached state"""
+    return (BM25F if "weights" in state else BM25).from_state(state)
+
+
+# ============ ROW STORE ============
+class Record:
+    """Read-only mapping view of one RowStore row; dict(record) copies it out"""
+
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store, idx):
+        self._store = store
+        self._idx = idx
+
+    def __getitem__(self, col):
+        return self._store.data[self._store.positions[col]][self._idx]
+
+    def get(self, col, default=None):
+        pos = self._store.positions.get(col)
+        return default if pos is None else self._store.data[pos][self._idx]
+
+    def keys(self):
+        return self._store.columns
+
+    def __iter__(self):
+        return iter(self._store.columns)
+
+    def __len__(self):
+        return len(self._store.columns)
+
+    def __contains__(self, col):
+        return col in self._store.positions
+
+
+class RowStore:
+    """The rows of one CSV stored column by column.
+
+    Each column is a list of interned strings, so repeated cells (categories,
+    severities, subset lists) share one object. Rows are read through Record
+    views and only become dicts in as_dict(), for the hits a query returns.
+    """
+
+    __slots__ = ("columns", "positions", "data", "n")
+
+    def __init__(self, columns, data, n):
+        self.columns = tuple(columns)
+        self.positions = {col: pos for pos, col in enumerate(self.columns)}
+        self.data = data  # per column: [cell, ...]
+        self.n = n
+
+    @classmethod
+    def from_csv(cls, filepath):
+        """Parse a CSV (header row first) into interned columns"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            data = [[] for _ in header]
+            n = 0
+            for record in reader:
+                if not record:  # blank line, skipped like csv.DictReader does
+                    continue
+                for column, cell in zip(data, record):
+                    column.append(sys.intern(cell))
+                for column in data[len(record):]:
+                    column.append("")
+                n += 1
+        return cls(header, data, n)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, idx):
+        if not 0 <= idx < self.n:
+            raise IndexError(idx)
+        return Record(self, idx)
+
+    def __iter__(self):
+        return (Record(self, idx) for idx in range(self.n))
+
+    def column(self, col):
+        """All cells of one column; a missing column reads as empty strings"""
+        pos = self.positions.get(col)
+        return [""] * self.n if pos is None else self.data[pos]
+
+    def select(self, columns):
+        """Store restricted to the given columns (those present), sharing their lists"""
+        present = [col for col in columns if col in self.positions]
+        return RowStore(present, [self.data[self.positions[col]] for col in present], self.n)
+
+    def as_dict(self, idx):
+        """One row as a fresh {column: value} dict"""
+        return {col: column[idx] for col, column in zip(self.columns, self.data)}
+
+    def get_state(self):
+        """Plain-builtin state for the on-disk index cache"""
+        return {"columns": list(self.columns), "data": self.data, "n": self.n}
+
+    @classmethod
+    def from_state(cls, state):
+        return cls(state["columns"], state["data"], state["n"])
+
+
+# ============ INDEX CACHE ============
+class SearchIndex:
+    """A fitted BM25 index plus the output columns (a RowStore) and facets of one CSV.
+
+    row_hashes holds one digest of each row's search columns, so a later
+    build can tell which rows changed (see _build_index). positions is the
+    persisted PositionalIndex, when the index was loaded rather than built.
+    """
+
+    def __init__(self, bm25, rows, fingerprint, facets=None, row_hashes=None, positions=None):
+        self.bm25 = bm25
+        self.rows = rows
+        self.fingerprint = fingerprint
+        self.facets = facets
+        self.row_hashes = row_hashes
+        self._vector = None
+        self._fuzzy = None
+        self._positions = positions
+
+    def scorer(self, backend=None):
+        """Return the object exposing top_k() for the requested backend"""
+        if _resolve_backend(backend) == "numpy":
+            if self._vector is None:
+                from bm25_vector import VectorBM25
+                self._vector = VectorBM25(self.bm25)
+            return self._vector
+        return self.bm25
+
+    def positions(self):
+        """PositionalIndex over the BM25 corpus, loaded with the index or built on first need"""
+        if self._positions is None:
+            self._positions = PositionalIndex(self.bm25.corpus)
+        return self._positions
+
+    def warm(self):
+        """Build the positional and trigram indexes now instead of on first need (e.g. before forking workers)"""
+        self.positions()
+        if self._fuzzy is None:
+            self._fuzzy = TrigramIndex(self.bm25.doc_freqs)
+        return self
+
+    def parse(self, query, fuzzy=None):
+        """(tokens, phrases): the query's tokens in order and the token list of each "quoted phrase".
+
+        With fuzzy (default FUZZY_SEARCH), misspelled tokens are replaced by
+        their nearest indexed token (see fuzzy.py); one with no close match is
+        dropped from tokens but kept in its phrase, which then matches nothing.
+        A token counts as misspelled when neither this index nor any
+        registered dataset knows it (see known_tokens()): a real word from
+        another domain ("weather", "chat") is kept as typed and simply
+        scores nothing here.
+        """
+        tokens = self.bm25.tokenize(query)
+        phrases = [phrase for phrase in map(self.bm25.tokenize, _PHRASE_RE.findall(query)) if phrase]
+        if FUZZY_SEARCH if fuzzy is None else fuzzy:
+            unknown = {token for token in tokens if token not in self.bm25.postings}
+            if unknown:
+                if self._fuzzy is None:
+                    self._fuzzy = TrigramIndex(self.bm25.doc_freqs)
+                fixed = {token: self._fuzzy.correct(token) for token in unknown}
+                known = known_tokens([token for token, fix in fixed.items() if fix])  # only rewrites need checking
+                fixed = {token: token if token in known else fix for token, fix in fixed.items()}
+                tokens = [fixed.get(token, token) for token in tokens if fixed.get(token, token)]
+                phrases = [[fixed.get(token) or token for token in phrase] for phrase in phrases]
+        return tokens, phrases
+
+    def correct(self, query):
+        """query with misspelled tokens replaced by their nearest indexed tokens (see parse()).
+
+        Returned unchanged when every token is already indexed; the trigram
+        index is built on first need.
+        """
+        tokens = self.bm25.tokenize(query)
+        if all(token in self.bm25.postings for token in tokens):
+            return query
+        return " ".join(self.parse(query, fuzzy=True)[0])
+
+    def select(self, filters):
+        """Row bitset for the given filters, or None when no filters are set"""
+        if not filters:
+            return None
+        if self.facets is None:
+            raise FilterError("Filters are not supported for this dataset")
+        return self.facets.select(filters)
+
+    def top_k_batch(self, queries, k, backend=None, filters=None):
+        """Rank many queries against this index, one [(doc_id, score)] list each.
+
+        Queries are parsed first (misspelling fixes, "quoted phrases"; see
+        parse()). Filtered and phrase queries always use the pure-Python
+        scorer, which can skip rows outside the facet/phrase bitset. The best
+        PROXIMITY_WINDOW * k hits of multi-term queries are then re-ranked
+        with a proximity bonus (see _rerank()).
+        """
+        allowed = self.select(filters)
+        with span("parse"):
+            parsed = [self.parse(query) for query in queries]
+        window = k * PROXIMITY_WINDOW if PROXIMITY_WEIGHT else k
+        with span("rank"):
+            if allowed is None and not any(phrases for _, phrases in parsed):
+                texts = [" ".join(tokens) for tokens, _ in parsed]
+                scorer = self.scorer(backend)
+                if hasattr(scorer, "top_k_batch"):
+                    ranked = scorer.top_k_batch(texts, window)
+                else:
+                    ranked = [scorer.top_k(text, window) for text in texts]
+            else:
+                ranked = []
+                for tokens, phrases in parsed:
+                    bits = allowed
+                    for phrase in phrases:
+                        phrase_bits = self.positions().phrase_docs(phrase)
+                        bits = phrase_bits if bits is None else bits & phrase_bits
+                    ranked.append(self.bm25.top_k(" ".join(tokens), window, bits))
+        with span("rerank"):
+            return [self._rerank(tokens, hits, k) for (tokens, _), hits in zip(parsed, ranked)]
+
+    def _rerank(self, tokens, hits, k):
+        """Best k of hits after adding the proximity bonus.
+
+        Each pair of consecutive, distinct query tokens found within
+        PROXIMITY_SPAN positions of each other in a row adds
+        PROXIMITY_WEIGHT * min(idf) * (PROXIMITY_SPAN + 1 - gap) / PROXIMITY_SPAN,
+        so an exact adjacent pair ("dark mode") earns the full bonus.
+        """
+        pairs = [(a, b) for a, b in zip(tokens, tokens[1:]) if a != b]
+        if not PROXIMITY_WEIGHT or not pairs or not hits:
+            return hits[:k]
+        idf = self.bm25.idf
+        positions = self.positions()
+        boosted = []
+        for idx, score in hits:
+            bonus = 0
+            for a, b in pairs:
+                gap = positions.min_distance(a, b, idx)
+                if gap is not None and gap <= PROXIMITY_SPAN:
+                    bonus += min(idf[a], idf[b]) * (PROXIMITY_SPAN + 1 - gap) / PROXIMITY_SPAN
+            boosted.append((idx, score + PROXIMITY_WEIGHT * bonus))
+        return heapq.nsmallest(k, boosted, key=lambda item: (-item[1], item[0]))
+
+
+def _resolve_backend(backend=None):
+    """Pick the scoring backend, falling back to pure Python when numpy/scipy are absent"""
+    backend = backend or SEARCH_BACKEND
+    if backend == "numpy":
+        from bm25_vector import AVAILABLE
+        return "numpy" if AVAILABLE else "python"
+    return "python"
+
+
+# In-process tier: (filepath, search_cols, output_cols) -> SearchIndex
+_INDEXES = {}
+
+
+def _file_digest(filepath):
+    """SHA-256 of the file contents"""
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fingerprint(filepath, st=None, digest=None):
+    """Cache key for a CSV: size + mtime + content hash"""
+    st = st or filepath.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest or _file_digest(filepath)}
+
+
+def _is_fresh(fingerprint, filepath):
+    """Check a stored fingerprint against the file on disk.
+
+    Size + mtime is the fast path; when only the mtime moved (checkout, touch)
+    the content hash decides, so an unchanged file never forces a rebuild.
+    """
+    st = filepath.stat()
+    if st.st_size != fingerprint["size"]:
+        return False
+    if st.st_mtime_ns == fingerprint["mtime_ns"]:
+        return True
+    if _file_digest(filepath) != fingerprint["sha256"]:
+        return False
+    fingerprint["mtime_ns"] = st.st_mtime_ns
+    return True
+
+
+def _file_label(name):
+    """name reduced to characters that are safe in a cache file name"""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '-', name)
+
+
+def _index_key(filepath, search_cols, output_cols, facets=None, field_weights=None):
+    """Stable id for one (CSV, column projection, facets, weights) combination"""
+    spec = repr((str(filepath.resolve()), tuple(search_cols), tuple(output_cols), sorted((facets or {}).items()),
+                 sorted((field_weights or {}).items())))
+    return f"{filepath.stem}-{hashlib.sha1(spec.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _cache_path(filepath, search_cols, output_cols, facets=None, field_weights=None):
+    """On-disk cache file for one (CSV, column projection, facets, weights) combination"""
+    return INDEX_CACHE_DIR / f"{_index_key(filepath, search_cols, output_cols, facets, field_weights)}.pickle"
+
+
+def _row_hash(fields):
+    """Stable digest of one row's search-column texts"""
+    return hashlib.blake2b("\x1f".join(fields).encode('utf-8'), digest_size=8).digest()
+
+
+def _changed_span(old, new):
+    """(start, old_stop, new_stop) such that old[start:old_stop] became new[start:new_stop]
+
+    Everything before start and after the stops is unchanged (common prefix
+    and suffix), so an append, an edit or a deletion yields a short span.
+    """
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[len(old) - 1 - end] == new[len(new) - 1 - end]:
+        end += 1
+    return start, len(old) - end, len(new) - end
+
+
+def _build_index(filepath, search_cols, output_cols, facets=None, field_weights=None, previous=None):
+    """Parse the CSV and fit a BM25 (or BM25F, when field weights are set) index.
+
+    previous is an older index of the same CSV and columns. For plain BM25,
+    its row hashes pick out the rows that changed and BM25.splice() re-indexes
+    only those; BM25F field averages move with every row, so it always refits.
+    """
+    with span("read csv"):
+        st = filepath.stat()
+        digest = _file_digest(filepath)
+        store = RowStore.from_csv(filepath)
+        fields = list(zip(*(store.column(col) for col in search_cols)))
+        row_hashes = [_row_hash(doc) for doc in fields]
+
+    with span("fit"):
+        if field_weights:
+            bm25 = BM25F(weights=[field_weights.get(col, 1.0) for col in search_cols])
+            bm25.fit([list(doc) for doc in fields])
+        elif previous is not None and previous.row_hashes is not None and not isinstance(previous.bm25, BM25F):
+            start, old_stop, new_stop = _changed_span(previous.row_hashes, row_hashes)
+            bm25 = previous.bm25.splice(start, old_stop, [" ".join(doc) for doc in fields[start:new_stop]])
+        else:
+            # Build documents from search columns
+            documents = [" ".join(doc) for doc in fields]
+            bm25 = BM25()
+            bm25.fit(documents)
+    with span("facets"):
+        facet_index = FacetIndex(facets, store) if facets else None
+    return SearchIndex(bm25, store.select(output_cols), _fingerprint(filepath, st, digest), facet_index, row_hashes)
+
+
+def _index_payload(index):
+    """Picklable form of an index, shared by the cache files and the bundle"""
+    return {
+        "version": INDEX_CACHE_VERSION,
+        "python": sys.version_info[:2],
+        "fingerprint": index.fingerprint,
+        "bm25": index.bm25.get_state(),
+        "rows": index.rows.get_state(),
+        "facets": index.facets.get_state() if index.facets else None,
+        "row_hashes": index.row_hashes,
+        "positions": index.positions().get_state(),
+    }
+
+
+def _index_from_payload(payload):
+    """Rebuild a SearchIndex from _index_payload() output; None when it's from another version.
+
+    Freshness is the caller's call: a stale index still seeds an incremental rebuild.
+    """
+    if not isinstance(payload, dict) or payload.get("version") != INDEX_CACHE_VERSION \
+            or payload.get("python") != sys.version_info[:2]:
+        return None
+    facet_index = FacetIndex.from_state(payload["facets"]) if payload["facets"] else None
+    return SearchIndex(_scorer_from_state(payload["bm25"]), RowStore.from_state(payload["rows"]),
+                       payload["fingerprint"], facet_index, payload["row_hashes"],
+                       PositionalIndex.from_state(payload["positions"]))
+
+
+def _read_cached_index(path):
+    """Load a persisted index, possibly stale; None when missing or unreadable"""
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    return _index_from_payload(payload)
+
+
+def _atomic_write(path, write):
+    """Call write(f) on a temp file next to path, then move it into place"""
+    # Unique per thread too: daemon requests may rebuild the same cache file at once
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def _write_cached_index(path, index):
+    """Persist an index atomically; the cache is best-effort so IO errors are ignored"""
+    try:
+        _atomic_write(path, lambda f: pickle.dump(_index_payload(index), f, protocol=pickle.HIGHEST_PROTOCOL))
+    except OSError:
+        pass
+
+
+# ============ DATA BUNDLE ============
+# Layout: BUNDLE_MAGIC, an 8-byte little-endian table-of-contents length, the
+# TOC as JSON ({"version", "python", "byteorder", "sections": {index key:
+# {"file", "offset", "length"}}}), then one packed index per section (see
+# _pack_index). Offsets count from the first byte after the TOC.
+#
+# A packed index is an 8-byte header length, a JSON header (scalars, the
+# token string table, where each array sits), then 8-byte-aligned arrays in
+# native byte order. Loading casts those arrays straight out of the map:
+#
+#     idf, max_scores, doc_freqs   per posting token (the first len(postings) tokens)
+#     post_offsets                 where each token's postings start in post_docs/post_tfs
+#     post_docs, post_tfs          every posting list, concatenated
+#     doc_lengths, field_lengths   per document (field_lengths flattened, BM25F only)
+#     corpus_offsets, corpus_ids   each document's tokens as string-table ids
+#     pos_doc_offsets, pos_docs,   the PositionalIndex (positions.py): each token's
+#     pos_runs, pos_delta_offsets, docs and run offsets, then its delta-encoded
+#     pos_deltas                   positions, concatenated in string-table order
+#
+# Posting lists become Python lists only when a query first touches their
+# token, and positional entries stay slices of the map; the row store,
+# facets and row hashes are small and ride along as pickled blobs.
+_PACK_ALIGN = 8
+
+
+class _PackedColumn(Mapping):
+    """token -> value view of one per-token array of a packed index"""
+
+    __slots__ = ("_slots", "_values")
+
+    def __init__(self, slots, values):
+        self._slots = slots
+        self._values = values
+
+    def __getitem__(self, token):
+        return self._values[self._slots[token]]
+
+    def __contains__(self, token):
+        return token in self._slots
+
+    def __iter__(self):
+        return iter(self._slots)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __reduce__(self):  # pickles (e.g. into the disk cache) as a plain dict
+        return dict, (dict(self.items()),)
+
+
+class _PackedPostings(_PackedColumn):
+    """token -> [(doc_id, tf), ...] over the concatenated posting arrays, one list built per token on first use"""
+
+    __slots__ = ("_offsets", "_docs", "_tfs", "_lists")
+
+    def __init__(self, slots, offsets, docs, tfs):
+        super().__init__(slots, None)
+        self._offsets = offsets
+        self._docs = docs
+        self._tfs = tfs
+        self._lists = {}
+
+    def __getitem__(self, token):
+        plist = self._lists.get(token)
+        if plist is None:
+            slot = self._slots[token]
+            lo, hi = self._offsets[slot], self._offsets[slot + 1]
+            plist = self._lists[token] = list(zip(self._docs[lo:hi], self._tfs[lo:hi]))
+        return plist
+
+    def get(self, token, default=None):
+        return self[token] if token in self._slots else default
+
+
+class _PackedPositions(_PackedColumn):
+    """token -> (docs, offsets, deltas) of a packed PositionalIndex, as zero-copy slices of its arrays"""
+
+    __slots__ = ("_doc_offsets", "_docs", "_runs", "_delta_offsets", "_deltas")
+
+    def __init__(self, slots, doc_offsets, docs, runs, delta_offsets, deltas):
+        super().__init__(slots, None)
+        self._doc_offsets = doc_offsets
+        self._docs = docs
+        self._runs = runs
+        self._delta_offsets = delta_offsets
+        self._deltas = deltas
+
+    def __getitem__(self, token):
+        slot = self._slots[token]
+        lo, hi = self._doc_offsets[slot], self._doc_offsets[slot + 1]
+        return (self._docs[lo:hi], self._runs[lo:hi],
+                self._deltas[self._delta_offsets[slot]:self._delta_offsets[slot + 1]])
+
+    def get(self, token, default=None):
+        return self[token] if token in self._slots else default
+
+    def __reduce__(self):
+        return dict, ({token: tuple(array('I', part.tobytes()) for part in entry) for token, entry in self.items()},)
+
+
+class _PackedCorpus(Sequence):
+    """The BM25 corpus (token list per document) of a packed index, decoded per document"""
+
+    __slots__ = ("_tokens", "_offsets", "_ids")
+
+    def __init__(self, tokens, offsets, ids):
+        self._tokens = tokens
+        self._offsets = offsets
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        tokens = self._tokens
+        return [tokens[i] for i in self._ids[self._offsets[idx]:self._offsets[idx + 1]]]
+
+    def __eq__(self, other):
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _pack_index(index):
+    """Serialize a SearchIndex into the packed section format (see above)"""
+    bm25 = index.bm25
+    tokens = list(bm25.postings)
+    slots = {token: slot for slot, token in enumerate(tokens)}
+    for doc in bm25.corpus:  # tokens only in zero-weight BM25F fields have no postings
+        for token in doc:
+            if token not in slots:
+                slots[token] = len(tokens)
+                tokens.append(token)
+
+    post_offsets, post_docs, post_tfs = array('I', [0]), array('I'), array('d')
+    for token in tokens[:len(bm25.postings)]:
+        for idx, tf in bm25.postings[token]:
+            post_docs.append(idx)
+            post_tfs.append(tf)
+        post_offsets.append(len(post_docs))
+    corpus_offsets, corpus_ids = array('I', [0]), array('I')
+    for doc in bm25.corpus:
+        corpus_ids.extend(slots[token] for token in doc)
+        corpus_offsets.append(len(corpus_ids))
+    positions = index.positions().tokens
+    pos_doc_offsets, pos_docs, pos_runs = array('I', [0]), array('I'), array('I')
+    pos_delta_offsets, pos_deltas = array('I', [0]), array('I')
+    for token in tokens:
+        docs, runs, deltas = positions.get(token, ((), (), ()))
+        pos_docs.extend(docs)
+        pos_runs.extend(runs)
+        pos_deltas.extend(deltas)
+        pos_doc_offsets.append(len(pos_docs))
+        pos_delta_offsets.append(len(pos_deltas))
+    posting_tokens = tokens[:len(bm25.postings)]
+    arrays = {
+        "idf": array('d', (bm25.idf[token] for token in posting_tokens)),
+        "max_scores": array('d', (bm25.max_scores[token] for token in posting_tokens)),
+        "doc_freqs": array('I', (bm25.doc_freqs[token] for token in posting_tokens)),
+        "post_offsets": post_offsets,
+        "post_docs": post_docs,
+        "post_tfs": post_tfs,
+        "doc_lengths": array('I', bm25.doc_lengths),
+        "corpus_offsets": corpus_offsets,
+        "corpus_ids": corpus_ids,
+        "pos_doc_offsets": pos_doc_offsets,
+        "pos_docs": pos_docs,
+        "pos_runs": pos_runs,
+        "pos_delta_offsets": pos_delta_offsets,
+        "pos_deltas": pos_deltas,
+    }
+    if isinstance(bm25, BM25F):
+        arrays["field_lengths"] = array('I', (n for lengths in bm25.field_lengths for n in lengths))
+    blobs = {
+        "rows": pickle.dumps(index.rows.get_state(), protocol=pickle.HIGHEST_PROTOCOL),
+        "facets": pickle.dumps(index.facets.get_state(), protocol=pickle.HIGHEST_PROTOCOL) if index.facets else None,
+        "row_hashes": b"".join(index.row_hashes) if index.row_hashes is not None else None,
+    }
+
+    body, layout = bytearray(), {"arrays": {}, "blobs": {}}
+    for name, data in [*arrays.items(), *blobs.items()]:
+        if data is None:
+            continue
+        body.extend(b"\0" * (-len(body) % _PACK_ALIGN))
+        raw = data.tobytes() if isinstance(data, array) else data
+        if isinstance(data, array):
+            layout["arrays"][name] = [data.typecode, len(body), len(data)]
+        else:
+            layout["blobs"][name] = [len(body), len(raw)]
+        body.extend(raw)
+    header = {
+        "fingerprint": index.fingerprint,
+        "scorer": "bm25f" if isinstance(bm25, BM25F) else "bm25",
+        "k1": bm25.k1, "b": bm25.b, "N": bm25.N, "avgdl": bm25.avgdl,
+        "weights": getattr(bm25, "weights", None),
+        "avg_field_lengths": getattr(bm25, "avg_field_lengths", None),
+        "postings": len(bm25.postings),
+        "tokens": tokens,
+        **layout,
+    }
+    head = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    head += b" " * (-(8 + len(head)) % _PACK_ALIGN)
+    return struct.pack("<Q", len(head)) + head + bytes(body)
+
+
+def _unpack_index(view):
+    """SearchIndex over a packed section (a memoryview); its arrays stay views into the buffer"""
+    (head_len,) = struct.unpack("<Q", view[:8])
+    header = json.loads(bytes(view[8:8 + head_len]).decode('utf-8'))
+    base = 8 + head_len
+
+    def arr(name):
+        typecode, offset, count = header["arrays"][name]
+        return view[base + offset:base + offset + count * array(typecode).itemsize].cast(typecode)
+
+    def blob(name):
+        if name not in header["blobs"]:
+            return None
+        offset, length = header["blobs"][name]
+        return view[base + offset:base + offset + length]
+
+    tokens = header["tokens"]
+    slots = {token: slot for slot, token in enumerate(tokens[:header["postings"]])}
+    if header["scorer"] == "bm25f":
+        bm25 = BM25F(header["k1"], header["b"], header["weights"])
+        width = len(bm25.weights)
+        flat = arr("field_lengths").tolist()
+        bm25.field_lengths = [flat[i:i + width] for i in range(0, len(flat), width)]
+        bm25.avg_field_lengths = header["avg_field_lengths"]
+    else:
+        bm25 = BM25(header["k1"], header["b"])
+    bm25.N = header["N"]
+    bm25.avgdl = header["avgdl"]
+    bm25.doc_lengths = arr("doc_lengths").tolist()
+    bm25.corpus = _PackedCorpus(tokens, arr("corpus_offsets"), arr("corpus_ids"))
+    bm25.postings = _PackedPostings(slots, arr("post_offsets"), arr("post_docs"), arr("post_tfs"))
+    bm25.idf = _PackedColumn(slots, arr("idf"))
+    bm25.max_scores = _PackedColumn(slots, arr("max_scores"))
+    bm25.doc_freqs = _PackedColumn(slots, arr("doc_freqs"))
+    if bm25.N:
+        bm25._compute_norms()
+
+    doc_offsets = arr("pos_doc_offsets")
+    positions = _PackedPositions({token: slot for slot, token in enumerate(tokens)
+                                  if doc_offsets[slot] != doc_offsets[slot + 1]},
+                                 doc_offsets, arr("pos_docs"), arr("pos_runs"), arr("pos_delta_offsets"),
+                                 arr("pos_deltas"))
+
+    facets = blob("facets")
+    hashes = blob("row_hashes")
+    return SearchIndex(
+        bm25, RowStore.from_state(pickle.loads(blob("rows"))), header["fingerprint"],
+        FacetIndex.from_state(pickle.loads(facets)) if facets is not None else None,
+        [bytes(hashes[i:i + 8]) for i in range(0, len(hashes), 8)] if hashes is not None else None,
+        PositionalIndex.from_state({"N": header["N"], "tokens": positions}))
+
+# The open bundle: path, its (size, mtime_ns) when mapped, the map, its TOC
+# and where the sections start
+_BUNDLE = {"path": None, "stat": None, "map": None, "toc": None, "base": 0}
+# Daemon threads may open (or re-open) the bundle at the same time
+_BUNDLE_LOCK = threading.Lock()
+
+
+def _close_bundle():
+    """Drop the mapping (before the bundle is rewritten, or when tests swap paths)"""
+    if _BUNDLE["map"] is not None:
+        try:
+            _BUNDLE["map"].close()
+        except BufferError:  # a section is still being unpickled elsewhere; let GC close it
+            pass
+    _BUNDLE.update(path=None, stat=None, map=None, toc=None)
+
+
+def _open_bundle():
+    """Memory-map the bundle once per process; None when absent, foreign or corrupt"""
+    with _BUNDLE_LOCK:
+        return _open_bundle_locked()
+
+
+def _open_bundle_locked():
+    try:
+        st = BUNDLE_PATH.stat()
+    except OSError:
+        _close_bundle()
+        return None
+    if _BUNDLE["path"] == BUNDLE_PATH and _BUNDLE["stat"] == (st.st_size, st.st_mtime_ns):
+        return _BUNDLE if _BUNDLE["map"] is not None else None
+
+    _close_bundle()
+    _BUNDLE.update(path=BUNDLE_PATH, stat=(st.st_size, st.st_mtime_ns))
+    try:
+        with open(BUNDLE_PATH, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    head = len(BUNDLE_MAGIC) + 8
+    try:
+        if mapped[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+            raise ValueError("bad magic")
+        (toc_len,) = struct.unpack("<Q", mapped[len(BUNDLE_MAGIC):head])
+        toc = json.loads(mapped[head:head + toc_len].decode('utf-8'))
+    except (ValueError, struct.error):
+        mapped.close()
+        return None
+    if toc.get("version") != INDEX_CACHE_VERSION or tuple(toc.get("python", ())) != sys.version_info[:2] \
+            or toc.get("byteorder") != sys.byteorder:
+        mapped.close()
+        return None
+    _BUNDLE.update(map=mapped, toc=toc, base=head + toc_len)
+    return _BUNDLE
+
+
+def _read_bundled_index(key):
+    """Index section `key` from the bundle, possibly stale; None when missing"""
+    bundle = _open_bundle()
+    section = bundle and bundle["toc"]["sections"].get(key)
+    if not section:
+        return None
+    start = bundle["base"] + section["offset"]
+    try:
+        return _unpack_index(memoryview(bundle["map"])[start:start + section["length"]])
+    except (EOFError, pickle.UnpicklingError, AttributeError, ValueError, TypeError, KeyError, IndexError,
+            struct.error):
+        return None
+
+
+def build_bundle(targets, path=None, workers=None):
+    """Compile the indexes of targets, a list of (label, Target), into one bundle file.
+
+    Returns the build_indexes() report, each entry extended with the
+    "bytes" of its section. Sources that are already cached are not re-fitted,
+    and cold ones are built in parallel.
+    """
+    path = Path(path) if path else BUNDLE_PATH
+    targets = list(targets)
+    report = build_indexes(targets, workers)
+    sections, blobs = {}, []
+    offset = 0
+    targets = dict(targets)
+    for entry in report:
+        target = targets[entry["label"]]
+        index = load_index(*_index_args(target))
+        blob = _pack_index(index)
+        blob += b"\0" * (-len(blob) % _PACK_ALIGN)  # keep every section aligned
+        sections[_index_key(*_index_args(target))] = {"file": target.file, "offset": offset, "length": len(blob)}
+        blobs.append(blob)
+        offset += len(blob)
+        entry["bytes"] = len(blob)
+
+    toc = json.dumps({"version": INDEX_CACHE_VERSION, "python": list(sys.version_info[:2]), "byteorder": sys.byteorder,
+                      "sections": sections}, sort_keys=True).encode('utf-8')
+    toc += b" " * (-(len(BUNDLE_MAGIC) + 8 + len(toc)) % _PACK_ALIGN)  # sections start aligned
+
+    def write(f):
+        f.write(BUNDLE_MAGIC)
+        f.write(struct.pack("<Q", len(toc)))
+        f.write(toc)
+        for blob in blobs:
+            f.write(blob)
+
+    if path == BUNDLE_PATH:
+        _close_bundle()
+    _atomic_write(path, write)
+    return report
+
+
+def _memory_key(filepath, search_cols, output_cols, facets=None, field_weights=None):
+    """_INDEXES key for one (CSV, column projection, facets, weights) combination"""
+    return (str(filepath), tuple(search_cols), tuple(output_cols), repr(sorted((facets or {}).items())),
+            repr(sorted((field_weights or {}).items())))
+
+
+def _find_index(filepath, search_cols, output_cols, facets=None, field_weights=None):
+    """(index, tier, previous): a fresh index from memory, the bundle or the disk cache.
+
+    On a miss index and tier are None, and previous is the newest stale
+    index found in any tier (or None), ready to seed an incremental build.
+    """
+    key = _memory_key(filepath, search_cols, output_cols, facets, field_weights)
+    previous = _INDEXES.get(key)
+    if previous is not None and _is_fresh(previous.fingerprint, filepath):
+        return previous, "memory", None
+
+    bundled = _read_bundled_index(_index_key(filepath, search_cols, output_cols, facets, field_weights))
+    if bundled is not None and _is_fresh(bundled.fingerprint, filepath):
+        _INDEXES[key] = bundled
+        return bundled, "bundle", None
+
+    path = _cache_path(filepath, search_cols, output_cols, facets, field_weights)
+    index = _read_cached_index(path) if INDEX_CACHE_ENABLED else None
+    if index is not None and _is_fresh(index.fingerprint, filepath):
+        _INDEXES[key] = index
+        return index, "cache", None
+    # A stale index from any tier lets the rebuild re-index only changed rows
+    return None, None, previous or index or bundled
+
+
+def _store_index(index, filepath, search_cols, output_cols, facets=None, field_weights=None):
+    """Register a freshly built index in memory and (when enabled) the disk cache"""
+    if INDEX_CACHE_ENABLED:
+        _write_cached_index(_cache_path(filepath, search_cols, output_cols, facets, field_weights), index)
+    _INDEXES[_memory_key(filepath, search_cols, output_cols, facets, field_weights)] = index
+    _forget_vocabularies(filepath)
+
+
+def load_index(filepath, search_cols, output_cols, facets=None, field_weights=None):
+    """Return a ready SearchIndex, from memory, the data bundle, the on-disk cache, or a fresh build"""
+    args = (filepath, search_cols, output_cols, facets, field_weights)
+    with span("find index"):
+        index, _, previous = _find_index(*args)
+    if index is None:
+        with span("build index"):
+            index = _build_index(*args, previous)
+        with span("store index"):
+            _store_index(index, *args)
+    return index
+
+
+def _build_payload(args):
+    """Process-pool job: build one index from scratch, return (payload, seconds)"""
+    start = time.perf_counter()
+    index = _build_index(*args)
+    return _index_payload(index), time.perf_counter() - start
+
+
+def build_indexes(targets, workers=None):
+    """Make every index ready, building the missing ones in a process pool.
+
+    targets is a list of (label, Target). Indexes that are fresh in memory, the bundle or the disk cache
+    are just loaded; stale ones with an older version on hand are updated
+    in-process (incrementally, see _build_index); the rest are parsed and
+    fitted by up to `workers` processes (default UIPRO_BUILD_WORKERS or the
+    CPU count) and merged back into the in-process and disk tiers. With one
+    worker, one job, or no usable process pool, builds run serially.
+
+    Returns one dict per existing source: label, source ("memory", "bundle",
+    "cache", "updated" or "built"), seconds, rows and terms.
+    """
+    targets = list(targets)
+    if workers is None:
+        workers = int(os.environ.get("UIPRO_BUILD_WORKERS") or 0) or os.cpu_count() or 1
+    report, jobs = {}, []
+    for label, target in targets:
+        if not target.filepath.exists():
+            continue
+        args = _index_args(target)
+        start = time.perf_counter()
+        index, tier, previous = _find_index(*args)
+        if index is None and previous is not None:
+            index, tier = _build_index(*args, previous), "updated"
+            _store_index(index, *args)
+        if index is None:
+            jobs.append((label, args))
+        else:
+            report[label] = (tier, time.perf_counter() - start, index)
+
+    built = None
+    if workers > 1 and len(jobs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                built = list(pool.map(_build_payload, [args for _, args in jobs]))
+        except (OSError, ImportError, NotImplementedError, RuntimeError):  # no usable pool here
+            built = None
+    if built is None:
+        built = [_build_payload(args) for _, args in jobs]
+    for (label, args), (payload, seconds) in zip(jobs, built):
+        index = _index_from_payload(payload)
+        _store_index(index, *args)
+        report[label] = ("built", seconds, index)
+
+    return [{"label": label, "source": report[label][0], "seconds": report[label][1],
+             "rows": len(report[label][2].rows), "terms": len(report[label][2].bm25.postings)}
+            for label, _ in targets if label in report]
+
+
+def clear_index_cache(disk=False):
+    """Drop in-process indexes, vocabularies and cached results, and optionally the persisted ones too"""
+    _INDEXES.clear()
+    _VOCABULARIES.clear()
+    RESULT_CACHE.clear()
+    if disk and INDEX_CACHE_DIR.is_dir():
+        for path in INDEX_CACHE_DIR.glob("*.pickle"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def _search_csv(filepath, search_cols, output_cols, query, max_results, backend=None, facets=None, filters=None,
+                field_weights=None):
+    """Core search function using BM25"""
+    return _search_csv_batch(filepath, search_cols, output_cols, [query], max_results, backend, facets, filters,
+                             field_weights)[0]
+
+
+def _search_csv_batch(filepath, search_cols, output_cols, queries, max_results, backend=None, facets=None, filters=None,
+                      field_weights=None):
+    """Run several queries against one CSV, building its index at most once.
+
+    filters (see facets.py) restrict ranking to matching rows and require the
+    dataset to declare facets; invalid filters raise FilterError.
+    """
+    if not filepath.exists():
+        return [[] for _ in queries]
+
+    with span("load index"):
+        index = load_index(filepath, search_cols, output_cols, facets, field_weights)
+    with span("score"):
+        ranked = index.top_k_batch(queries, max_results, backend, filters)
+
+    # Top results with score > 0
+    with span("rows"):
+        return [[index.rows.as_dict(idx) for idx, _ in hits] for hits in ranked]
+
+
+# Where a dataset search reads from: CSV path, column projection, facets and field weights
+Target = namedtuple("Target", ["filepath", "search_cols", "output_cols", "file", "facets", "field_weights"])
+
+
+def _index_args(target):
+    """load_index() arguments for a Target"""
+    return target.filepath, target.search_cols, target.output_cols, target.facets, target.field_weights
+
+
+def _search_target(target, queries, max_results, backend=None, filters=None):
+    """_search_csv_batch() for a Target"""
+    return _search_csv_batch(target.filepath, target.search_cols, target.output_cols, queries, max_results,
+                             backend, target.facets, filters, target.field_weights)
+
+
+# ============ RESULT CACHE ============
+class ResultCache:
+    """Bounded LRU of search results with CSV-aware invalidation.
+
+    Keys are (kind, name, query tokens, quoted phrases, k, filters, settings),
+    built from the query's BM25 tokens so case and punctuation don't split
+    entries (word order does: it matters to proximity re-ranking); settings
+    (see search_settings()) keeps results computed under other engine
+    settings apart.
+    The cache remembers the sha256 of each source CSV its entries came from;
+    a lookup that brings a different digest drops every entry of that domain
+    or stack first. With a directory, each kind (a dataset registry, e.g.
+    "ui-ux-pro-max" or "logo") is loaded from and saved to its own
+    results-<kind>.pickle there, so skills sharing the directory never
+    overwrite each other's entries.
+    Every method holds one lock, so daemon threads can share the cache.
+    """
+
+    def __init__(self, maxsize, directory=None):
+        self._lock = threading.RLock()
+        self.maxsize = maxsize
+        self.directory = directory
+        self.entries = OrderedDict()  # key -> [row dict, ...]
+        self.digests = {}             # (kind, name) -> sha256 of the CSV behind its entries
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._loaded = set()          # kinds read from disk
+        self._dirty = set()           # kinds changed since the last save
+
+    def path(self, kind):
+        """Disk file holding one kind's entries"""
+        return self.directory / f"results-{_file_label(kind)}.pickle"
+
+    def get(self, key, digest):
+        """Copies of the cached rows for key, or None on a miss"""
+        with self._lock:
+            self._load(key[0])
+            source = key[:2]
+            if self.digests.get(source, digest) != digest:
+                self.invalidate(source)
+            results = self.entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return [dict(row) for row in results]
+
+    def put(self, key, digest, results):
+        with self._lock:
+            if self.maxsize <= 0:
+                return
+            self._load(key[0])
+            self.digests[key[:2]] = digest
+            self.entries[key] = [dict(row) for row in results]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                evicted, _ = self.entries.popitem(last=False)
+                self._dirty.add(evicted[0])
+                self.evictions += 1
+            self._dirty.add(key[0])
+
+    def invalidate(self, source):
+        """Drop every entry of one (kind, name) source"""
+        with self._lock:
+            for key in [key for key in self.entries if key[:2] == source]:
+                del self.entries[key]
+            self.digests.pop(source, None)
+            self.invalidations += 1
+            self._dirty.add(source[0])
+
+    def clear(self):
+        """Forget every entry and reset the counters (the disk copies are reloaded on next use)"""
+        with self._lock:
+            self.entries.clear()
+            self.digests.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+            self._loaded.clear()
+            self._dirty.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "invalidations": self.invalidations, "size": len(self.entries), "maxsize": self.maxsize}
+
+    def _load(self, kind):
+        if self.directory is None or kind in self._loaded:
+            return
+        self._loaded.add(kind)
+        try:
+            with open(self.path(kind), 'rb') as f:
+                payload = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return
+        if isinstance(payload, dict) and payload.get("version") == INDEX_CACHE_VERSION:
+            digests = payload["digests"]
+            for source, digest in digests.items():
+                self.digests.setdefault(source, digest)
+            for key, results in payload["entries"]:
+                if self.digests.get(key[:2]) == digests.get(key[:2]):  # not superseded in memory
+                    self.entries.setdefault(key, results)
+
+    def save(self):
+        """Persist the kinds that changed when a directory is set; IO errors are ignored"""
+        with self._lock:
+            if self.directory is None:
+                return
+            for kind in sorted(self._dirty):
+                payload = {
+                    "version": INDEX_CACHE_VERSION,
+                    "digests": {source: digest for source, digest in self.digests.items() if source[0] == kind},
+                    "entries": [(key, results) for key, results in self.entries.items() if key[0] == kind],
+                }
+                try:
+                    _atomic_write(self.path(kind), lambda f: pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL))
+                except OSError:
+                    continue
+                self._dirty.discard(kind)
+
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_SIZE, INDEX_CACHE_DIR if RESULT_CACHE_DISK else None)
+if RESULT_CACHE_DISK:
+    atexit.register(RESULT_CACHE.save)
+
+_QUERY_TOKENIZER = BM25()
+
+
+def search_settings():
+    """Everything besides the CSVs and the dataset config that shapes search results.
+
+    Part of every result cache key, and of the design catalog's settings
+    (design_system.py), so neither serves answers computed under other settings.
+    """
+    return (BM25_K1, BM25_B, FUZZY_SEARCH, fuzzy.MIN_LENGTH, PROXIMITY_WEIGHT, PROXIMITY_SPAN, PROXIMITY_WINDOW)
+
+
+def result_cache_stats():
+    """Hit/miss/eviction/invalidation counters and size of the result cache"""
+    return RESULT_CACHE.stats()
+
+
+def _cached_search(kind, name, target, query, max_results, filters=None):
+    """_search_target() for a single query, answered from RESULT_CACHE when possible"""
+    with span("load index"):
+        digest = load_index(*_index_args(target)).fingerprint["sha256"]
+    with span("result cache"):
+        key = (kind, name, tuple(_QUERY_TOKENIZER.tokenize(query)),
+               tuple(tuple(_QUERY_TOKENIZER.tokenize(phrase)) for phrase in _PHRASE_RE.findall(query)), max_results,
+               tuple(sorted(parse_filters(filters))), (_index_key(*_index_args(target)), *search_settings()))
+        results = RESULT_CACHE.get(key, digest)
+    if results is None:
+        results = _search_target(target, [query], max_results, filters=filters)[0]
+        RESULT_CACHE.put(key, digest, results)
+    return results
+
+
+# ============ DATASET REGISTRY ============
+# name -> (data directory, CSV_CONFIG-style {domain: {"file", "search_cols",
+# "output_cols", "facets"?, "field_weights"?}}). Each skill registers its own
+# config at import time; the dict is kept by reference, so later edits show.
+DATASETS = {}
+
+
+def register_datasets(name, data_dir, config):
+    """Declare the domains of one skill; returns config"""
+    DATASETS[name] = (Path(data_dir), config)
+    _VOCABULARIES.pop(name, None)
+    return config
+
+
+def dataset_target(name, domain):
+    """Target for one domain of a registered dataset (KeyError when unknown)"""
+    data_dir, config = DATASETS[name]
+    entry = config[domain]
+    return Target(data_dir / entry["file"], entry["search_cols"], entry["output_cols"], entry["file"],
+                  entry.get("facets"), entry.get("field_weights"))
+
+
+def dataset_targets(name):
+    """(domain, Target) for every domain of a registered dataset, in declaration order"""
+    return [(domain, dataset_target(name, domain)) for domain in DATASETS[name][1]]
+
+
+# registry name -> frozenset: every token some domain of that dataset indexes.
+# Filled once per process (from vocabulary-<registry>.pickle when its stamp,
+# the index key, size and mtime_ns of each CSV, still matches) and dropped when
+# the registry is re-declared or one of its indexes is rebuilt, so a lookup
+# costs a few set probes and no stat calls.
+_VOCABULARIES = {}
+_VOCABULARY_LOCK = threading.Lock()
+
+
+def _vocabulary_path(name):
+    return INDEX_CACHE_DIR / f"vocabulary-{_file_label(name)}.pickle"
+
+
+def _vocabulary_stamp(targets):
+    stamp = []
+    for target in targets:
+        st = target.filepath.stat()
+        stamp.append((_index_key(*_index_args(target)), st.st_size, st.st_mtime_ns))
+    return tuple(stamp)
+
+
+def _read_vocabulary(name, stamp):
+    """The persisted vocabulary of one registry, or None when missing or stale"""
+    if not INDEX_CACHE_ENABLED:
+        return None
+    try:
+        with open(_vocabulary_path(name), 'rb') as f:
+            payload = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
+    if isinstance(payload, dict) and payload.get("version") == INDEX_CACHE_VERSION and payload.get("stamp") == stamp:
+        return payload["tokens"]
+    return None
+
+
+def _write_vocabulary(name, stamp, tokens):
+    if INDEX_CACHE_ENABLED:
+        payload = {"version": INDEX_CACHE_VERSION, "stamp": stamp, "tokens": tokens}
+        try:
+            _atomic_write(_vocabulary_path(name), lambda f: pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL))
+        except OSError:
+            pass
+
+
+def _forget_vocabularies(filepath):
+    """Drop the in-process vocabulary of every registry reading filepath (its index was just rebuilt)"""
+    for name in list(_VOCABULARIES):
+        if name not in DATASETS or any(target.filepath == filepath for _, target in dataset_targets(name)):
+            _VOCABULARIES.pop(name, None)
+
+
+def known_tokens(tokens):
+    """The subset of tokens that some domain of some registered dataset indexes (see SearchIndex.parse()).
+
+    Registries are consulted one at a time and only until every token is
+    accounted for. One without a usable vocabulary loads its domain indexes
+    one by one, stopping at the first that knows the remaining tokens; a full
+    pass over them also saves its vocabulary for later lookups and processes.
+    """
+    remaining = set(tokens)
+    with _VOCABULARY_LOCK:
+        for name in list(DATASETS):
+            if not remaining:
+                break
+            vocabulary = _VOCABULARIES.get(name)
+            if vocabulary is None:
+                targets = [target for _, target in dataset_targets(name) if target.filepath.exists()]
+                stamp = _vocabulary_stamp(targets)
+                vocabulary = _read_vocabulary(name, stamp)
+                if vocabulary is None:
+                    indexes = []
+                    for target in targets:
+                        indexes.append(load_index(*_index_args(target)))
+                        remaining = {token for token in remaining if token not in indexes[-1].bm25.doc_freqs}
+                        if not remaining:
+                            break
+                    if len(indexes) < len(targets):
+                        continue
+                    vocabulary = frozenset(token for index in indexes for token in index.bm25.doc_freqs)
+                    _write_vocabulary(name, stamp, vocabulary)
+                _VOCABULARIES[name] = vocabulary
+            remaining = {token for token in remaining if token not in vocabulary}
+    return set(tokens) - remaining
+
+
+def search_dataset(name, domain, query, max_results=MAX_RESULTS, filters=None):
+    """Best rows of one registered domain for query, answered from the result cache when possible.
+
+    Returns [] when the domain's CSV is missing; invalid filters raise FilterError.
+    """
+    target = dataset_target(name, domain)
+    if not target.filepath.exists():
+        return []
+    return _cached_search(name, domain, target, query, max_results, filters)
+
+
+# ============ KEYWORD MATCHING ============
+# Each skill routes queries to one of its domains by keyword hits
+# (detect_domain() in core.py, logo/cip core.py and slide_search_core.py).
+def _is_word_char(ch):
+    """Same character class as re's \\w for str patterns"""
+    return ch.isalnum() or ch == '_'
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over labelled keyword lists.
+
+    Built once, it finds every keyword occurrence (overlapping ones included)
+    in a single left-to-right scan. With word_boundary=True a hit must sit on
+    \\b boundaries on both sides, matching re.search(r'\\b' + re.escape(kw) + r'\\b');
+    with word_boundary=False it matches plain substrings (`kw in text`).
+    """
+
+    def __init__(self, keyword_groups, word_boundary=True):
+        self.labels = list(keyword_groups)
+        self.word_boundary = word_boundary
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for label, keywords in keyword_groups.items():
+            for kw in dict.fromkeys(kw.lower() for kw in keywords):
+                node = 0
+                for ch in kw:
+                    nxt = self._goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(self._goto)
+                        self._goto[node][ch] = nxt
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append([])
+                    node = nxt
+                self._out[node].append((len(kw), label, kw))
+
+        # Breadth-first failure links; each node inherits its fallback's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def _on_boundary(self, text, pos):
+        before = pos > 0 and _is_word_char(text[pos - 1])
+        after = pos < len(text) and _is_word_char(text[pos])
+        return before != after
+
+    def find(self, text):
+        """Return {label: {keyword, ...}} for every keyword present in text"""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        hits = {}
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, label, kw in out[node]:
+                if self.word_boundary and not (self._on_boundary(text, i + 1 - length) and self._on_boundary(text, i + 1)):
+                    continue
+                hits.setdefault(label, set()).add(kw)
+        return hits
+
+    def rank(self, text):
+        """Ranked distribution over labels: [(label, hits, share), ...], best first.
+
+        Only labels with at least one distinct keyword hit are listed; ties keep
+        the keyword_groups order, so rank(text)[0] is the classic argmax.
+        """
+        hits = self.find(text)
+        counts = [(label, len(hits[label])) for label in self.labels if label in hits]
+        total = sum(count for _, count in counts)
+        counts.sort(key=lambda item: -item[1])
+        return [(label, count, count / total) for label, count in counts]
+
+    def best(self, text, default=None):
+        """Label with the most distinct keyword hits in text (ties: keyword_groups order), or default"""
+        ranked = self.rank(text)
+        return ranked[0][0] if ranked else default
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Facets - bitmap filters over structured CSV columns
+
+A domain opts in by declaring "facets" in its CSV_CONFIG entry:
+
+    "facets": {
+        "category":   {"col": "Category", "type": "value"},        # exact, case-insensitive
+        "subset":     {"col": "Subsets", "type": "multi"},         # "latin | cyrillic"
+        "variable":   {"col": "Variable Axes", "type": "present"}, # non-empty -> yes
+        "popularity": {"col": "Popularity Rank", "type": "range", "numeric": True},
+    }
+
+Every value maps to a bitset (a Python int, bit i = row i), and range facets
+keep their keys sorted alongside prefix bitsets, so a filter set is resolved
+with a few bisects and bitwise ANDs before BM25 ranks the surviving rows.
+
+Filter syntax (CLI --filter, or search(..., filters=[...])):
+    key=value          value / multi / present facets; "a,b" means a OR b
+    key<=v  key>=v     range facets (also <, >); key=lo..hi is inclusive
+    key=v              on a range facet: exact value, or prefix for text keys
+                       (added=2021 matches every date in 2021)
+Repeating a key ANDs the conditions: subset=cyrillic subset=greek.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+
+_FILTER_RE = re.compile(r'^\s*([\w-]+)\s*(<=|>=|=|<|>)\s*(.*?)\s*$')
+_TRUE = {"yes", "true", "1", "y"}
+_FALSE = {"no", "false", "0", "n"}
+
+
+class FilterError(ValueError):
+    """Raised for unknown facet keys or malformed filter expressions"""
+
+
+def parse_filters(filters):
+    """Normalize filters to a list of (key, op, value).
+
+    Accepts "key=value" strings, a list of them, or a dict {key: value} where
+    value may carry an operator prefix ({"popularity": "<=200"}) or be a list
+    of values that are all required.
+    """
+    if not filters:
+        return []
+    if isinstance(filters, str):
+        filters = [filters]
+    elif not isinstance(filters, (dict, list, tuple)):
+        raise FilterError(f"Invalid filters: {filters!r} (expected key=value strings or an object)")
+    items = []
+    if isinstance(filters, dict):
+        for key, value in filters.items():
+            for v in (value if isinstance(value, (list, tuple)) else [value]):
+                v = str(v)
+                op = next((o for o in ("<=", ">=", "<", ">", "=") if v.startswith(o)), None)
+                items.append(f"{key}{v}" if op else f"{key}={v}")
+    else:
+        items = list(filters)
+
+    parsed = []
+    for item in items:
+        if isinstance(item, tuple) and len(item) == 3:  # already parsed
+            parsed.append(item)
+            continue
+        m = _FILTER_RE.match(str(item))
+        if not m:
+            raise FilterError(f"Invalid filter: {item!r} (expected key=value)")
+        parsed.append((m.group(1).lower(), m.group(2), m.group(3)))
+    return parsed
+
+
+def _multi_tokens(cell):
+    """'wdth: - | wght: -' -> ['wdth', 'wght']; 'latin | latin-ext' -> ['latin', 'latin-ext']"""
+    return [part.split(":", 1)[0].strip().lower() for part in str(cell or "").split("|") if part.strip()]
+
+
+class FacetIndex:
+    """Precomputed bitsets / sorted arrays for the facets of one CSV"""
+
+    def __init__(self, specs, data):
+        self.specs = specs
+        self.N = len(data)
+        self.all = (1 << self.N) - 1
+        self.values = {}   # facet -> {value: bitset}
+        self.ranges = {}   # facet -> (sorted keys, prefix bitsets)
+
+        for name, spec in specs.items():
+            col, kind = spec["col"], spec["type"]
+            if kind == "range":
+                keyed = []
+                for idx, row in enumerate(data):
+                    key = self._range_key(spec, row.get(col))
+                    if key is not None:
+                        keyed.append((key, idx))
+                keyed.sort()
+                prefix, bits = [0], 0
+                for _, idx in keyed:
+                    bits |= 1 << idx
+                    prefix.append(bits)
+                self.ranges[name] = ([key for key, _ in keyed], prefix)
+                continue
+
+            table = {}
+            for idx, row in enumerate(data):
+                cell = row.get(col) or ""
+                if kind == "multi":
+                    tokens = _multi_tokens(cell)
+                elif kind == "present":
+                    tokens = ["yes" if cell.strip() else "no"]
+                else:
+                    tokens = [cell.strip().lower()]
+                for token in tokens:
+                    table[token] = table.get(token, 0) | (1 << idx)
+            self.values[name] = table
+
+    @staticmethod
+    def _range_key(spec, value):
+        value = str(value or "").strip()
+        if not value:
+            return None
+        if spec.get("numeric"):
+            try:
+                return float(value)
+            except ValueError:
+                return None
+        return value
+
+    def get_state(self):
+        """Plain-builtin state for the on-disk index cache"""
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_state(cls, state):
+        facet_index = cls.__new__(cls)
+        facet_index.__dict__.update(state)
+        return facet_index
+
+    def _range_bits(self, name, op, raw):
+        spec = self.specs[name]
+        keys, prefix = self.ranges[name]
+        if op == "=" and ".." in raw:
+            lo, hi = (part.strip() for part in raw.split("..", 1))
+            return self._range_bits(name, ">=", lo) & self._range_bits(name, "<=", hi)
+
+        if spec.get("numeric"):
+            value = self._range_key(spec, raw)
+            if value is None:
+                raise FilterError(f"Filter {name} expects a number, got {raw!r}")
+            lo_key = hi_key = value
+        else:
+            # Text keys (ISO dates) compare as prefixes: "2021" covers 2021-xx-xx
+            lo_key, hi_key = raw, raw + "\uffff"
+
+        if op == "=":
+            return prefix[bisect_right(keys, hi_key)] & ~prefix[bisect_left(keys, lo_key)]
+        if op == "<=":
+            return prefix[bisect_right(keys, hi_key)]
+        if op == "<":
+            return prefix[bisect_left(keys, lo_key)]
+        # prefix[-1] is every row with a value; blank cells never match a range
+        if op == ">=":
+            return prefix[-1] & ~prefix[bisect_left(keys, lo_key)]
+        return prefix[-1] & ~prefix[bisect_right(keys, hi_key)]  # ">"
+
+    def _value_bits(self, name, op, raw):
+        if op != "=":
+            raise FilterError(f"Filter {name} only supports '='")
+        table = self.values[name]
+        bits = 0
+        for value in raw.split(","):
+            value = value.strip().lower()
+            if self.specs[name]["type"] == "present":
+                value = "yes" if value in _TRUE else "no" if value in _FALSE else value
+            bits |= table.get(value, 0)
+        return bits
+
+    def select(self, filters):
+        """Bitset of rows matching every filter (parsed or raw, see parse_filters)"""
+        bits = self.all
+        for name, op, raw in parse_filters(filters):
+            if name not in self.specs:
+                raise FilterError(f"Unknown filter: {name}. Available: {', '.join(self.specs)}")
+            if name in self.ranges:
+                bits &= self._range_bits(name, op, raw)
+            else:
+                bits &= self._value_bits(name, op, raw)
+            if not bits:
+                break
+        return bits
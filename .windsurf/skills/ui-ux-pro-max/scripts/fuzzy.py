@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Fuzzy Matching - trigram candidate index for misspelled query tokens
+
+A query token the BM25 vocabulary doesn't know ("glasmorphism", "dashbord")
+scores zero everywhere. TrigramIndex maps it to the nearest known token:
+
+    1. candidates share padded character trigrams with the token ("^gl", "gla",
+       ..., "sm$"); an edit touches at most 3 trigrams, so a word within k
+       edits shares at least len(token) - 3k of them, and everything below
+       that count is skipped without computing a distance;
+    2. the survivors are checked with a bounded optimal-string-alignment
+       distance (Levenshtein plus adjacent transpositions, "nuemorphism").
+
+The nearest candidate wins; ties go to the token found in more documents.
+"""
+
+from collections import defaultdict
+
+# Tokens shorter than this are never corrected ("ui", "cta", "rgb", but also
+# "chat" or "farm": one edit away from too many other real words)
+MIN_LENGTH = 6
+# Remembered corrections per index before the memo starts over
+MEMO_SIZE = 10000
+
+
+def max_edits(token):
+    """Edit budget for a token: none below MIN_LENGTH, 1 up to 7 characters, 2 beyond"""
+    if len(token) < MIN_LENGTH:
+        return 0
+    return 1 if len(token) <= 7 else 2
+
+
+def _trigrams(token):
+    padded = f"^{token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= limit else limit + 1
+
+
+class TrigramIndex:
+    """Trigram -> vocabulary token postings for one fitted BM25 vocabulary"""
+
+    def __init__(self, doc_freqs):
+        self.doc_freqs = doc_freqs  # token -> number of documents containing it
+        self.grams = defaultdict(list)
+        for token in doc_freqs:
+            if len(token) >= MIN_LENGTH - 1:
+                for gram in _trigrams(token):
+                    self.grams[gram].append(token)
+        self._memo = {}
+
+    def correct(self, token):
+        """Nearest known token within max_edits(token), or None"""
+        if token in self._memo:
+            return self._memo[token]
+        best = None
+        if len(token) >= MIN_LENGTH:
+            limit = max_edits(token)
+            grams = _trigrams(token)
+            shared = defaultdict(int)
+            for gram in grams:
+                for candidate in self.grams.get(gram, ()):
+                    shared[candidate] += 1
+            needed = len(grams) - 3 * limit
+            best_key = None
+            for candidate, count in shared.items():
+                if count < needed or abs(len(candidate) - len(token)) > limit:
+                    continue
+                distance = edit_distance(token, candidate, limit)
+                if distance > limit:
+                    continue
+                key = (distance, -self.doc_freqs[candidate], candidate)
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+        if len(self._memo) >= MEMO_SIZE:
+            self._memo.clear()
+        self._memo[token] = best
+        return best
+
+    def rewrite(self, tokens):
+        """tokens with every unknown one replaced by its correction (or dropped when none is close)"""
+        out = []
+        for token in tokens:
+            if token in self.doc_freqs:
+                out.append(token)
+            else:
+                fixed = self.correct(token)
+                if fixed is not None:
+                    out.append(fixed)
+        return out
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Positions - positional index for phrase and proximity queries
+
+Built from a fitted BM25 corpus (token lists per document). For each token
+three uint32 arrays are kept:
+
+    docs     documents containing the token, ascending
+    offsets  where each document's run starts in deltas
+    deltas   token positions, delta-encoded per document
+             (first position absolute, then gaps: 3, 7, 8 -> 3, 4, 1)
+
+so a token costs three array objects however often it occurs, and one
+document's positions are a bisect plus a short prefix sum away. The arrays are
+persisted with the rest of the index (get_state(), and the packed bundle
+sections in engine.py, which hand back views into the map), so a loaded
+index never re-walks its corpus.
+"""
+
+from array import array
+from bisect import bisect_left
+
+
+class PositionalIndex:
+    """Delta-encoded token positions for every document of one corpus"""
+
+    def __init__(self, corpus):
+        self.N = len(corpus)
+        self.tokens = {}  # token -> (docs, offsets, deltas)
+        for idx, doc in enumerate(corpus):
+            last = {}
+            for pos, word in enumerate(doc):
+                entry = self.tokens.get(word)
+                if entry is None:
+                    entry = self.tokens[word] = (array('I'), array('I'), array('I'))
+                docs, offsets, deltas = entry
+                prev = last.get(word)
+                if prev is None:
+                    docs.append(idx)
+                    offsets.append(len(deltas))
+                    deltas.append(pos)
+                else:
+                    deltas.append(pos - prev)
+                last[word] = pos
+
+    def get_state(self):
+        """Plain-builtin state for the on-disk index cache"""
+        return {"N": self.N, "tokens": self.tokens}
+
+    @classmethod
+    def from_state(cls, state):
+        """Index over get_state() output; tokens may map to any (docs, offsets, deltas) uint32 sequences"""
+        index = cls.__new__(cls)
+        index.N = state["N"]
+        index.tokens = state["tokens"]
+        return index
+
+    def positions(self, token, idx):
+        """Ascending positions of token in document idx ([] when absent)"""
+        entry = self.tokens.get(token)
+        if entry is None:
+            return []
+        docs, offsets, deltas = entry
+        i = bisect_left(docs, idx)
+        if i == len(docs) or docs[i] != idx:
+            return []
+        end = offsets[i + 1] if i + 1 < len(offsets) else len(deltas)
+        out, pos = [], 0
+        for delta in deltas[offsets[i]:end]:
+            pos += delta
+            out.append(pos)
+        return out
+
+    def phrase_docs(self, phrase):
+        """Bitset (bit i = document i) of documents containing the tokens of phrase consecutively"""
+        if not phrase or any(token not in self.tokens for token in phrase):
+            return 0
+        # Walk the rarest token's documents; every other token must line up with it
+        anchor = min(range(len(phrase)), key=lambda i: len(self.tokens[phrase[i]][0]))
+        bits = 0
+        for idx in self.tokens[phrase[anchor]][0]:
+            starts = {pos - anchor for pos in self.positions(phrase[anchor], idx)}
+            for offset, token in enumerate(phrase):
+                if offset != anchor and starts:
+                    starts &= {pos - offset for pos in self.positions(token, idx)}
+            if starts:
+                bits |= 1 << idx
+        return bits
+
+    def min_distance(self, a, b, idx):
+        """Smallest gap between an occurrence of a and one of b in document idx, or None"""
+        left, right = self.positions(a, idx), self.positions(b, idx)
+        if not left or not right:
+            return None
+        i = j = 0
+        best = None
+        while i < len(left) and j < len(right):
+            gap = abs(left[i] - right[j])
+            if best is None or gap < best:
+                best = gap
+            if left[i] < right[j]:
+                i += 1
+            else:
+                j += 1
+        return best
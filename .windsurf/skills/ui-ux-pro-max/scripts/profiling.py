@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Profiling - per-stage timing spans behind search.py --profile
+
+    with span("fit"):
+        bm25.fit(documents)
+
+Spans nest: each one adds its wall time and a call to a node under the
+enclosing span, and same-named siblings share a node, so a stage run once
+per query shows up once with its total. Nothing is recorded outside
+start()/stop(): span() then hands back one shared no-op context manager,
+so instrumented code pays a function call and nothing else.
+
+stop() returns the tree as plain dicts ({"name", "ms", "calls", "children"}).
+start() can also run cProfile and tracemalloc for the same stretch; stop()
+writes their stats/snapshot next to a given path prefix.
+"""
+
+import time
+
+
+class _Node:
+    """Accumulated time and calls of one stage under one parent"""
+
+    __slots__ = ("name", "seconds", "calls", "children")
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.children = {}  # name -> _Node, in first-seen order
+
+    def as_dict(self):
+        out = {"name": self.name, "ms": round(self.seconds * 1000, 3), "calls": self.calls}
+        if self.children:
+            out["children"] = [child.as_dict() for child in self.children.values()]
+        return out
+
+
+# Open nodes, the root first; empty when not recording
+_STACK = []
+# Optional collectors started alongside the root span
+_EXTRAS = {"profile": None, "tracemalloc": False, "start": 0.0}
+
+
+class _Span:
+    __slots__ = ("node", "start")
+
+    def __init__(self, name):
+        parent = _STACK[-1]
+        node = parent.children.get(name)
+        if node is None:
+            node = parent.children[name] = _Node(name)
+        self.node = node
+
+    def __enter__(self):
+        _STACK.append(self.node)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.node.seconds += time.perf_counter() - self.start
+        self.node.calls += 1
+        _STACK.pop()
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing one stage (a no-op unless profiling is active)"""
+    return _Span(name) if _STACK else _NULL_SPAN
+
+
+def active():
+    """True between start() and stop()"""
+    return bool(_STACK)
+
+
+def start(name="total", cprofile=False, trace_memory=False):
+    """Begin recording spans under a root named name, optionally with cProfile and tracemalloc"""
+    if _STACK:
+        raise RuntimeError("profiling is already active")
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+        _EXTRAS["tracemalloc"] = True
+    if cprofile:
+        import cProfile
+        _EXTRAS["profile"] = cProfile.Profile()
+        _EXTRAS["profile"].enable()
+    _STACK.append(_Node(name))
+    _EXTRAS["start"] = time.perf_counter()
+
+
+def stop(dump=None):
+    """Stop recording and return the timing tree.
+
+    With dump (a path prefix), cProfile stats are written to <dump>.prof
+    (for pstats/snakeviz) and the tracemalloc snapshot to <dump>.tracemalloc
+    (for tracemalloc.Snapshot.load); the tree lists the files under "dumps"
+    and, with tracemalloc, carries the traced "peak_kib".
+    """
+    if not _STACK:
+        raise RuntimeError("profiling is not active")
+    root = _STACK[0]
+    root.seconds = time.perf_counter() - _EXTRAS["start"]
+    root.calls = 1
+    _STACK.clear()
+    tree = root.as_dict()
+    dumps = []
+
+    profile, _EXTRAS["profile"] = _EXTRAS["profile"], None
+    if profile is not None:
+        profile.disable()
+        if dump:
+            profile.dump_stats(f"{dump}.prof")
+            dumps.append(f"{dump}.prof")
+    if _EXTRAS["tracemalloc"]:
+        import tracemalloc
+        _EXTRAS["tracemalloc"] = False
+        tree["peak_kib"] = tracemalloc.get_traced_memory()[1] // 1024
+        if dump:
+            tracemalloc.take_snapshot().dump(f"{dump}.tracemalloc")
+            dumps.append(f"{dump}.tracemalloc")
+        tracemalloc.stop()
+    if dumps:
+        tree["dumps"] = dumps
+    return tree
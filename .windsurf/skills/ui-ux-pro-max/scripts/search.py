@@ -6,6 +6,13 @@ Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-r
        python search.py "<query>" --design-system [-p "Project Name"]
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
        python search.py "<query>" --design-system --variance 8 --motion 9 --density 7
+       python search.py --design-system --batch projects.jsonl [-o <dir>] [--jobs N] [--json]
+       python search.py "<query>" --all [--max-results 5] [--per-domain 3]
+       python search.py --batch queries.jsonl [--domain <domain>] [--stack <stack>] [-n 3]
+       python search.py --serve [--socket <path>]
+       python search.py --build-data [--bundle <path>] [--jobs N]
+       python search.py --build-catalog [--catalog <path>]
+       python search.py "<query>" [...] --profile [--profile-dump <prefix>]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography, google-fonts, gsap
 Stacks: react, nextjs, vue, svelte, astro, swiftui, react-native, flutter, nuxtjs, nuxt-ui, html-tailwind, shadcn, jetpack-compose, threejs, angular, laravel, javafx, wpf, winui, avalonia, uno, uwp
@@ -16,15 +23,69 @@ Design dials (1-10, only with --design-system):
   --density    VISUAL_DENSITY: 1=spacious, 10=dense/dashboard; overrides the spacing scale
 
 Persistence (Master + Overrides pattern):
-  --persist    Save design system to design-system/MASTER.md
+  --persist    Save design system to design-system/MASTER.md (unchanged files are not rewritten;
+               manifest.json records file and source CSV hashes)
   --page       Also create a page-specific override file in design-system/pages/
+
+Bulk design systems (--design-system --batch, always persisted):
+  --batch      JSONL file ("-" for stdin); each line is a query string or an object
+               {"query": ..., "project_name"?: ..., "variance"?/"motion"?/"density"?: 1-10,
+                "pages"?: ["dashboard", {"name": "checkout", "query": "..."}]}.
+               Projects run across --jobs worker processes (default: CPU count) sharing
+               one prebuilt set of indexes; each gets design-system/<project>/MASTER.md
+               plus its page files under --output-dir. Prints a per-project summary
+               with timings (--json for the raw summary); exits 1 if any project failed.
+
+Search everything (one merged index over every domain and stack):
+  --all        Best rows overall, each tagged with its domain, plus the top
+               --per-domain rows of every domain/stack that matched.
+
+Batch mode (one process, each index built once):
+  --batch      JSONL file ("-" for stdin); each line is a query string or an object
+               {"query": ..., "domain"?: ..., "stack"?: ..., "max_results"?: ..., "id"?: ...}.
+               Streams one NDJSON result per input line, in input order.
+
+Resident daemon (keeps every index warm, reloads CSVs that change on disk):
+  --serve      Listen on a Unix socket; later search.py calls use it automatically
+               and fall back to in-process search when it isn't running.
+  --socket     Socket path (default: $UIPRO_SOCKET or <tmp>/uipro-search-<uid>.sock)
+               Set UIPRO_DAEMON=0 to bypass a running daemon.
+
+Data bundle (every index compiled ahead of time into one memory-mapped file):
+  --build-data Write data/data.bundle (or --bundle / $UIPRO_BUNDLE) with the logo, cip
+               and slide indexes of the sibling skills too; later searches
+               load indexes from it and skip CSV parsing. Rebuild after editing CSVs;
+               sections whose CSV changed are ignored until then. Cold indexes are
+               built by --jobs worker processes (default: CPU count).
+
+Design catalog (--design-system answers precomputed per product category):
+  --build-catalog
+               Run --design-system for every products.csv Product Type under every
+               dial tier combination and write data/design.catalog (or --catalog /
+               $UIPRO_CATALOG). A --design-system query that is exactly a Product
+               Type is then answered from it without loading any index; other
+               queries, and every query once a source CSV changes, search live.
+
+Profiling (runs in-process, bypassing the daemon):
+  --profile    After the normal output, print a JSON timing tree to stderr: wall
+               time and call count per stage (index lookup/build, CSV read,
+               tokenize, fit, parse, rank, rerank, reasoning, formatting ...).
+  --profile-dump
+               Also run cProfile and tracemalloc and write <prefix>.prof and
+               <prefix>.tracemalloc next to the tree.
 """
 
 import argparse
+import json
+import os
 import sys
 import io
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system, safe_slug
+from itertools import islice
+import daemon
+import profiling
+from profiling import span
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, build_bundle, search, search_stack, search_many, search_all
+from engine import BUNDLE_PATH
 
 # Force UTF-8 for stdout/stderr to handle emojis on Windows (cp1252 default)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
@@ -59,13 +120,97 @@ def format_output(result):
     return "\n".join(output)
 
 
+def format_output_all(result):
+    """Format search_all() results: global best rows, then a per-domain digest"""
+    output = ["## UI Pro Max Search Results (all domains)"]
+    output.append(f"**Query:** {result['query']} | **Found:** {result['count']} results\n")
+
+    for i, hit in enumerate(result['results'], 1):
+        source = f"stack:{hit['stack']}" if hit.get("stack") else hit['domain']
+        output.append(f"### Result {i} ({source}, {hit['file']}, score {hit['score']})")
+        for key, value in hit['row'].items():
+            value_str = str(value)
+            if len(value_str) > 300:
+                value_str = value_str[:300] + "..."
+            output.append(f"- **{key}:** {value_str}")
+        output.append("")
+
+    if result['domains']:
+        output.append("### Per Domain")
+        for label, group in result['domains'].items():
+            # First output column names the row (style name, product type, ...)
+            names = [str(next(iter(row.values()), "")) for row in group['results']]
+            output.append(f"- **{label}** ({group['file']}): {'; '.join(names)}")
+
+    return "\n".join(output)
+
+
+BATCH_CHUNK = 1000
+
+
+def via_daemon(params, socket_path, local):
+    """Answer through the search daemon when one is running, else call local().
+
+    While profiling, always answer locally so the stages can be timed. An
+    error reported by the daemon (bad parameters, a failed write) ends the
+    run with its message, as the same error would in-process.
+    """
+    try:
+        result = None if profiling.active() else daemon.request(params, socket_path)
+    except RuntimeError as e:
+        sys.exit(f"Error: {e}")
+    return local() if result is None else result
+
+
+def run_batch(lines, domain=None, stack=None, max_results=MAX_RESULTS, out=sys.stdout):
+    """Answer a JSONL stream of queries with one NDJSON result line each.
+
+    Lines are read BATCH_CHUNK at a time; blank lines are skipped and
+    malformed lines produce an error record in their position.
+    """
+    lines = iter(lines)
+    lineno = 0
+    while True:
+        chunk = list(islice(lines, BATCH_CHUNK))
+        if not chunk:
+            return
+        queries, slots = [], []
+        for raw in chunk:
+            lineno += 1
+            if not raw.strip():
+                continue
+            try:
+                queries.append(json.loads(raw))
+                slots.append(None)
+            except json.JSONDecodeError as e:
+                slots.append({"error": f"Invalid JSON on line {lineno}: {e.msg}", "line": lineno})
+        results = iter(search_many(queries, domain, max_results, stack=stack))
+        for slot in slots:
+            out.write(json.dumps(slot or next(results), ensure_ascii=False) + "\n")
+        out.flush()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help=f"Stack-specific search. Available: {', '.join(AVAILABLE_STACKS)}")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--all", action="store_true", help="Search every domain and stack in one pass")
+    parser.add_argument("--per-domain", type=int, default=MAX_RESULTS, help="Rows per domain/stack with --all (default: 3)")
+    parser.add_argument("--filter", action="append", default=None, metavar="KEY=VALUE", help="Facet filter for google-fonts, repeatable (e.g. subset=cyrillic, category=serif, variable=yes, popularity<=200, added>=2020)")
+    parser.add_argument("--batch", type=str, default=None, metavar="FILE", help="Run every query in a JSONL file ('-' for stdin), streaming NDJSON results; with --design-system, generate every project in it")
+    # Resident daemon
+    parser.add_argument("--serve", action="store_true", help="Run the search daemon (keeps indexes warm, answers over a Unix socket)")
+    parser.add_argument("--socket", type=str, default=daemon.SOCKET_PATH, help="Daemon socket path")
+    # Ahead-of-time data bundle
+    parser.add_argument("--build-data", action="store_true", help="Compile every domain/stack index, plus the logo/cip/slide ones, into one memory-mapped bundle")
+    parser.add_argument("--bundle", type=str, default=str(BUNDLE_PATH), help="Bundle path for --build-data")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes for cold index builds and --design-system --batch (default: CPU count)")
+    # Precomputed design-system catalog
+    parser.add_argument("--build-catalog", action="store_true", help="Precompute --design-system for every product category and dial tier")
+    parser.add_argument("--catalog", type=str, default=None, help="Catalog path for --build-catalog (default: $UIPRO_CATALOG or data/design.catalog)")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
@@ -78,26 +223,90 @@ if __name__ == "__main__":
     parser.add_argument("--variance", type=int, choices=range(1, 11), metavar="1-10", help="DESIGN_VARIANCE dial: 1=centered/minimal, 10=bold/asymmetric (only with --design-system)")
     parser.add_argument("--motion", type=int, choices=range(1, 11), metavar="1-10", help="MOTION_INTENSITY dial: 1=subtle, 10=complex; pulls a matching GSAP snippet from motion.csv (only with --design-system)")
     parser.add_argument("--density", type=int, choices=range(1, 11), metavar="1-10", help="VISUAL_DENSITY dial: 1=spacious, 10=dense/dashboard; overrides the spacing scale (only with --design-system)")
+    # Profiling
+    parser.add_argument("--profile", action="store_true", help="Print a JSON per-stage timing tree to stderr")
+    parser.add_argument("--profile-dump", type=str, default=None, metavar="PREFIX", help="With profiling, also write PREFIX.prof (cProfile) and PREFIX.tracemalloc")
 
     args = parser.parse_args()
+    if args.batch is None and args.query is None and not (args.serve or args.build_data or args.build_catalog):
+        parser.error("a query is required unless --batch, --serve, --build-data or --build-catalog is given")
+    exit_code = 0
+    if args.profile or args.profile_dump:
+        profiling.start("search.py", cprofile=bool(args.profile_dump), trace_memory=bool(args.profile_dump))
 
+    if args.build_data:
+        try:
+            sections = build_bundle(args.bundle, args.jobs)
+        except OSError as e:
+            parser.exit(1, f"Error: cannot write {args.bundle}: {e}\n")
+        print(f"{'index':<22}{'source':>8}{'ms':>9}{'rows':>7}{'terms':>7}{'KiB':>9}")
+        for entry in sections:
+            print(f"{entry['label']:<22}{entry['source']:>8}{entry['seconds'] * 1000:>9.1f}{entry['rows']:>7}"
+                  f"{entry['terms']:>7}{entry['bytes'] / 1024:>9.1f}")
+        print(f"\nWrote {len(sections)} indexes to {args.bundle}")
+    elif args.build_catalog:
+        from design_system import CATALOG_PATH, build_catalog
+        try:
+            report = build_catalog(args.catalog)
+        except OSError as e:
+            parser.exit(1, f"Error: cannot write {args.catalog or CATALOG_PATH}: {e}\n")
+        print(f"Wrote {report['systems']} design systems ({report['categories']} categories, "
+              f"{report['sections']} distinct sections, {report['bytes'] / 1024:.1f} KiB) "
+              f"to {report['path']} in {report['ms'] / 1000:.1f}s")
+    elif args.serve:
+        try:
+            daemon.serve(args.socket)
+        except RuntimeError as e:
+            parser.exit(1, f"Error: {e}\n")
+    # Batch mode: many queries, one process
+    elif args.batch and not args.design_system:
+        if args.batch == "-":
+            run_batch(sys.stdin, args.domain, args.stack, args.max_results)
+        else:
+            with open(args.batch, 'r', encoding='utf-8') as f:
+                run_batch(f, args.domain, args.stack, args.max_results)
+    # Bulk design systems: many projects, one worker pool
+    elif args.batch:
+        from design_system import format_batch_summary, generate_batch, read_projects
+        if args.batch == "-":
+            projects = read_projects(sys.stdin)
+        else:
+            with open(args.batch, 'r', encoding='utf-8') as f:
+                projects = read_projects(f)
+        summary = generate_batch(projects, args.output_dir, args.jobs)
+        if args.json:
+            print(json.dumps(summary, indent=2, ensure_ascii=False))
+        else:
+            print(format_batch_summary(summary))
+        exit_code = 1 if summary["failed"] else 0
     # Design system takes priority
-    if args.design_system:
-        result = generate_design_system(
-            args.query,
-            args.project_name,
-            args.format,
-            persist=args.persist,
-            page=args.page,
-            output_dir=args.output_dir,
-            variance=args.variance,
-            motion=args.motion,
-            density=args.density
-        )
+    elif args.design_system:
+        options = {
+            "persist": args.persist,
+            "page": args.page,
+            "output_dir": args.output_dir,
+            "variance": args.variance,
+            "motion": args.motion,
+            "density": args.density,
+        }
+
+        def generate_locally():
+            from design_system import generate_design_system
+            try:
+                return generate_design_system(args.query, args.project_name, args.format, **options)
+            except OSError as e:  # --persist could not write
+                parser.exit(1, f"Error: {e}\n")
+
+        # The daemon may run in another directory, so hand it an absolute output dir
+        result = via_daemon({
+            "op": "design_system", "query": args.query, "project_name": args.project_name, "format": args.format,
+            **options, "output_dir": os.path.abspath(args.output_dir or os.getcwd()),
+        }, args.socket, generate_locally)
         print(result)
         
         # Print persistence confirmation
         if args.persist:
+            from design_system import safe_slug
             project_slug = safe_slug(args.project_name or args.query.upper())
             print("\n" + "=" * 60)
             print(f"✅ Design system persisted to design-system/{project_slug}/")
@@ -105,23 +314,42 @@ if __name__ == "__main__":
             if args.page:
                 page_filename = safe_slug(args.page, 'page')
                 print(f"   📄 design-system/{project_slug}/pages/{page_filename}.md (Page Overrides)")
+            print(f"   📄 design-system/{project_slug}/manifest.json (File and source CSV hashes)")
             print("")
             print(f"📖 Usage: When building a page, check design-system/{project_slug}/pages/[page].md first.")
             print(f"   If exists, its rules override MASTER.md. Otherwise, use MASTER.md.")
             print("=" * 60)
+    # Every domain and stack at once
+    elif args.all:
+        with span("search all"):
+            result = via_daemon({"op": "search_all", "query": args.query, "max_results": args.max_results, "per_domain": args.per_domain},
+                                args.socket, lambda: search_all(args.query, args.max_results, args.per_domain))
+        with span("format"):
+            if args.json:
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                print(format_output_all(result))
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        with span("search stack"):
+            result = via_daemon({"op": "search_stack", "query": args.query, "stack": args.stack, "max_results": args.max_results},
+                                args.socket, lambda: search_stack(args.query, args.stack, args.max_results))
+        with span("format"):
+            if args.json:
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        with span("search"):
+            result = via_daemon({"op": "search", "query": args.query, "domain": args.domain, "max_results": args.max_results, "filters": args.filter},
+                                args.socket, lambda: search(args.query, args.domain, args.max_results, args.filter))
+        with span("format"):
+            if args.json:
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                print(format_output(result))
+
+    if profiling.active():
+        print(json.dumps(profiling.stop(args.profile_dump), indent=2), file=sys.stderr)
+    sys.exit(exit_code)
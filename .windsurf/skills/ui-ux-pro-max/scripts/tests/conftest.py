@@ -0,0 +1,26 @@
+"""Shared fixtures for the ui-ux-pro-max script tests."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import core
+import design_system
+import engine
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Point the on-disk index cache, data bundle and design catalog at a temp dir and start cold."""
+    monkeypatch.setattr(engine, "INDEX_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(engine, "INDEX_CACHE_ENABLED", True)
+    monkeypatch.setattr(engine, "BUNDLE_PATH", tmp_path / "data.bundle")
+    monkeypatch.setattr(design_system, "CATALOG_PATH", tmp_path / "design.catalog")
+    core.clear_index_cache()
+    engine._close_bundle()
+    yield
+    core.clear_index_cache()
+    engine._close_bundle()
@@ -0,0 +1,645 @@
+"""Tests for core.py (BM25 search engine and index cache)."""
+
+import csv
+import os
+import pickle
+import sys
+from itertools import chain
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import core
+import engine
+import benchmark
+from benchmark import QUERIES, datasets, naive_rank
+
+
+CSV_TEXT = (
+    "Name,Keywords,Notes\n"
+    "Glassmorphism,frosted glass blur,translucent layers\n"
+    "Brutalism,raw bold stark,high contrast\n"
+    "Minimalism,clean simple whitespace,less is more\n"
+)
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    path = tmp_path / "sample.csv"
+    path.write_text(CSV_TEXT, encoding="utf-8")
+    return path
+
+
+def _search(path, query, n=3):
+    return engine._search_csv(path, ["Name", "Keywords"], ["Name", "Notes"], query, n)
+
+
+class TestIndexCache:
+    """The compiled index is persisted and reused until the CSV changes."""
+
+    def test_warm_query_skips_build(self, sample_csv, monkeypatch):
+        cold = _search(sample_csv, "glass")
+        assert cold == [{"Name": "Glassmorphism", "Notes": "translucent layers"}]
+        assert list(engine.INDEX_CACHE_DIR.glob("*.pickle"))
+
+        core.clear_index_cache()  # drop the in-process tier, keep the disk tier
+        monkeypatch.setattr(engine, "_build_index", lambda *a: pytest.fail("index was rebuilt"))
+        assert _search(sample_csv, "glass") == cold
+
+    def test_edited_csv_rebuilds(self, sample_csv):
+        assert _search(sample_csv, "neon") == []
+        sample_csv.write_text(CSV_TEXT + "Cyberpunk,neon glow,dark futuristic\n", encoding="utf-8")
+        assert _search(sample_csv, "neon") == [{"Name": "Cyberpunk", "Notes": "dark futuristic"}]
+
+    def test_touched_but_unchanged_csv_is_reused(self, sample_csv, monkeypatch):
+        _search(sample_csv, "glass")
+        st = sample_csv.stat()
+        os.utime(sample_csv, ns=(st.st_atime_ns, st.st_mtime_ns + 5_000_000_000))
+        core.clear_index_cache()
+        monkeypatch.setattr(engine, "_build_index", lambda *a: pytest.fail("index was rebuilt"))
+        assert _search(sample_csv, "brutalism")[0]["Name"] == "Brutalism"
+
+    def test_results_are_copies(self, sample_csv):
+        _search(sample_csv, "glass")[0]["Name"] = "mutated"
+        assert _search(sample_csv, "glass")[0]["Name"] == "Glassmorphism"
+
+    def test_disabled_cache_writes_nothing(self, sample_csv, monkeypatch):
+        monkeypatch.setattr(engine, "INDEX_CACHE_ENABLED", False)
+        _search(sample_csv, "glass")
+        assert not engine.INDEX_CACHE_DIR.exists()
+
+
+class TestResultCache:
+    """search() answers repeat queries from an LRU that tracks CSV changes."""
+
+    @pytest.fixture
+    def sample_domain(self, sample_csv, monkeypatch):
+        # An absolute "file" makes DATA_DIR / file the temp CSV
+        monkeypatch.setitem(core.CSV_CONFIG, "sample", {
+            "file": str(sample_csv), "search_cols": ["Name", "Keywords"], "output_cols": ["Name", "Notes"]})
+        return sample_csv
+
+    def test_normalized_repeat_is_a_hit(self, sample_domain, monkeypatch):
+        first = core.search("frosted glass", "sample")
+        monkeypatch.setattr(engine, "_search_target", lambda *a, **kw: pytest.fail("searched again"))
+        again = core.search("Frosted, GLASS!", "sample")
+        assert again["results"] == first["results"]
+        assert again["query"] == "Frosted, GLASS!"
+        assert engine.result_cache_stats()["hits"] == 1
+        assert engine.result_cache_stats()["misses"] == 1
+        again["results"][0]["Name"] = "mutated"
+        assert core.search("frosted glass", "sample")["results"] == first["results"]
+
+    def test_csv_change_evicts_domain(self, sample_domain):
+        assert core.search("neon", "sample")["count"] == 0
+        core.search("glass", "style")
+        sample_domain.write_text(CSV_TEXT + "Cyberpunk,neon glow,dark futuristic\n", encoding="utf-8")
+        assert core.search("neon", "sample")["results"] == [{"Name": "Cyberpunk", "Notes": "dark futuristic"}]
+        stats = engine.result_cache_stats()
+        assert stats["invalidations"] == 1
+        assert stats["size"] == 2  # the style entry survived
+
+    def test_lru_eviction(self):
+        cache = engine.ResultCache(2)
+        for n in range(3):
+            cache.put(("domain", "d", (str(n),), (), 3, ()), "sha", [{"n": n}])
+        assert cache.get(("domain", "d", ("0",), (), 3, ()), "sha") is None
+        assert cache.get(("domain", "d", ("2",), (), 3, ()), "sha") == [{"n": 2}]
+        assert cache.stats()["evictions"] == 1
+
+    def test_disk_tier(self, tmp_path):
+        key = ("stack", "react", ("memo",), (), 3, ())
+        cache = engine.ResultCache(8, tmp_path)
+        cache.put(key, "sha", [{"Guideline": "memo"}])
+        cache.save()
+        reloaded = engine.ResultCache(8, tmp_path)
+        assert reloaded.get(key, "sha") == [{"Guideline": "memo"}]
+        assert reloaded.get(key, "other-sha") is None
+
+    def test_disk_tier_is_split_per_registry(self, tmp_path):
+        ui, logo = ("ui-ux-pro-max", "style", ("dark",), (), 3, ()), ("logo", "style", ("dark",), (), 3, ())
+        first, second = engine.ResultCache(8, tmp_path), engine.ResultCache(8, tmp_path)
+        first.put(ui, "sha", [{"n": 1}])
+        second.put(logo, "sha", [{"n": 2}])
+        first.save()
+        second.save()  # last writer no longer drops the other skill's entries
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["results-logo.pickle", "results-ui-ux-pro-max.pickle"]
+        reloaded = engine.ResultCache(8, tmp_path)
+        assert reloaded.get(ui, "sha") == [{"n": 1}] and reloaded.get(logo, "sha") == [{"n": 2}]
+
+    @pytest.mark.parametrize("setting,value", [("FUZZY_SEARCH", False), ("PROXIMITY_WEIGHT", 0), ("BM25_K1", 1.2)])
+    def test_other_engine_settings_miss(self, setting, value, monkeypatch):
+        core.search("glasmorphism dark", "style")
+        monkeypatch.setattr(engine, setting, value)
+        monkeypatch.setattr(engine, "_search_target", lambda *a, **kw: [[{"fresh": True}]])
+        assert core.search("glasmorphism dark", "style")["results"] == [{"fresh": True}]
+
+
+class TestIncrementalIndex:
+    """Changed rows are spliced into the previous index instead of refitting."""
+
+    DOCS = ["alpha beta", "beta gamma gamma", "delta", "alpha epsilon zeta", "gamma"]
+
+    @pytest.mark.parametrize("start,stop,new", [
+        (5, 5, ["omega alpha"]),             # append
+        (1, 2, ["beta beta omega"]),         # edit
+        (2, 2, ["new row", "another one"]),  # insert
+        (0, 2, []),                          # delete
+        (0, 5, ["only"]),                    # replace everything
+    ])
+    def test_splice_matches_fit(self, start, stop, new):
+        base = engine.BM25()
+        base.fit(self.DOCS)
+        before = base.get_state()
+        expected = engine.BM25()
+        expected.fit(self.DOCS[:start] + new + self.DOCS[stop:])
+        assert base.splice(start, stop, new).get_state() == expected.get_state()
+        assert base.get_state() == before
+
+    def test_changed_span(self):
+        assert engine._changed_span("abcd", "abcd") == (4, 4, 4)
+        assert engine._changed_span("abcd", "abcde") == (4, 4, 5)
+        assert engine._changed_span("abcd", "aXcd") == (1, 2, 2)
+        assert engine._changed_span("abcd", "acd") == (1, 2, 1)
+        assert engine._changed_span("aaa", "aa") == (2, 3, 2)
+
+    def test_appended_row_is_spliced(self, sample_csv, monkeypatch):
+        _search(sample_csv, "glass")
+        sample_csv.write_text(CSV_TEXT + "Cyberpunk,neon glow,dark futuristic\n", encoding="utf-8")
+        core.clear_index_cache()  # the stale disk cache seeds the rebuild
+        monkeypatch.setattr(engine.BM25, "fit", lambda *a: pytest.fail("index was refitted"))
+        assert _search(sample_csv, "neon") == [{"Name": "Cyberpunk", "Notes": "dark futuristic"}]
+        assert _search(sample_csv, "glass")[0]["Name"] == "Glassmorphism"
+
+    def test_weighted_index_refits_in_full(self, sample_csv, monkeypatch):
+        # BM25F field averages move with every row, so there is nothing to splice into
+        args = (sample_csv, ["Name", "Keywords"], ["Name", "Notes"], None, {"Name": 3.0})
+        engine.load_index(*args)
+        sample_csv.write_text(CSV_TEXT + "Cyberpunk,neon glow,dark futuristic\n", encoding="utf-8")
+        core.clear_index_cache()  # the stale disk cache still reaches _build_index as previous
+        fits, previous = [], []
+        fit, build = engine.BM25F.fit, engine._build_index
+        monkeypatch.setattr(engine.BM25, "splice", lambda *a: pytest.fail("weighted index was spliced"))
+        monkeypatch.setattr(engine.BM25F, "fit", lambda self, corpus: fits.append(len(corpus)) or fit(self, corpus))
+        monkeypatch.setattr(engine, "_build_index", lambda *a: previous.append(a[-1]) or build(*a))
+        index = engine.load_index(*args)
+        assert isinstance(previous[0].bm25, engine.BM25F) and fits == [4]
+        assert isinstance(index.bm25, engine.BM25F)
+        assert index.bm25.get_state() == build(*args).bm25.get_state()
+
+
+class TestRowStore:
+    """Rows live in interned per-column lists; only returned hits become dicts."""
+
+    def test_matches_dict_reader(self, sample_csv):
+        import csv
+        with open(sample_csv, encoding="utf-8") as f:
+            expected = list(csv.DictReader(f))
+        store = engine.RowStore.from_csv(sample_csv)
+        assert len(store) == len(expected)
+        assert [dict(record) for record in store] == expected
+        assert [store.as_dict(idx) for idx in range(len(store))] == expected
+        assert store[0].get("Missing", "") == ""
+        with pytest.raises(IndexError):
+            store[len(store)]
+
+    def test_index_keeps_only_output_columns(self, sample_csv):
+        index = core.load_index(sample_csv, ["Name", "Keywords"], ["Name", "Notes", "Missing"])
+        assert index.rows.columns == ("Name", "Notes")
+
+    def test_repeated_cells_are_shared(self):
+        index = core.load_index(*engine._index_args(core._domain_target("google-fonts")))
+        categories = index.rows.column("Category")
+        assert len({id(cell) for cell in categories}) == len(set(categories))
+
+
+class TestBuildIndexes:
+    """build_indexes() warms every source, building cold ones in a process pool."""
+
+    TARGETS = [(name, core._domain_target(name)) for name in ("color", "chart", "landing")]
+
+    def test_parallel_build_matches_serial(self):
+        report = core.build_indexes(self.TARGETS, workers=2)
+        assert [entry["label"] for entry in report] == ["color", "chart", "landing"]
+        assert {entry["source"] for entry in report} == {"built"}
+        assert all(entry["rows"] > 0 and entry["terms"] > 0 and entry["seconds"] >= 0 for entry in report)
+        parallel = {label: core.load_index(*engine._index_args(target)) for label, target in self.TARGETS}
+        core.clear_index_cache(disk=True)
+        core.build_indexes(self.TARGETS, workers=1)
+        for label, target in self.TARGETS:
+            serial = core.load_index(*engine._index_args(target))
+            assert serial.bm25.get_state() == parallel[label].bm25.get_state()
+            assert serial.rows.get_state() == parallel[label].rows.get_state()
+
+    def test_ready_indexes_are_not_rebuilt(self, monkeypatch):
+        core.build_indexes(self.TARGETS, workers=1)
+        monkeypatch.setattr(engine, "_build_index", lambda *a: pytest.fail("index was rebuilt"))
+        assert {entry["source"] for entry in core.build_indexes(self.TARGETS)} == {"memory"}
+        core.clear_index_cache()
+        assert {entry["source"] for entry in core.build_indexes(self.TARGETS)} == {"cache"}
+
+
+class TestDataBundle:
+    """build_bundle() compiles every index into one mmap-loaded file."""
+
+    def test_searches_load_from_bundle(self, monkeypatch):
+        expected = core.search("glassmorphism dark", "style")
+        sections = core.build_bundle()
+        assert {entry["label"] for entry in sections} == {label for label, _ in chain(core._unified_sources(), core._skill_sources())}
+        assert all(entry["bytes"] > 0 for entry in sections)
+        core.clear_index_cache(disk=True)
+        monkeypatch.setattr(engine, "_build_index", lambda *a: pytest.fail("index was rebuilt"))
+        monkeypatch.setattr(engine, "_read_cached_index", lambda *a: pytest.fail("cache file was read"))
+        assert core.search("glassmorphism dark", "style") == expected
+        assert core.search_stack("memo rerender", "react")["count"] > 0
+
+    def test_other_skills_are_bundled(self, monkeypatch):
+        labels = {entry["label"] for entry in core.build_bundle()}
+        assert {"logo:style", "cip:deliverable", "slides:strategy"} <= labels
+        core.clear_index_cache(disk=True)
+        monkeypatch.setattr(engine, "_build_index", lambda *a: pytest.fail("index was rebuilt"))
+        for name, domain in [("logo", "style"), ("cip", "deliverable"), ("slides", "strategy")]:
+            index = engine.load_index(*engine._index_args(engine.dataset_target(name, domain)))
+            assert isinstance(index.bm25.postings, engine._PackedPostings)
+
+    @pytest.mark.parametrize("domain", ["style", "google-fonts", "product"])
+    def test_packed_sections_equal_built_indexes(self, domain):
+        core.build_bundle()
+        args = engine._index_args(core._domain_target(domain))
+        packed = engine._read_bundled_index(engine._index_key(*args))
+        built = engine._build_index(*args)
+        assert isinstance(packed.bm25.postings, engine._PackedPostings)
+        assert packed.bm25.get_state() == built.bm25.get_state()
+        assert packed.rows.get_state() == built.rows.get_state() and packed.row_hashes == built.row_hashes
+        assert packed.top_k_batch(QUERIES, 5) == built.top_k_batch(QUERIES, 5)
+        assert engine._index_from_payload(pickle.loads(pickle.dumps(engine._index_payload(packed)))) is not None
+
+    def test_stale_or_foreign_bundle_is_ignored(self, monkeypatch):
+        core.build_bundle()
+        core.clear_index_cache(disk=True)
+        args = engine._index_args(core._domain_target("color"))
+        build, builds = engine._build_index, []
+        monkeypatch.setattr(engine, "_build_index", lambda *a: builds.append(a) or build(*a))
+        monkeypatch.setattr(engine, "_is_fresh", lambda *a: False)
+        core.load_index(*args)
+        assert len(builds) == 1
+        monkeypatch.setattr(engine, "INDEX_CACHE_VERSION", engine.INDEX_CACHE_VERSION + 1)
+        engine._close_bundle()
+        assert engine._read_bundled_index(engine._index_key(*args)) is None
+
+    def test_corrupt_bundle_is_ignored(self):
+        engine.BUNDLE_PATH.write_bytes(b"not a bundle")
+        assert engine._open_bundle() is None
+        assert core.search("glassmorphism", "style")["count"] > 0
+
+
+def test_search_returns_envelope():
+    result = core.search("glassmorphism", "style", 1)
+    assert result["domain"] == "style"
+    assert result["count"] == 1
+    assert "Glassmorphism" in result["results"][0]["Style Category"]
+
+
+class TestInvertedIndex:
+    """The postings-based scorer is a drop-in for the exhaustive BM25 loop."""
+
+    @pytest.mark.parametrize("name,filepath,search_cols,output_cols", list(datasets()))
+    def test_rankings_match_exhaustive_loop(self, name, filepath, search_cols, output_cols):
+        bm25 = core.load_index(filepath, search_cols, output_cols).bm25
+        for query in QUERIES:
+            expected = naive_rank(bm25, query)
+            assert bm25.score(query) == expected
+            assert bm25.top_k(query, 5) == [(i, s) for i, s in expected[:5] if s > 0]
+
+    def test_ties_keep_document_order(self):
+        bm25 = engine.BM25()
+        bm25.fit(["alpha beta", "gamma delta", "alpha beta", "alpha beta"])
+        assert [idx for idx, _ in bm25.top_k("alpha", 2)] == [0, 2]
+
+    def test_unknown_and_empty_queries(self):
+        bm25 = engine.BM25()
+        bm25.fit(["alpha beta", "gamma"])
+        assert bm25.top_k("zzz", 3) == []
+        assert bm25.top_k("", 3) == []
+        assert bm25.score("zzz") == [(0, 0), (1, 0)]
+
+    def test_maxscore_matches_exhaustive_loop(self):
+        bm25 = core.load_index(*engine._index_args(core._domain_target("product"))).bm25
+        query = "saas saas dashboard analytics minimal clean flat modern professional grid data dense"
+        assert len(set(bm25.tokenize(query))) >= engine.MAXSCORE_MIN_TERMS
+        expected = [(i, s) for i, s in naive_rank(bm25, query) if s > 0]
+        for k in (1, 3, 10, len(expected) + 5):
+            assert bm25.top_k(query, k) == expected[:k]
+        allowed = sum(1 << idx for idx, _ in expected[1::2])
+        assert bm25.top_k(query, 3, allowed) == expected[1::2][:3]
+
+    def test_term_bounds_survive_disk_cache(self, sample_csv):
+        cold = core.load_index(sample_csv, ["Name", "Keywords"], ["Name"]).bm25
+        core.clear_index_cache()
+        warm = core.load_index(sample_csv, ["Name", "Keywords"], ["Name"]).bm25
+        assert warm.max_scores == cold.max_scores
+        assert set(warm.max_scores) == set(warm.postings)
+
+
+class TestDatasetRegistry:
+    """Every skill's CSVs are declared once and searched through the shared engine."""
+
+    @pytest.fixture
+    def dataset(self, sample_csv):
+        engine.register_datasets("sample", sample_csv.parent, {
+            "kw": {"file": sample_csv.name, "search_cols": ["Name", "Keywords"], "output_cols": ["Name", "Notes"]},
+            "gone": {"file": "missing.csv", "search_cols": ["Name"], "output_cols": ["Name"]},
+        })
+        yield "sample"
+        del engine.DATASETS["sample"]
+
+    def test_search_dataset_matches_search_csv(self, dataset, sample_csv):
+        assert engine.search_dataset(dataset, "kw", "glass dark") == _search(sample_csv, "glass dark")
+        assert engine.search_dataset(dataset, "gone", "glass") == []
+        assert [domain for domain, _ in engine.dataset_targets(dataset)] == ["kw", "gone"]
+        with pytest.raises(KeyError):
+            engine.dataset_target("nope", "kw")
+
+    @pytest.mark.parametrize("name, domain, query", [
+        ("logo", "style", "minimalist tech wordmark"),
+        ("cip", "deliverable", "business card"),
+        ("slides", "strategy", "investor pitch"),
+    ])
+    def test_other_skills_search_through_engine(self, name, domain, query):
+        module = benchmark._load_engine(name)
+        assert module._ENGINE_DIR == Path(engine.__file__).resolve().parent
+        assert engine.DATASETS[module.DATASET_NAME][1] is module.CSV_CONFIG
+        result = module.search(query, domain)
+        assert result["count"] > 0
+        assert result["results"] == engine.search_dataset(module.DATASET_NAME, domain, query)
+
+    @pytest.mark.parametrize("name, query, domain", [
+        ("logo", "vintage emblem in gold", "style"),
+        ("logo", "nothing relevant", "style"),
+        ("cip", "Business Cards and letterhead", "deliverable"),
+        ("cip", "studio photo lighting", "mockup"),
+        ("slides", "funnel chart for kpi metrics", "chart"),
+        ("slides", "", "strategy"),
+    ])
+    def test_other_skills_detect_domains_through_engine(self, name, query, domain):
+        module = benchmark._load_engine(name)
+        assert isinstance(module._DOMAIN_MATCHER, engine.KeywordMatcher)
+        assert module.detect_domain(query) == domain
+
+
+class TestBenchmarkSuite:
+    def test_scaled_csv_keeps_columns_and_multiplies_rows(self, sample_csv, tmp_path):
+        dest = tmp_path / "scaled.csv"
+        benchmark.scale_csv(sample_csv, dest, ["Keywords"], 4)
+        original, scaled = (list(csv.DictReader(path.read_text(encoding="utf-8").splitlines()))
+                            for path in (sample_csv, dest))
+        assert len(scaled) == 4 * len(original)
+        assert scaled[:len(original)] == original
+        assert [row["Name"] for row in scaled] == [row["Name"] for row in original] * 4
+
+    def test_suite_reports_every_scale(self):
+        report = benchmark.run_suite(["uipro", "slides"], scales=(1, 2), domains=["gsap", "strategy"], repeat=1)
+        assert set(report) == {"uipro/gsap@x1", "uipro/gsap@x2", "slides/strategy@x1", "slides/strategy@x2"}
+        assert report["uipro/gsap@x2"]["rows"] == 2 * report["uipro/gsap@x1"]["rows"]
+        for metrics in report.values():
+            assert metrics["p50_ms"] <= metrics["p95_ms"] <= metrics["p99_ms"]
+        assert engine.INDEX_CACHE_ENABLED and engine.RESULT_CACHE.maxsize > 0  # restored
+
+    def test_oversized_corpora_are_skipped(self):
+        report = benchmark.run_suite(["uipro"], scales=(1, 2), domains=["gsap"], repeat=1, max_bytes=1)
+        assert set(report) == {"uipro/gsap@x1"}
+
+    def test_build_keeps_the_other_indexes(self):
+        other = engine.load_index(*engine._index_args(core._domain_target("color")))
+        before = engine.load_index(*engine._index_args(core._domain_target("style")))
+        benchmark._build(core, "style")
+        assert engine.load_index(*engine._index_args(core._domain_target("style"))) is not before
+        assert engine.load_index(*engine._index_args(core._domain_target("color"))) is other
+
+    def test_compare_flags_only_real_regressions(self):
+        old = {"a": {"p50_ms": 1.0, "p95_ms": 2.0, "build_ms": 10.0, "peak_kib": 100}}
+        assert benchmark.compare({"a": {"p50_ms": 1.2, "p95_ms": 2.0, "build_ms": 10.5, "peak_kib": 150}}, old) == []
+        slow = {"a": {"p50_ms": 1.5, "p95_ms": 2.0, "build_ms": 10.0, "peak_kib": 100}}
+        assert benchmark.compare(slow, old) == [("a", "p50_ms", 1.0, 1.5)]
+        assert benchmark.compare({}, old) == []
+
+
+class TestFieldWeights:
+    """BM25F: per-column weights over length-normalized field frequencies."""
+
+    DOCS = [
+        ["Glassmorphism", "frosted glass blur"],
+        ["Brutalism", "raw bold glassmorphism inspired grid"],
+        ["Minimalism", "clean simple whitespace"],
+    ]
+
+    def test_single_field_matches_bm25(self):
+        docs = ["alpha beta beta", "beta gamma", "alpha delta epsilon zeta", "gamma"]
+        bm25, bm25f = engine.BM25(), engine.BM25F()
+        bm25.fit(docs)
+        bm25f.fit([[doc] for doc in docs])
+        for query in ["alpha", "beta gamma", "zeta alpha beta"]:
+            expected = bm25.top_k(query, 4)
+            actual = bm25f.top_k(query, 4)
+            assert [i for i, _ in actual] == [i for i, _ in expected]
+            assert [s for _, s in actual] == pytest.approx([s for _, s in expected])
+
+    def test_weighted_field_wins(self):
+        name_heavy = engine.BM25F(weights=[3.0, 1.0])
+        name_heavy.fit(self.DOCS)
+        assert name_heavy.top_k("glassmorphism", 1)[0][0] == 0
+        prose_heavy = engine.BM25F(weights=[0.1, 3.0])
+        prose_heavy.fit(self.DOCS)
+        assert prose_heavy.top_k("glassmorphism", 1)[0][0] == 1
+
+    def test_field_statistics_are_precomputed(self):
+        bm25f = engine.BM25F(weights=[3.0, 1.0])
+        bm25f.fit(self.DOCS)
+        assert bm25f.field_lengths == [[1, 3], [1, 5], [1, 3]]
+        assert bm25f.avg_field_lengths == pytest.approx([1.0, 11 / 3])
+
+    def test_weighted_index_survives_disk_cache(self, sample_csv, monkeypatch):
+        args = (sample_csv, ["Name", "Keywords"], ["Name"], None, {"Name": 3.0})
+        cold = core.load_index(*args)
+        core.clear_index_cache()
+        monkeypatch.setattr(engine, "_build_index", lambda *a: pytest.fail("index was rebuilt"))
+        warm = core.load_index(*args)
+        assert isinstance(warm.bm25, engine.BM25F)
+        assert warm.bm25.top_k("glass bold", 3) == cold.bm25.top_k("glass bold", 3)
+
+    def test_style_domain_uses_field_weights(self):
+        index = core.load_index(*engine._index_args(core._domain_target("style")))
+        assert isinstance(index.bm25, engine.BM25F)
+        assert core.search("brutalism", "style", 1)["results"][0]["Style Category"].endswith("Brutalism")
+
+
+class TestVectorBackend:
+    """The optional numpy/scipy backend ranks like the pure-Python scorer."""
+
+    def test_falls_back_without_numpy(self, monkeypatch):
+        import bm25_vector
+        monkeypatch.setattr(bm25_vector, "AVAILABLE", False)
+        assert engine._resolve_backend("numpy") == "python"
+        assert core.search("glassmorphism", "style", 1)["count"] == 1
+
+    @pytest.mark.parametrize("domain", ["style", "color", "typography", "google-fonts"])
+    def test_batch_rankings_match_python(self, domain):
+        pytest.importorskip("numpy")
+        pytest.importorskip("scipy")
+        index = core.load_index(*engine._index_args(core._domain_target(domain)))
+        expected = index.top_k_batch(QUERIES, 5, "python")
+        actual = index.top_k_batch(QUERIES, 5, "numpy")
+        assert [[i for i, _ in hits] for hits in actual] == [[i for i, _ in hits] for hits in expected]
+        for hits_a, hits_e in zip(actual, expected):
+            assert [s for _, s in hits_a] == pytest.approx([s for _, s in hits_e])
+
+
+class TestSearchMany:
+    """Batch search matches one-at-a-time search, in input order."""
+
+    def test_matches_single_searches(self):
+        queries = [
+            "glassmorphism dark mode",
+            {"query": "saas dashboard", "domain": "product", "id": "p1"},
+            {"query": "state management hooks", "stack": "react", "max_results": 2},
+            {"query": "serif cyrillic", "domain": "google-fonts", "max_results": 5},
+        ]
+        results = core.search_many(queries)
+        assert results[0] == core.search("glassmorphism dark mode")
+        assert results[1] == {**core.search("saas dashboard", "product"), "id": "p1"}
+        assert results[2] == core.search_stack("state management hooks", "react", 2)
+        assert results[3] == core.search("serif cyrillic", "google-fonts", 5)
+
+    def test_defaults_and_errors(self):
+        results = core.search_many(["forms", {"id": 7}, {"query": "x", "stack": "cobol"}], stack="vue", max_results=1)
+        assert results[0]["stack"] == "vue" and results[0]["count"] <= 1
+        assert results[1] == {"error": "Missing query", "id": 7}
+        assert results[2]["error"].startswith("Unknown stack: cobol")
+
+    def test_malformed_entries_become_error_records(self):
+        results = core.search_many([
+            {"query": "dark", "max_results": "abc", "id": 1},
+            {"query": "dark", "max_results": -1},
+            {"query": "dark", "max_results": 2.5},
+            {"query": "dark", "max_results": True},
+            {"query": "hooks", "stack": ["react"]},
+            {"query": "dark", "domain": {"style": 1}},
+            {"query": "serif", "domain": "google-fonts", "filters": 5},
+            {"query": "dark", "domain": "style", "max_results": "2"},
+            {"query": "dark", "domain": "style", "max_results": 0},
+        ])
+        assert results[0] == {"error": "Invalid max_results: 'abc' (expected a non-negative integer)", "id": 1}
+        assert all(r["error"].startswith("Invalid max_results") for r in results[1:4])
+        assert results[4]["error"].startswith("Invalid stack") and results[5]["error"].startswith("Invalid domain")
+        assert results[6]["error"].startswith("Invalid filters")
+        assert results[7] == core.search("dark", "style", 2)
+        assert results[8]["count"] == 0
+
+    def test_index_built_once_per_domain(self, monkeypatch):
+        calls = []
+        build = engine._build_index
+        monkeypatch.setattr(engine, "_build_index", lambda *a: calls.append(a[0]) or build(*a))
+        core.search_many([f"query {i}" for i in range(50)], domain="color")
+        assert len(calls) == 1
+
+
+def test_batch_cli_streams_ndjson():
+    import io
+    import json
+    from search import run_batch
+
+    out = io.StringIO()
+    run_batch(['"dark mode"\n', "\n", "{oops\n", '{"query": "hooks", "stack": "react", "id": 3}\n'], domain="style", out=out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert len(lines) == 3
+    assert lines[0]["domain"] == "style"
+    assert lines[1] == {"error": lines[1]["error"], "line": 3}
+    assert lines[2]["stack"] == "react" and lines[2]["id"] == 3
+
+
+def test_batch_cli_reports_bad_values_per_line():
+    import io
+    import json
+    from search import run_batch
+
+    out = io.StringIO()
+    run_batch(['{"query": "dark", "max_results": "abc"}\n', '{"query": "hooks", "stack": ["react"]}\n', '"dark mode"\n'],
+              domain="style", out=out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [("error" in line) for line in lines] == [True, True, False]
+
+
+class TestDomainDetection:
+    """The compiled keyword matcher reproduces the per-keyword regex scan."""
+
+    @staticmethod
+    def _regex_scores(query):
+        import re
+        q = query.lower()
+        return {d: sum(1 for kw in kws if re.search(r'\b' + re.escape(kw) + r'\b', q))
+                for d, kws in core.DOMAIN_KEYWORDS.items()}
+
+    @pytest.mark.parametrize("query", QUERIES + [
+        "", "#", "a#b color", "sans serif font for a dark mode dashboard",
+        "font pairing for e-commerce landing page", "next.js suspense bundle", "pet_care", "iconsx icons",
+    ])
+    def test_matches_regex_scan(self, query):
+        expected = self._regex_scores(query)
+        ranked = core.rank_domains(query)
+        assert {d: n for d, n, _ in ranked} == {d: n for d, n in expected.items() if n}
+        best = max(expected, key=expected.get)
+        assert core.detect_domain(query) == (best if expected[best] else "style")
+
+    def test_rank_is_a_distribution(self):
+        ranked = core.rank_domains("sans serif font pairing for a fintech landing page")
+        assert [n for _, n, _ in ranked] == sorted((n for _, n, _ in ranked), reverse=True)
+        assert sum(share for _, _, share in ranked) == pytest.approx(1.0)
+
+    def test_substring_mode(self):
+        matcher = core.KeywordMatcher({"a": ["art", "cart"], "b": ["tar"]}, word_boundary=False)
+        assert matcher.find("startup carts") == {"a": {"art", "cart"}, "b": {"tar"}}
+        assert core.KeywordMatcher({"a": ["art"]}).find("startup carts") == {}
+
+    def test_best_label(self):
+        matcher = engine.KeywordMatcher({"a": ["art"], "b": ["cart", "tar"]}, word_boundary=False)
+        assert matcher.best("start") == "a"  # tie: keyword_groups order
+        assert matcher.best("tart cart") == "b"
+        assert matcher.best("nothing", "a") == "a"
+
+
+class TestSearchAll:
+    """The merged index ranks every domain and stack in one pass."""
+
+    @pytest.mark.parametrize("query", ["glassmorphism dark dashboard", "serif font pairing", "useEffect hooks"])
+    def test_per_domain_matches_search(self, query):
+        result = core.search_all(query, max_results=5, per_domain=2)
+        assert result["domains"]
+        for label, group in result["domains"].items():
+            if label.startswith("stack:"):
+                assert group == core.search_stack(query, label[len("stack:"):], 2)
+            else:
+                assert group == core.search(query, label, 2)
+
+    def test_global_results_are_best_overall(self, monkeypatch):
+        monkeypatch.setattr(engine, "PROXIMITY_WEIGHT", 0)  # compare against raw BM25 sums
+        query = "glassmorphism dark dashboard"
+        result = core.search_all(query, max_results=4, per_domain=0)
+        scores = [hit["score"] for hit in result["results"]]
+        assert len(scores) == 4 and scores == sorted(scores, reverse=True)
+        index = core.load_unified_index()
+        best = max(max(acc.values()) for acc in index.accumulate(query).values())
+        assert scores[0] == round(best, 4)
+        assert {"domain", "file", "score", "row"} <= set(result["results"][0])
+        assert result["domains"] == {}
+
+    def test_reuses_merged_index_until_a_source_changes(self):
+        first = core.load_unified_index()
+        assert core.load_unified_index() is first
+        core.clear_index_cache()
+        assert core.load_unified_index() is not first
+
+    def test_no_match(self):
+        result = core.search_all("zzzqqq")
+        assert result["count"] == 0 and result["results"] == [] and result["domains"] == {}
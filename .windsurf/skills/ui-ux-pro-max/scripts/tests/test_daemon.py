@@ -0,0 +1,151 @@
+"""Tests for daemon.py (resident search daemon over a Unix socket)."""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import core
+import daemon
+
+pytestmark = pytest.mark.skipif(not daemon.SUPPORTED, reason="Unix sockets not available")
+
+
+@pytest.fixture
+def socket_path():
+    # AF_UNIX paths are capped at ~104 bytes, so avoid pytest's deep tmp_path
+    path = os.path.join(tempfile.mkdtemp(prefix="uipro-"), "s.sock")
+    yield path
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+@pytest.fixture
+def running_daemon(socket_path):
+    thread = threading.Thread(target=daemon.serve, args=(socket_path, 0.05), daemon=True)
+    thread.start()
+    deadline = time.time() + 10
+    while not daemon.ping(socket_path):
+        assert time.time() < deadline, "daemon did not start"
+        time.sleep(0.02)
+    yield socket_path
+    daemon.shutdown(socket_path)
+    thread.join(5)
+
+
+def test_request_without_daemon_falls_back(socket_path):
+    assert daemon.request({"op": "ping"}, socket_path) is None
+
+
+def test_daemon_answers_like_in_process_search(running_daemon):
+    assert daemon.request({"op": "search", "query": "glassmorphism", "domain": "style"}, running_daemon) \
+        == core.search("glassmorphism", "style")
+    assert daemon.request({"op": "search_stack", "query": "hooks", "stack": "react", "max_results": 2}, running_daemon) \
+        == core.search_stack("hooks", "react", 2)
+    assert daemon.request({"op": "search_all", "query": "dark dashboard", "max_results": 2}, running_daemon) \
+        == core.search_all("dark dashboard", 2)
+
+
+def test_daemon_reports_result_cache_stats(running_daemon):
+    daemon.request({"op": "search", "query": "glassmorphism", "domain": "style"}, running_daemon)
+    daemon.request({"op": "search", "query": "Glassmorphism", "domain": "style"}, running_daemon)
+    stats = daemon.request({"op": "stats"}, running_daemon)
+    assert stats["hits"] >= 1 and stats["size"] >= 1
+
+
+def test_daemon_reports_errors(running_daemon):
+    with pytest.raises(RuntimeError, match="Unknown op"):
+        daemon.request({"op": "nope"}, running_daemon)
+    with pytest.raises(RuntimeError, match="KeyError"):
+        daemon.request({"op": "search"}, running_daemon)
+
+
+def test_second_daemon_refuses_to_start(running_daemon):
+    with pytest.raises(RuntimeError, match="already listening"):
+        daemon.serve(running_daemon)
+
+
+def test_shutdown_removes_socket(running_daemon):
+    assert daemon.shutdown(running_daemon)
+    deadline = time.time() + 5
+    while os.path.exists(running_daemon):
+        assert time.time() < deadline
+        time.sleep(0.02)
+
+
+def test_socket_is_private_from_creation(running_daemon, monkeypatch):
+    import stat
+    assert stat.S_IMODE(os.stat(running_daemon).st_mode) == 0o600
+    previous = os.umask(0o022)
+    os.umask(previous)
+    assert previous != 0o177  # restored after bind
+
+
+def test_serve_creates_a_private_directory(monkeypatch):
+    import stat
+    path = os.path.join(tempfile.mkdtemp(prefix="uipro-"), "run", "s.sock")
+    daemon._private_dir(path)
+    assert stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) == 0o700
+    os.chmod(os.path.dirname(path), 0o777)
+    with pytest.raises(RuntimeError, match="Refusing"):
+        daemon.serve(path)
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="no socket ownership on this platform")
+def test_client_ignores_sockets_it_does_not_own(running_daemon):
+    directory = os.path.dirname(running_daemon)
+    os.chmod(directory, 0o733)  # others could have swapped the socket
+    try:
+        assert daemon.request({"op": "ping"}, running_daemon) is None
+    finally:
+        os.chmod(directory, 0o700)
+    assert daemon.request({"op": "ping"}, running_daemon) is not None
+    # Undone before the fixture's shutdown request (monkeypatch would undo it after)
+    daemon._UID += 1  # someone else's socket
+    try:
+        assert daemon.request({"op": "ping"}, running_daemon) is None
+    finally:
+        daemon._UID -= 1
+
+
+def test_cli_reports_daemon_errors_without_a_traceback(monkeypatch, capsys):
+    from search import via_daemon
+
+    def fail(params, socket_path):
+        raise RuntimeError("Unknown filter: bogus")
+    monkeypatch.setattr(daemon, "request", fail)
+    with pytest.raises(SystemExit) as exit_info:
+        via_daemon({"op": "search"}, "unused", lambda: pytest.fail("retried in-process"))
+    assert exit_info.value.code == "Error: Unknown filter: bogus"
+
+
+@pytest.fixture
+def slow_design_system(monkeypatch):
+    """Make design_system requests block until the returned event is set"""
+    release = threading.Event()
+    monkeypatch.setattr(daemon, "_design_system", lambda params: release.wait(10) and "done")
+    yield release
+    release.set()
+
+
+def test_requests_do_not_wait_for_each_other(running_daemon, slow_design_system):
+    slow = threading.Thread(target=daemon.request, args=({"op": "design_system", "query": "x"}, running_daemon))
+    slow.start()
+    time.sleep(0.1)
+    assert daemon.request({"op": "search", "query": "glassmorphism", "domain": "style"}, running_daemon)["count"] > 0
+    assert slow.is_alive()
+    slow_design_system.set()
+    slow.join(5)
+
+
+def test_timeout_falls_back_only_for_read_only_requests(running_daemon, slow_design_system, monkeypatch):
+    monkeypatch.setattr(daemon, "REQUEST_TIMEOUT", 0.2)
+    assert daemon.request({"op": "design_system", "query": "x"}, running_daemon) is None
+    with pytest.raises(RuntimeError, match="writes files"):
+        daemon.request({"op": "design_system", "query": "x", "persist": True}, running_daemon)
@@ -0,0 +1,308 @@
+"""Tests for design_system.py (design system generation and persistence)."""
+
+import builtins
+import csv
+import hashlib
+import json
+import shutil
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import design_system
+import engine
+from design_system import DataContext, DesignSystemGenerator, generate_design_system
+
+
+@pytest.fixture
+def csv_reads(monkeypatch):
+    """Names of the CSV files opened while the fixture is active"""
+    reads = []
+    real_open = builtins.open
+
+    def spy(file, *args, **kwargs):
+        if str(file).endswith(".csv"):
+            reads.append(Path(file).name)
+        return real_open(file, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", spy)
+    return reads
+
+
+class TestDataContext:
+    def test_warm_generate_reads_no_csv(self, csv_reads, tmp_path):
+        context = DataContext()
+        generate_design_system("saas dashboard", persist=True, page="pricing", output_dir=tmp_path,
+                               motion=8, context=context)
+        assert csv_reads.count(design_system.REASONING_FILE) == 1
+        csv_reads.clear()
+        generate_design_system("fintech crypto", persist=True, page="checkout", output_dir=tmp_path,
+                               motion=2, context=context)
+        assert csv_reads == []
+
+    def test_product_is_searched_once(self, monkeypatch):
+        context = DataContext()
+        domains = []
+        search = context.search
+        monkeypatch.setattr(context, "search", lambda q, domain, n: domains.append(domain) or search(q, domain, n))
+        DesignSystemGenerator(context).generate("saas dashboard")
+        assert sorted(domains) == sorted(design_system.SEARCH_CONFIG)
+
+    def test_reasoning_reloads_when_csv_changes(self, tmp_path, monkeypatch):
+        shutil.copy(design_system.DATA_DIR / design_system.REASONING_FILE, tmp_path)
+        monkeypatch.setattr(design_system, "DATA_DIR", tmp_path)
+        context = DataContext()
+        rows = context.reasoning
+        assert context.reasoning is rows
+        path = tmp_path / design_system.REASONING_FILE
+        path.write_text(path.read_text(encoding="utf-8").splitlines()[0] + "\n", encoding="utf-8")
+        assert context.reasoning == []
+        path.unlink()
+        assert context.reasoning == []
+
+    def test_default_context_is_shared(self):
+        assert design_system.data_context() is design_system.data_context()
+        assert DesignSystemGenerator().context is design_system.data_context()
+
+
+def _scan_reasoning_rule(rows, category):
+    """The original three linear scans, as the reference for ReasoningIndex.find"""
+    category_lower = category.lower()
+    for rule in rows:
+        if rule.get("UI_Category", "").lower() == category_lower:
+            return rule
+    for rule in rows:
+        ui_cat = rule.get("UI_Category", "").lower()
+        if ui_cat in category_lower or category_lower in ui_cat:
+            return rule
+    for rule in rows:
+        ui_cat = rule.get("UI_Category", "").lower()
+        keywords = ui_cat.replace("/", " ").replace("-", " ").split()
+        if any(kw in category_lower for kw in keywords):
+            return rule
+    return {}
+
+
+class TestReasoningIndex:
+    @pytest.fixture
+    def generator(self):
+        return DesignSystemGenerator(DataContext())
+
+    def test_matches_linear_scans_for_every_product(self, generator):
+        with open(design_system.DATA_DIR / "products.csv", encoding="utf-8") as f:
+            products = [row["Product Type"] for row in csv.DictReader(f)]
+        extra = ["", "General", "SAAS", "luxury e-commerce store", "dashboard", "micro", "zzz", "app", "b2b/saas"]
+        for category in products + extra:
+            expected = _scan_reasoning_rule(generator.reasoning_data, category)
+            assert generator._find_reasoning_rule(category) is expected or expected == {}, category
+            assert generator._find_reasoning_rule(category) == expected, category
+
+    def test_first_row_wins_at_every_level(self):
+        rows = [{"UI_Category": "Fintech/Crypto"}, {"UI_Category": "Crypto"}, {"UI_Category": "Crypto"},
+                {"UI_Category": "Banking App"}, {"UI_Category": "App"}]
+        generator = DesignSystemGenerator(DataContext())
+        generator.reasoning_index = design_system.ReasoningIndex(rows)
+        for category in ["crypto", "fintech", "banking", "app", "mobile app", "crypto app", "cryptocurrency wallet", ""]:
+            assert generator._find_reasoning_rule(category) is _scan_reasoning_rule(rows, category), category
+
+    def test_decision_rules_are_parsed_once(self, generator, monkeypatch):
+        expected = generator._apply_reasoning("Fintech/Crypto", {})
+        monkeypatch.setattr(design_system.json, "loads", lambda *a: pytest.fail("Decision_Rules re-parsed"))
+        reasoning = generator._apply_reasoning("Fintech/Crypto", {})
+        assert reasoning == expected and reasoning["decision_rules"]
+        reasoning["style_priority"].append("mutated")
+        assert "mutated" not in generator._apply_reasoning("Fintech/Crypto", {})["style_priority"]
+        assert generator._apply_reasoning("zzz", {}) == design_system.DEFAULT_REASONING
+
+
+class TestSelectBestMatch:
+    RESULTS = [{"Style Category": "Flat Design"}, {"Style Category": "Glassmorphism"}]
+
+    @pytest.mark.parametrize("priority, expected", [
+        (["glassmorphism", "flat"], 1),
+        (["brutalism", "flat design"], 0),
+        ([], 0),
+        (None, 0),
+        (["", "glassmorphism"], 0),  # an empty priority matches the top hit, as it always has
+    ])
+    def test_first_priority_present_wins(self, priority, expected):
+        assert DesignSystemGenerator()._select_best_match(self.RESULTS, priority) is self.RESULTS[expected]
+
+    def test_no_results(self):
+        assert DesignSystemGenerator()._select_best_match([], ["flat"]) == {}
+
+
+class TestBatch:
+    LINES = [
+        '{"query": "saas dashboard", "project_name": "Acme", "density": 9, "pages": ["dashboard", {"name": "pricing", "query": "pricing plans"}]}\n',
+        '"fintech crypto wallet"\n',
+        "\n",
+        "{oops\n",
+        '{"query": "spa wellness", "motion": "fast"}\n',
+        '{"project_name": "nameless"}\n',
+        "[1, 2]\n",
+    ]
+
+    def test_read_projects(self):
+        projects = design_system.read_projects(self.LINES)
+        assert [lineno for lineno, _ in projects] == [1, 2, 4, 5, 6, 7]
+        assert projects[1][1] == {"query": "fintech crypto wallet"}
+        assert projects[2][1]["error"].startswith("Invalid JSON on line 4")
+        assert "error" not in projects[3][1]
+        assert projects[4][1] == {"project_name": "nameless", "error": "Missing query on line 6"}
+        assert "error" in projects[5][1]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_generates_and_persists_every_project(self, tmp_path, workers):
+        summary = design_system.generate_batch(design_system.read_projects(self.LINES), tmp_path, workers)
+        entries = summary["projects"]
+        assert [entry["line"] for entry in entries] == [1, 2, 4, 5, 6, 7]
+        assert summary["count"] == 6 and summary["failed"] == 4
+        acme, wallet = entries[0], entries[1]
+        root = tmp_path / "design-system"
+        assert acme["files"] == [str(root / "acme" / "MASTER.md"), str(root / "acme" / "pages" / "dashboard.md"),
+                                 str(root / "acme" / "pages" / "pricing.md")]
+        assert wallet["slug"] == "fintech-crypto-wallet" and wallet["files"] == [str(root / wallet["slug"] / "MASTER.md")]
+        assert all(Path(path).is_file() for path in acme["files"] + wallet["files"])
+        assert acme["ms"] > 0 and acme["category"] == DesignSystemGenerator().generate("saas dashboard")["category"]
+        assert "Density 9/10" in (root / "acme" / "MASTER.md").read_text(encoding="utf-8")
+        assert entries[3]["error"].startswith("ValueError")
+        summary_text = design_system.format_batch_summary(summary)
+        assert "2/6 projects" in summary_text and "4 failed" in summary_text
+
+    @pytest.mark.parametrize("line", [
+        '{"query": "saas", "pages": "dashboard"}',
+        '{"query": "saas", "pages": [1]}',
+        '{"query": "saas", "pages": [{"query": "pricing"}]}',
+        '{"query": "saas", "pages": [{"name": "pricing", "query": 3}]}',
+        '{"query": ["saas"]}',
+    ])
+    def test_malformed_fields_are_per_line_errors(self, tmp_path, line):
+        projects = design_system.read_projects(["\"fintech crypto wallet\"\n", line + "\n"])
+        assert projects[1][1]["error"].startswith("Invalid ") and "on line 2" in projects[1][1]["error"]
+        summary = design_system.generate_batch(projects, tmp_path, 1)
+        assert summary["failed"] == 1 and "slug" in summary["projects"][0]
+        assert not (tmp_path / "design-system" / "saas").exists()
+
+    def test_unexpected_errors_stay_with_their_project(self, tmp_path, monkeypatch):
+        def explode(*args, **kwargs):
+            raise AttributeError("boom")
+        monkeypatch.setattr(design_system, "persist_design_system", explode)
+        entry = design_system._generate_project((1, {"query": "saas"}, str(tmp_path)))
+        assert entry["error"] == "AttributeError: boom" and entry["line"] == 1
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_duplicate_slugs_are_reported_not_raced(self, tmp_path, workers):
+        lines = ['{"query": "saas dashboard", "project_name": "Acme"}\n', '"fintech crypto wallet"\n',
+                 '{"query": "spa wellness", "project_name": "ACME!"}\n', '{"query": "Fintech  crypto-wallet"}\n']
+        entries = design_system.generate_batch(design_system.read_projects(lines), tmp_path, workers)["projects"]
+        assert [entry.get("slug") for entry in entries] == ["acme", "fintech-crypto-wallet", None, None]
+        assert entries[2]["error"] == "Duplicate project 'acme' on line 3: line 1 already writes design-system/acme/"
+        assert "line 2" in entries[3]["error"]
+        spa = DesignSystemGenerator().generate("spa wellness")["category"]
+        assert entries[0]["category"] != spa
+        master = (tmp_path / "design-system" / "acme" / "MASTER.md").read_text(encoding="utf-8")
+        assert entries[0]["category"] in master and spa not in master
+
+
+class TestCatalog:
+    CATEGORIES = ["SaaS (General)", "Fintech/Crypto", "Restaurant/Food Service"]
+
+    @pytest.fixture
+    def catalog(self):
+        return design_system.build_catalog(product_types=self.CATEGORIES)
+
+    def test_catalog_answers_match_live_generation(self, catalog):
+        assert catalog["categories"] == 3 and catalog["systems"] == 3 * 64
+        generator = DesignSystemGenerator(DataContext())
+        for category in self.CATEGORIES + ["fintech crypto", "FINTECH / CRYPTO"]:
+            for dials in [(None, None, None), (2, None, 9), (5, 8, None), (10, 10, 1), (7, 3, 4)]:
+                assert design_system.catalog_lookup(category, *dials) is not None
+                live = generator.generate(category, "Client", *dials, use_catalog=False)
+                assert list(generator.generate(category, "Client", *dials).items()) == list(live.items())
+
+    def test_other_queries_search_live(self, catalog, monkeypatch):
+        for query in ["saas dashboard", '"Fintech/Crypto"', "Healthcare App", ""]:
+            assert design_system.catalog_lookup(query) is None
+        monkeypatch.setattr(design_system, "_is_fresh", lambda *a: False)  # a source CSV changed
+        assert design_system.catalog_lookup("Fintech/Crypto") is None
+
+    def test_cold_catalog_hit_loads_no_index(self, catalog):
+        engine.clear_index_cache()
+        generate_design_system("Fintech/Crypto", motion=8)
+        assert engine._INDEXES == {}
+
+    def test_foreign_or_corrupt_catalog_is_ignored(self, catalog, monkeypatch):
+        weight = engine.PROXIMITY_WEIGHT
+        monkeypatch.setattr(engine, "PROXIMITY_WEIGHT", weight + 1)  # built under other settings
+        assert design_system.catalog_lookup("Fintech/Crypto") is None
+        monkeypatch.setattr(engine, "PROXIMITY_WEIGHT", weight)
+        assert design_system.catalog_lookup("Fintech/Crypto") is not None
+        Path(catalog["path"]).write_bytes(b"garbage")
+        assert design_system.catalog_lookup("Fintech/Crypto") is None
+
+    @pytest.mark.parametrize("change", [
+        lambda mp: mp.setattr(engine, "BM25_B", 0.5),
+        lambda mp: mp.setattr(engine, "FUZZY_SEARCH", not engine.FUZZY_SEARCH),
+        lambda mp: mp.setitem(design_system.CSV_CONFIG["style"], "field_weights", {"Style Category": 9.0}),
+        lambda mp: mp.setitem(design_system.CSV_CONFIG["color"], "output_cols", ["Product Type"]),
+    ])
+    def test_engine_and_column_settings_invalidate(self, catalog, monkeypatch, change):
+        change(monkeypatch)
+        assert design_system.catalog_lookup("Fintech/Crypto") is None
+
+
+class TestPersistence:
+    @pytest.fixture
+    def design(self):
+        return DesignSystemGenerator().generate("saas dashboard", "Acme", motion=8)
+
+    @staticmethod
+    def _clock(monkeypatch, stamp):
+        """Make format_master_md/format_page_override_md stamp files with a fixed time"""
+        class Clock:
+            @staticmethod
+            def now():
+                return datetime(*stamp)
+        monkeypatch.setattr(design_system, "datetime", Clock)
+
+    def test_unchanged_content_is_not_rewritten(self, design, tmp_path, monkeypatch):
+        self._clock(monkeypatch, (2025, 1, 1))
+        first = design_system.persist_design_system(design, "pricing", tmp_path)
+        assert first["written_files"] == first["created_files"] and first["unchanged_files"] == []
+        before = {path: (Path(path).read_bytes(), Path(path).stat().st_mtime_ns) for path in first["created_files"]}
+        self._clock(monkeypatch, (2026, 6, 1))
+        second = design_system.persist_design_system(design, "pricing", tmp_path)
+        assert second["written_files"] == [] and second["unchanged_files"] == first["created_files"]
+        assert {path: (Path(path).read_bytes(), Path(path).stat().st_mtime_ns) for path in before} == before
+        assert not list(tmp_path.rglob("*.tmp"))
+
+    def test_changed_or_edited_content_is_rewritten(self, design, tmp_path):
+        first = design_system.persist_design_system(design, "pricing", tmp_path)
+        master, page = map(Path, first["created_files"])
+        page.write_text("hand edited", encoding="utf-8")
+        design = DesignSystemGenerator().generate("saas dashboard", "Acme", motion=2)
+        second = design_system.persist_design_system(design, "pricing", tmp_path)
+        assert second["written_files"] == [str(master), str(page)]
+        assert "2/10" in master.read_text(encoding="utf-8") and page.read_text(encoding="utf-8") != "hand edited"
+
+    def test_manifest_records_files_and_sources(self, design, tmp_path):
+        design_system.persist_design_system(design, "pricing", tmp_path)
+        result = design_system.persist_design_system(design, "checkout", tmp_path)
+        root = Path(result["design_system_dir"])
+        manifest = json.loads(Path(result["manifest"]).read_text(encoding="utf-8"))
+        assert manifest["version"] == design_system.MANIFEST_VERSION and manifest["project_name"] == "Acme"
+        assert list(manifest["files"]) == ["MASTER.md", "pages/checkout.md", "pages/pricing.md"]
+        for name, entry in manifest["files"].items():
+            data = (root / name).read_bytes()
+            assert entry == {"sha256": hashlib.sha256(data).hexdigest(), "bytes": len(data)}
+        for name in ["products.csv", "styles.csv", design_system.REASONING_FILE]:
+            assert manifest["sources"][name] == hashlib.sha256((design_system.DATA_DIR / name).read_bytes()).hexdigest()
+        (root / "pages" / "pricing.md").unlink()
+        design_system.persist_design_system(design, None, tmp_path)
+        manifest = json.loads(Path(result["manifest"]).read_text(encoding="utf-8"))
+        assert list(manifest["files"]) == ["MASTER.md", "pages/checkout.md"]
@@ -0,0 +1,85 @@
+"""Tests for facets.py (bitmap filters over structured columns)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import core
+from facets import FacetIndex, FilterError, parse_filters
+
+SPECS = {
+    "category": {"col": "Category", "type": "value"},
+    "subset": {"col": "Subsets", "type": "multi"},
+    "axis": {"col": "Axes", "type": "multi"},
+    "variable": {"col": "Axes", "type": "present"},
+    "popularity": {"col": "Rank", "type": "range", "numeric": True},
+    "added": {"col": "Added", "type": "range"},
+}
+
+ROWS = [
+    {"Category": "Serif", "Subsets": "latin | cyrillic", "Axes": "wght: -", "Rank": "5", "Added": "2020-03-01"},
+    {"Category": "Sans Serif", "Subsets": "latin", "Axes": "", "Rank": "120", "Added": "2021-07-15"},
+    {"Category": "Serif", "Subsets": "latin | greek", "Axes": "wdth: - | wght: -", "Rank": "300", "Added": "2021-01-02"},
+    {"Category": "Display", "Subsets": "cyrillic | greek", "Axes": "", "Rank": "", "Added": "2023-11-30"},
+]
+
+
+def rows_of(bits):
+    return [i for i in range(len(ROWS)) if bits >> i & 1]
+
+
+@pytest.fixture
+def index():
+    return FacetIndex(SPECS, ROWS)
+
+
+@pytest.mark.parametrize("filters,expected", [
+    (["category=serif"], [0, 2]),
+    (["category=serif,display"], [0, 2, 3]),
+    (["subset=cyrillic"], [0, 3]),
+    (["subset=cyrillic", "subset=greek"], [3]),
+    (["axis=wdth"], [2]),
+    (["variable=yes"], [0, 2]),
+    (["variable=no"], [1, 3]),
+    (["popularity<=120"], [0, 1]),
+    (["popularity>120"], [2]),
+    (["popularity=100..300"], [1, 2]),
+    (["added=2021"], [1, 2]),
+    (["added>=2021-06"], [1, 3]),
+    (["added<2021"], [0]),
+    ({"category": "serif", "popularity": "<=10"}, [0]),
+    ([], [0, 1, 2, 3]),
+])
+def test_select(index, filters, expected):
+    assert rows_of(index.select(filters)) == expected
+
+
+def test_errors(index):
+    with pytest.raises(FilterError, match="Unknown filter"):
+        index.select(["weight=bold"])
+    with pytest.raises(FilterError, match="only supports"):
+        index.select(["category>=a"])
+    with pytest.raises(FilterError, match="expects a number"):
+        index.select(["popularity<=top"])
+    with pytest.raises(FilterError, match="Invalid filter"):
+        parse_filters(["nonsense"])
+
+
+def test_search_ranks_only_surviving_rows():
+    filters = ["subset=cyrillic", "popularity<=200", "category=serif"]
+    result = core.search("serif font", "google-fonts", 5, filters=filters)
+    assert result["count"] > 0
+    for row in result["results"]:
+        assert row["Category"] == "Serif"
+        assert "cyrillic" in row["Subsets"].split(" | ")
+        assert int(row["Popularity Rank"]) <= 200
+
+
+def test_search_reports_filter_errors():
+    assert core.search("x", "google-fonts", filters=["nope=1"])["error"].startswith("Unknown filter")
+    assert "not supported" in core.search("x", "style", filters=["category=a"])["error"]
+    batch = core.search_many([{"query": "serif", "domain": "google-fonts", "filters": {"noto": "yes"}}])
+    assert all(row["Family"].startswith("Noto") for row in batch[0]["results"])
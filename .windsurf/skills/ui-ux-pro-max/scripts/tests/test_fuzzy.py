@@ -0,0 +1,103 @@
+"""Tests for fuzzy.py (trigram correction of misspelled query tokens)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import core
+import engine
+from fuzzy import TrigramIndex, edit_distance
+
+VOCAB = {"glassmorphism": 4, "neumorphism": 3, "dashboard": 9, "dashboards": 1, "dark": 7, "card": 2}
+
+
+@pytest.mark.parametrize("a,b,limit,expected", [
+    ("dashbord", "dashboard", 2, 1),
+    ("nuemorphism", "neumorphism", 2, 1),  # adjacent transposition
+    ("kitten", "sitting", 3, 3),
+    ("kitten", "sitting", 2, 3),           # capped at limit + 1
+    ("same", "same", 1, 0),
+])
+def test_edit_distance(a, b, limit, expected):
+    assert edit_distance(a, b, limit) == expected
+
+
+class TestTrigramIndex:
+    def test_corrects_to_nearest_token(self):
+        index = TrigramIndex(VOCAB)
+        assert index.correct("glasmorphism") == "glassmorphism"
+        assert index.correct("nuemorphism") == "neumorphism"
+        assert index.correct("dashbord") == "dashboard"
+
+    def test_nearest_then_most_frequent(self):
+        assert TrigramIndex(VOCAB).correct("dasboards") == "dashboards"
+        assert TrigramIndex({"darker": 7, "darken": 1}).correct("darkex") == "darker"
+
+    def test_short_and_distant_tokens_are_left_alone(self):
+        index = TrigramIndex(VOCAB)
+        assert index.correct("drk") is None
+        assert index.correct("drak") is None  # too short for any edit
+        assert index.correct("typography") is None
+        assert index.rewrite(["dark", "drk", "dashbord"]) == ["dark", "dashboard"]
+
+
+class TestFuzzySearch:
+    def test_misspelled_query_finds_the_style(self):
+        result = core.search("glasmorphism", "style", 1)
+        assert "Glassmorphism" in result["results"][0]["Style Category"]
+        assert result["query"] == "glasmorphism"
+
+    def test_known_queries_are_untouched(self):
+        index = core.load_index(*engine._index_args(core._domain_target("product")))
+        assert index.correct("saas dashboard") == "saas dashboard"
+        assert index._fuzzy is None
+
+    @pytest.mark.parametrize("query,domain,wrong", [
+        ("weather app", "typography", "Academia"),      # not "leather"
+        ("chat messenger", "style", "Data-Dense"),      # not "chart"
+        ("mental health app", "style", "Skeuomorphism"),  # not "metal"
+    ])
+    def test_real_words_from_other_domains_are_kept(self, query, domain, wrong):
+        index = core.load_index(*engine._index_args(core._domain_target(domain)))
+        assert set(index.parse(query)[0]) <= set(index.bm25.tokenize(query))  # nothing rewritten
+        assert not any(wrong in " ".join(row.values()) for row in core.search(query, domain)["results"])
+
+    def test_misspellings_next_to_real_words_are_still_fixed(self):
+        index = core.load_index(*engine._index_args(core._domain_target("style")))
+        assert index.parse("glasmorphism weather")[0] == ["glassmorphism", "weather"]
+
+    def test_known_vocabulary_is_cached_on_disk(self, monkeypatch):
+        assert engine.known_tokens(["weather", "glasmorphism"]) == {"weather"}  # a full pass: saved
+        core.clear_index_cache()
+        monkeypatch.setattr(engine, "load_index", None)  # a fresh process must not reload every index
+        assert engine.known_tokens(["weather", "glasmorphism"]) == {"weather"}
+
+    def test_known_words_load_indexes_only_until_found(self):
+        assert engine.known_tokens(["glassmorphism"]) == {"glassmorphism"}  # in style, the first domain
+        assert len(engine._INDEXES) == 1 and engine._VOCABULARIES == {}
+
+    def test_warm_lookups_touch_no_files(self, monkeypatch):
+        engine.known_tokens(["glasmorphism"])
+        monkeypatch.setattr(engine, "_vocabulary_stamp", lambda targets: pytest.fail("stat on a warm lookup"))
+        assert engine.known_tokens(["glasmorphism", "weather"]) == {"weather"}
+
+    def test_rebuilt_index_refreshes_the_vocabulary(self, tmp_path):
+        sample_csv = tmp_path / "sample.csv"
+        sample_csv.write_text("Name,Keywords\nGlass,glassmorphism blur\n", encoding="utf-8")
+        engine.register_datasets("sample", tmp_path, {
+            "kw": {"file": sample_csv.name, "search_cols": ["Name", "Keywords"], "output_cols": ["Name"]}})
+        try:
+            assert engine.known_tokens(["zebrawood"]) == set()
+            with open(sample_csv, "a", encoding="utf-8") as f:
+                f.write("Zebra,zebrawood\n")
+            engine.search_dataset("sample", "kw", "zebrawood")  # notices the change, rebuilds
+            assert engine.known_tokens(["zebrawood"]) == {"zebrawood"}
+        finally:
+            del engine.DATASETS["sample"]
+
+    def test_can_be_disabled(self, monkeypatch):
+        monkeypatch.setattr(engine, "FUZZY_SEARCH", False)
+        assert core.search("dashbord", "product")["count"] == 0
@@ -0,0 +1,99 @@
+"""Tests for positions.py (positional index, phrase and proximity queries)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import core
+import engine
+from positions import PositionalIndex
+
+CORPUS = [
+    ["dark", "mode", "oled", "dark"],
+    ["mode", "switch", "for", "dark", "themes"],
+    ["light", "mode"],
+    ["dark", "glass", "dark", "mode"],
+]
+
+
+class TestPositionalIndex:
+    def test_positions_round_trip(self):
+        index = PositionalIndex(CORPUS)
+        for idx, doc in enumerate(CORPUS):
+            for token in set(doc):
+                assert index.positions(token, idx) == [pos for pos, word in enumerate(doc) if word == token]
+        assert index.positions("dark", 2) == []
+        assert index.positions("missing", 0) == []
+
+    def test_positions_are_delta_encoded(self):
+        docs, offsets, deltas = PositionalIndex(CORPUS).tokens["dark"]
+        assert list(docs) == [0, 1, 3]
+        assert list(offsets) == [0, 2, 3]
+        assert list(deltas) == [0, 3, 3, 0, 2]
+
+    def test_phrase_docs(self):
+        index = PositionalIndex(CORPUS)
+        assert index.phrase_docs(["dark", "mode"]) == 0b1001
+        assert index.phrase_docs(["mode", "dark"]) == 0
+        assert index.phrase_docs(["dark"]) == 0b1011
+        assert index.phrase_docs(["dark", "missing"]) == 0
+
+    def test_min_distance(self):
+        index = PositionalIndex(CORPUS)
+        assert index.min_distance("dark", "mode", 1) == 3
+        assert index.min_distance("dark", "mode", 3) == 1
+        assert index.min_distance("dark", "light", 2) is None
+
+
+class TestPhraseSearch:
+    @pytest.fixture
+    def index(self):
+        bm25 = engine.BM25()
+        bm25.fit(["mode switch for dark themes", "dark mode oled", "light mode", "dark glass and a mode"])
+        return engine.SearchIndex(bm25, engine.RowStore(["n"], [["a", "b", "c", "d"]], 4), {})
+
+    def test_quoted_phrase_restricts_rows(self, index):
+        assert [idx for idx, _ in index.top_k_batch(['"dark mode"'], 5)[0]] == [1]
+        assert index.top_k_batch(['"mode dark"'], 5) == [[]]
+
+    def test_proximity_boosts_adjacent_terms(self, index, monkeypatch):
+        boosted = dict(index.top_k_batch(["dark mode"], 4)[0])
+        monkeypatch.setattr(engine, "PROXIMITY_WEIGHT", 0)
+        plain = dict(index.top_k_batch(["dark mode"], 4)[0])
+        bonus = {idx: boosted[idx] - plain[idx] for idx in plain}
+        assert bonus[1] > bonus[0] > 0  # adjacent beats 3 tokens apart
+        assert bonus[2] == 0            # "dark" is missing
+
+    def test_quoted_and_plain_queries_are_cached_apart(self):
+        quoted = core.search('"bento grid"', "style", 3)
+        plain = core.search("bento grid", "style", 3)
+        assert quoted["count"] < plain["count"]
+
+
+class TestPersistedPositions:
+    @staticmethod
+    def entries(index):
+        return {token: tuple(map(list, entry)) for token, entry in index.positions().tokens.items()}
+
+    @pytest.fixture
+    def args(self):
+        return engine._index_args(core._domain_target("google-fonts"))
+
+    def test_loaded_indexes_never_rewalk_the_corpus(self, args, monkeypatch):
+        built = engine._build_index(*args)
+        expected = self.entries(built)
+        core.load_index(*args)  # builds and persists
+        core.build_bundle()
+        monkeypatch.setattr(PositionalIndex, "__init__", lambda *a: pytest.fail("positions rebuilt"))
+        core.clear_index_cache()
+        bundled = core.load_index(*args)
+        assert isinstance(bundled.positions().tokens, engine._PackedPositions)
+        engine._close_bundle()
+        monkeypatch.setattr(engine, "BUNDLE_PATH", engine.BUNDLE_PATH.with_name("missing.bundle"))
+        core.clear_index_cache()
+        cached = core.load_index(*args)
+        assert self.entries(bundled) == self.entries(cached) == expected
+        assert bundled.top_k_batch(['"cyrillic" serif'], 5) == built.top_k_batch(['"cyrillic" serif'], 5)
@@ -0,0 +1,85 @@
+"""Tests for profiling.py (per-stage timing spans)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import core
+import profiling
+from profiling import span
+
+
+@pytest.fixture(autouse=True)
+def stopped():
+    yield
+    if profiling.active():
+        profiling.stop()
+
+
+def _names(node):
+    return [child["name"] for child in node.get("children", [])]
+
+
+class TestSpans:
+    def test_disabled_spans_are_shared_no_ops(self):
+        assert not profiling.active()
+        assert span("a") is span("b")
+        with span("a"):
+            pass
+
+    def test_tree_nests_and_merges_siblings(self):
+        profiling.start("root")
+        for _ in range(3):
+            with span("outer"):
+                with span("inner"):
+                    pass
+        with span("other"):
+            pass
+        tree = profiling.stop()
+        assert tree["name"] == "root" and tree["calls"] == 1
+        assert _names(tree) == ["outer", "other"]
+        outer = tree["children"][0]
+        assert outer["calls"] == 3
+        assert _names(outer) == ["inner"] and outer["children"][0]["calls"] == 3
+        assert tree["ms"] >= outer["ms"] >= outer["children"][0]["ms"]
+        assert not profiling.active()
+
+    def test_start_twice_and_stop_idle_raise(self):
+        with pytest.raises(RuntimeError):
+            profiling.stop()
+        profiling.start()
+        with pytest.raises(RuntimeError):
+            profiling.start()
+
+    def test_dumps(self, tmp_path):
+        profiling.start(cprofile=True, trace_memory=True)
+        core.search("glassmorphism", "style")
+        tree = profiling.stop(tmp_path / "run")
+        assert tree["dumps"] == [f"{tmp_path / 'run'}.prof", f"{tmp_path / 'run'}.tracemalloc"]
+        assert all(Path(path).stat().st_size for path in tree["dumps"])
+        assert tree["peak_kib"] >= 0
+
+
+class TestSearchStages:
+    def test_cold_search_reports_build_stages(self):
+        profiling.start()
+        core.search("glassmorphism dark", "style")
+        tree = profiling.stop()
+        assert _names(tree) == ["load index", "result cache", "score", "rows"]
+        build = tree["children"][0]["children"][1]
+        assert build["name"] == "build index"
+        assert _names(build) == ["read csv", "fit", "facets"]
+        assert _names(build["children"][1]) == ["tokenize"]
+        assert _names(tree["children"][2]) == ["parse", "rank", "rerank"]
+
+    def test_design_system_stages(self):
+        from design_system import generate_design_system
+        profiling.start()
+        generate_design_system("saas dashboard", motion=8)
+        tree = profiling.stop()
+        assert _names(tree) == ["load reasoning", "generate", "format ascii"]
+        assert _names(tree["children"][1]) == ["catalog", "search product", "reasoning", "search style", "search color",
+                                               "search landing", "search typography", "search gsap"]